@@ -122,7 +122,11 @@ THIRD_PART_CONFIG = {
     # 阿里云服务配置(目前业务方向为短信业务、视频点播业务等)
     "ALI_YUN": {
         "ACCESS_KEY": "",
-        "SECRET": ""
+        "SECRET": "",
+        # 连接池配置, 参数见 utils.http.build_session
+        "HTTP": {
+            "pool_maxsize": 32,
+        }
     },
     # 滑动验证码服务配置
     "GEE_TEST": {
@@ -166,6 +170,8 @@ THIRD_PART_CONFIG = {
             "alipay_public_key_path": os.path.join(BASE_DIR, "data", "ali", "alipay_public_test_2048"),
             # 添加回调域名(异步通知: 支付宝会通知该笔订单交易成功)
             "callback_url": "",
+            # 批量签名的进程数(0 表示在当前进程签名), 批量生成支付链接时开启
+            "sign_processes": 0,
         }
     },
     "WX": {
@@ -177,6 +183,64 @@ THIRD_PART_CONFIG = {
         "token": "bingdujianer",  # 事件推送验证token
         "mch_id": "",
         "api_key_path": os.path.join(BASE_DIR, "data", "wx", "pay_key"),
-        "debug": False
+        "debug": False,
+        # 多商户配置(服务商模式下子商户通过 wx_api.pays.get(mch_id, sub_mch_id) 获取客户端)
+        "merchants": {
+            # "1900000109": {
+            #     "app_id": "wxa22d581a68c18b00",
+            #     "api_key_path": os.path.join(BASE_DIR, "data", "wx", "pay_key_1900000109"),
+            #     "mch_cert": "",
+            #     "mch_key": "",
+            # },
+        },
+        # 多商户客户端缓存(maxsize: 最多缓存的客户端数, check_interval: 检查密钥文件修改的间隔秒数)
+        "pay_registry": {
+            "maxsize": 128,
+            "check_interval": 5,
+        },
+        # access_token 存储, 多进程部署需使用可共享的存储(文件锁 / Django 缓存 / redis)
+        "token_storage": {
+            "backend": "utils.wx.storage.FileStorage",
+            "options": {
+                "path": os.path.join(BASE_DIR, "data", "wx", "token"),
+            }
+        },
+        # 网页授权用户凭证存储(按 openid 保存), 多进程部署可使用 utils.wx.storage.DjangoCacheStorage
+        "oauth_storage": {
+            "backend": "utils.wx.storage.LRUMemoryStorage",
+            "options": {
+                "maxsize": 10000,
+            }
+        },
+        # 用户信息缓存(ttl: 缓存秒数)
+        "profile_storage": {
+            "backend": "utils.wx.storage.LRUMemoryStorage",
+            "options": {
+                "maxsize": 50000,
+            },
+            "ttl": 3600,
+        },
+        # 后台提前刷新 access_token(ahead: 提前刷新秒数, jitter: 随机抖动秒数), 不需要时置为 None
+        "token_refresher": {
+            "ahead": 600,
+            "jitter": 60,
+        },
+        # 按接口限流(每秒调用次数), 收到 45009 时自动减速并逐步恢复, "*" 为其余接口的默认值
+        "rate_limits": {
+            "message/template/send": 50,
+            "user/info": 100,
+        },
+        # 连接池配置(client: 公众号, pay: 支付, oauth: 网页授权), 参数见 utils.http.build_session
+        "http": {
+            "client": {
+                "pool_maxsize": 64,
+            },
+            "pay": {
+                "pool_maxsize": 16,
+            },
+            "oauth": {
+                "pool_maxsize": 16,
+            },
+        },
     }
 }
@@ -0,0 +1,9 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+# Date: 2026/10/18
+
+"""
+    性能基准测试脚本, 在项目根目录执行:
+
+        python -m benchmarks.ali_sign
+"""
@@ -0,0 +1,73 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+# Date: 2026/10/18
+
+"""
+    支付宝 RSA2 签名基准测试
+
+        python -m benchmarks.ali_sign [次数]
+"""
+
+import os
+import sys
+import time
+
+from Crypto.PublicKey import RSA
+
+from utils.ali.tools import calculate_signature
+from utils.ali.tools import RSASigner
+from utils.ali.tools import ProcessPoolSigner
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PRIVATE_KEY_PATH = os.path.join(BASE_DIR, "data", "ali", "app_private_test_2048")
+
+# 与 `AliPay.get_url_params` 生成的待签名字符串一致
+UNSIGNED_STRING = (
+    'app_id=2016081500252288&biz_content={"subject":"洗发水","out_trade_no":"201810180000001",'
+    '"total_amount":"100","product_code":"FAST_INSTANT_TRADE_PAY"}&charset=utf-8'
+    '&method=alipay.trade.page.pay&notify_url=http://www.example.com/notify&sign_type=RSA2'
+    '&timestamp=2018-10-18 12:00:00&version=1.0'
+).encode("utf-8")
+
+
+def bench(name, func, number):
+    started_at = time.time()
+    func(number)
+    elapsed = time.time() - started_at
+    print("{:<32}{:>10.1f} signatures/sec".format(name, number / elapsed))
+
+
+def main(number=1000):
+    with open(PRIVATE_KEY_PATH) as fp:
+        private_key = RSA.importKey(fp.read())
+
+    def legacy(n):
+        # 每次签名重新构建签名对象(优化前的实现)
+        for _ in range(n):
+            calculate_signature(UNSIGNED_STRING, private_key)
+
+    signer = RSASigner(private_key)
+
+    def cached(n):
+        for _ in range(n):
+            signer.sign(UNSIGNED_STRING)
+
+    pool_signer = ProcessPoolSigner(PRIVATE_KEY_PATH)
+    # 预热子进程(进程池在首次批量签名时创建)
+    pool_signer.sign_many([UNSIGNED_STRING] * os.cpu_count())
+
+    def process_pool(n):
+        pool_signer.sign_many([UNSIGNED_STRING] * n)
+
+    assert signer.sign(UNSIGNED_STRING) == calculate_signature(UNSIGNED_STRING, private_key) \
+        == pool_signer.sign(UNSIGNED_STRING)
+
+    bench("legacy (signer per call)", legacy, number)
+    bench("cached signer", cached, number)
+    bench("process pool ({} procs)".format(os.cpu_count()), process_pool, number)
+
+    pool_signer.shutdown()
+
+
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,106 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+# Date: 2026/10/18
+
+"""
+    阿里云 RPC 签名基准测试
+
+        python -m benchmarks.ali_yun_sign [次数] [线程数]
+"""
+
+import sys
+import hmac
+import time
+import uuid
+import base64
+
+from urllib.parse import quote
+from concurrent.futures import ThreadPoolExecutor
+
+from utils.ali.yun.basic import AliYunSigner
+
+ACCESS_KEY_ID = "testid"
+SECRET = "testsecret"
+
+# 与 `AliYunSms.send` 生成的请求参数一致
+PARAMS = {
+    "Action": "SendSms",
+    "Version": "2017-05-25",
+    "RegionId": "cn-hangzhou",
+    "PhoneNumbers": "15300000001",
+    "SignName": "阿里云短信测试专用",
+    "TemplateCode": "SMS_71390007",
+    "TemplateParam": '{"customer":"test"}',
+    "OutId": "123",
+    "Timestamp": "2018-10-18T12:00:00Z",
+    "SignatureNonce": "45e25e9b-0a6f-4070-8c85-2956eda1b466",
+}
+
+
+QUERY_STRING = None
+
+
+def legacy_sign(params):
+    """优化前的实现: 逐个拼接字符串, 通过全局变量传回请求字符串, 每次构建 HMAC
+
+    """
+    data = dict(params, AccessKeyId=ACCESS_KEY_ID, Format="JSON",
+                SignatureMethod="HMAC-SHA1", SignatureVersion="1.0")
+
+    ret = ""
+    for key, value in sorted(data.items(), key=lambda item: item[0]):
+        if not value:
+            continue
+        ret += quote(key, safe="~") + "=" + quote(value, safe="~") + "&"
+
+    global QUERY_STRING
+    QUERY_STRING = ret[:-1]
+    string_to_sign = "GET&%2F&" + quote(QUERY_STRING, safe="~")
+
+    secret = "{}&".format(SECRET)
+    hmb = hmac.new(secret.encode("utf-8"), string_to_sign.encode("utf-8"), "sha1").digest()
+    signature = quote(base64.standard_b64encode(hmb).decode("ascii"), safe="~")
+
+    return "{}&Signature={}".format(QUERY_STRING, signature)
+
+
+def bench(name, func, params_list, threads):
+    started_at = time.time()
+    if threads > 1:
+        with ThreadPoolExecutor(max_workers=threads) as executor:
+            list(executor.map(func, params_list))
+    else:
+        for params in params_list:
+            func(params)
+    elapsed = time.time() - started_at
+    print("{:<32}{:>12.1f} signatures/sec".format(name, len(params_list) / elapsed))
+
+
+def check_reentrant(signer, number, threads):
+    """多线程签名不同参数, 校验结果与单线程一致(没有串用请求字符串)"""
+    params_list = [dict(PARAMS, OutId=str(index)) for index in range(number)]
+    expected = [legacy_sign(params) for params in params_list]
+
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        assert list(executor.map(signer.sign, params_list)) == expected
+
+
+def main(number=100000, threads=8):
+    signer = AliYunSigner(ACCESS_KEY_ID, SECRET)
+
+    assert signer.sign(PARAMS) == legacy_sign(PARAMS)
+    check_reentrant(signer, min(number, 10000), threads)
+
+    # 每次请求的随机码及手机号不同
+    params_list = [
+        dict(PARAMS, SignatureNonce=str(uuid.uuid4()), PhoneNumbers=str(15300000000 + index))
+        for index in range(number)
+    ]
+
+    bench("legacy", legacy_sign, params_list, 1)
+    bench("signer", signer.sign, params_list, 1)
+    bench("signer ({} threads)".format(threads), signer.sign, params_list, threads)
+
+
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:]])
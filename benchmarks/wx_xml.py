@@ -0,0 +1,102 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+# Date: 2026/10/18
+
+"""
+    微信支付 xml 编解码基准测试
+
+        python -m benchmarks.wx_xml [次数]
+"""
+
+import io
+import sys
+import time
+
+from xml.etree import ElementTree as EleTree
+
+from utils.wx import tools
+
+# 统一下单请求
+UNIFIED_ORDER = {
+    "appid": "wx2421b1c4370ec43b",
+    "mch_id": "10000100",
+    "nonce_str": "1add1a30ac87aa2db72f57a2375d8fec",
+    "body": "JSAPI支付测试",
+    "attach": "支付测试",
+    "out_trade_no": "1415659990",
+    "total_fee": 1,
+    "spbill_create_ip": "14.23.150.211",
+    "notify_url": "http://wxpay.wxutil.com/pub_v2/pay/notify.v2.php",
+    "trade_type": "JSAPI",
+    "openid": "oUpF8uMuAJO_M2pxb1Q9zNjWeS6o",
+    "sign": "0CB01533B8C1EF103065174F50BCA001",
+}
+
+# 支付结果通知
+NOTIFY = tools.dict_to_xml({
+    "appid": "wx2421b1c4370ec43b",
+    "attach": "支付测试",
+    "bank_type": "CFT",
+    "fee_type": "CNY",
+    "is_subscribe": "Y",
+    "mch_id": "10000100",
+    "nonce_str": "5d2b6c2a8db53831f7eda20af46e531c",
+    "openid": "oUpF8uMEb4qRXf22hE3X68TekukE",
+    "out_trade_no": "1409811653",
+    "result_code": "SUCCESS",
+    "return_code": "SUCCESS",
+    "sign": "B552ED6B279343CB493C5DD0D78AB241",
+    "time_end": "20140903131540",
+    "total_fee": "1",
+    "coupon_fee": "10",
+    "coupon_count": "1",
+    "coupon_type": "CASH",
+    "coupon_id": "10000",
+    "trade_type": "JSAPI",
+    "transaction_id": "1004400740201409030005092168",
+}).encode("utf-8")
+
+
+def legacy_dict_to_xml(data):
+    # 优化前的实现
+    xml_list = ["<xml>"]
+    for k, v in data.items():
+
+        if not v:
+            continue
+
+        if str(v).isdigit():
+            xml_list.append("<{0}>{1}</{0}>".format(k, v))
+        else:
+            xml_list.append("<{0}><![CDATA[{1}]]></{0}>".format(k, v))
+    xml_list.append("</xml>")
+    return "".join(xml_list)
+
+
+def legacy_xml_to_dict(xml_string):
+    return dict((child.tag, child.text) for child in EleTree.fromstring(xml_string))
+
+
+def bench(name, func, number):
+    started_at = time.time()
+    for _ in range(number):
+        func()
+    elapsed = time.time() - started_at
+    print("{:<40}{:>12.0f} ops/sec".format(name, number / elapsed))
+
+
+def main(number=50000):
+    assert legacy_dict_to_xml(UNIFIED_ORDER).encode("utf-8") == tools.dict_to_xml_bytes(UNIFIED_ORDER)
+    assert legacy_xml_to_dict(NOTIFY) == tools.xml_to_dict(NOTIFY) == tools.read_xml(io.BytesIO(NOTIFY))
+
+    print("parser: {}".format("lxml" if tools.etree is not None else "ElementTree"))
+
+    bench("unifiedorder encode (legacy)", lambda: legacy_dict_to_xml(UNIFIED_ORDER).encode("utf-8"), number)
+    bench("unifiedorder encode", lambda: tools.dict_to_xml_bytes(UNIFIED_ORDER), number)
+    bench("notify decode (legacy)", lambda: legacy_xml_to_dict(NOTIFY), number)
+    bench("notify decode", lambda: tools.xml_to_dict(NOTIFY), number)
+    bench("notify decode (stream)", lambda: tools.read_xml(io.BytesIO(NOTIFY)), number)
+
+
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:]])
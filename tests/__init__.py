@@ -0,0 +1,14 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+# Date: 2026/10/18
+
+"""
+    单元测试
+
+        python -m pytest tests
+"""
+
+import os
+
+# 部分模块导入时读取 `settings.THIRD_PART_CONFIG`
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "awDemo.settings")
@@ -0,0 +1,25 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+# Date: 2026/10/18
+
+import unittest
+
+from benchmarks.ali_yun_sign import PARAMS
+from benchmarks.ali_yun_sign import legacy_sign
+from utils.ali.yun.basic import AliYunSigner
+
+
+class AliYunSignerTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.signer = AliYunSigner("testid", "testsecret")
+
+    def test_same_as_legacy(self):
+        self.assertEqual(self.signer.sign(PARAMS), legacy_sign(PARAMS))
+
+    def test_skip_empty_values(self):
+        # 值为空的参数不参与签名, 与原实现一致
+        for value in (None, "", 0):
+            params = dict(PARAMS, OutId=value)
+            self.assertEqual(self.signer.sign(params), legacy_sign(params))
+            self.assertNotIn("OutId=", self.signer.sign(params))
@@ -0,0 +1,60 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+# Date: 2026/10/18
+
+import gzip
+import unittest
+
+from decimal import Decimal
+
+from utils.wx.pay.bill import BillReader
+
+BILL = (
+    "\ufeff交易时间,商户订单号,总金额,商品名称\r\n"
+    "`2018-10-18 10:00:00,`201810180001,`1.00,`洗发水\r\n"
+    "`2018-10-18 10:01:00,`201810180002,`2.50,\"`洗发水,护发素\"\r\n"
+    "`2018-10-18 10:02:00,`201810180003,`3.00,\"`第一行\r\n第二行\"\r\n"
+    "总交易单数,总交易额\r\n"
+    "`3,`6.50\r\n"
+)
+
+
+def split(data, size):
+    return [data[index:index + size] for index in range(0, len(data), size)]
+
+
+class BillReaderTestCase(unittest.TestCase):
+
+    def assert_bill(self, reader):
+        rows = list(reader)
+
+        self.assertEqual([row["out_trade_no"] for row in rows], ["201810180001", "201810180002", "201810180003"])
+        self.assertEqual(rows[1]["total_fee"], Decimal("2.50"))
+        self.assertEqual(rows[1]["body"], "洗发水,护发素")
+        self.assertEqual(rows[2]["body"], "第一行\r\n第二行")
+        self.assertEqual(reader.summary, {"total_count": 3, "total_fee": Decimal("6.50")})
+
+    def test_parse(self):
+        self.assert_bill(BillReader([BILL.encode("utf-8")]))
+
+    def test_parse_small_chunks(self):
+        # 数据块在多字节字符及行中间截断
+        self.assert_bill(BillReader(split(BILL.encode("utf-8"), 7)))
+
+    def test_parse_gzip(self):
+        self.assert_bill(BillReader(split(gzip.compress(BILL.encode("utf-8")), 16)))
+
+    def test_close_callback(self):
+        closed = []
+        list(BillReader([BILL.encode("utf-8")], close=lambda: closed.append(True)))
+        self.assertEqual(closed, [True])
+
+    def test_download_failed(self):
+        error = b"<xml><return_code><![CDATA[FAIL]]></return_code><return_msg><![CDATA[No Bill Exist]]></return_msg></xml>"
+        with self.assertRaises(ValueError) as context:
+            list(BillReader(split(error, 10)))
+        self.assertIn("No Bill Exist", str(context.exception))
+
+
+if __name__ == "__main__":
+    unittest.main()
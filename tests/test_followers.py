@@ -0,0 +1,133 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+# Date: 2026/10/18
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from utils.wx.client.followers import FollowerSync
+from utils.wx.client.followers import OpenIdSet
+
+
+def openid(index):
+    return "o{:027d}".format(index)
+
+
+class OpenIdSetTestCase(unittest.TestCase):
+
+    def test_from_iterable(self):
+        openids = [openid(index) for index in (5, 3, 9, 3, 1, 7, 5)]
+        # 分块排序后归并, 块之间的重复项也需去除
+        followers = OpenIdSet.from_iterable(openids, chunk_size=2)
+
+        self.assertEqual(list(followers), [openid(index).encode("ascii") for index in (1, 3, 5, 7, 9)])
+        self.assertEqual(followers, OpenIdSet.from_iterable(openids))
+
+    def test_contains(self):
+        followers = OpenIdSet.from_iterable(openid(index) for index in range(0, 100, 2))
+
+        self.assertIn(openid(10), followers)
+        self.assertIn(openid(10).encode("ascii"), followers)
+        self.assertNotIn(openid(11), followers)
+        self.assertNotIn(openid(100), followers)
+        self.assertNotIn(openid(0), OpenIdSet())
+
+    def test_invalid_openid(self):
+        with self.assertRaises(ValueError):
+            OpenIdSet.from_iterable(["short"])
+        with self.assertRaises(ValueError):
+            OpenIdSet(b"x" * 30)
+
+    def test_diff(self):
+        current = OpenIdSet.from_iterable(openid(index) for index in (1, 2, 4, 6, 7))
+        previous = OpenIdSet.from_iterable(openid(index) for index in (0, 2, 3, 6, 8))
+
+        added, removed = current.diff(previous)
+
+        self.assertEqual(added, [openid(index).encode("ascii") for index in (1, 4, 7)])
+        self.assertEqual(removed, [openid(index).encode("ascii") for index in (0, 3, 8)])
+
+    def test_diff_empty(self):
+        followers = OpenIdSet.from_iterable(openid(index) for index in range(3))
+
+        self.assertEqual(followers.diff(OpenIdSet()), (list(followers), []))
+        self.assertEqual(OpenIdSet().diff(followers), ([], list(followers)))
+        self.assertEqual(followers.diff(followers), ([], []))
+
+
+class FakeUser(object):
+
+    """
+    按 next_openid 分页返回关注者列表
+    """
+
+    def __init__(self, openids, page_size=2):
+        self.openids = openids
+        self.page_size = page_size
+
+    def get_followers(self, first_user_id=None):
+        start = self.openids.index(first_user_id) + 1 if first_user_id else 0
+        page = self.openids[start:start + self.page_size]
+        return {
+            "total": len(self.openids),
+            "count": len(page),
+            "data": {"openid": page} if page else {},
+            "next_openid": page[-1] if page else "",
+        }
+
+
+class FollowerSyncTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+        self.user = FakeUser([openid(index) for index in (3, 1, 2)])
+
+    def tearDown(self):
+        shutil.rmtree(self.path)
+
+    def sync(self, **kwargs):
+        return FollowerSync(self.user, self.path, prefetch=False, **kwargs)
+
+    def encode(self, *indexes):
+        return [openid(index).encode("ascii") for index in indexes]
+
+    def test_incremental_and_full(self):
+        self.assertEqual(self.sync().run(), (self.encode(1, 2, 3), []))
+
+        # 新关注追加在末尾, 取消关注只有全量同步才能得到
+        self.user.openids = [openid(index) for index in (3, 2, 0)]
+        self.assertEqual(self.sync().run(), (self.encode(0), []))
+        self.assertEqual(self.sync().run(full=True), ([], self.encode(1)))
+        self.assertEqual(list(self.sync().load_snapshot()), self.encode(0, 2, 3))
+
+    def test_full_interval(self):
+        self.sync().run()
+        self.user.openids = [openid(index) for index in (3, 0)]
+
+        added, removed = self.sync(full_interval=0).run()
+        self.assertEqual((added, removed), (self.encode(0), self.encode(1, 2)))
+
+    def test_interrupted_before_state_saved(self):
+        self.sync().run()
+        self.user.openids.append(openid(0))
+
+        # 新快照已写入, 状态文件切换失败
+        with self.assertRaises(IOError):
+            CommitFailingSync(self.user, self.path, prefetch=False).run()
+
+        self.assertEqual(self.sync().run(), (self.encode(0), []))
+        self.assertEqual(sorted(os.listdir(self.path)), ["followers.snapshot.2", "followers.state.json"])
+
+
+class CommitFailingSync(FollowerSync):
+
+    def _save_state(self, state):
+        if "progress" not in state:
+            raise IOError("disk full")
+        super(CommitFailingSync, self)._save_state(state)
+
+
+if __name__ == "__main__":
+    unittest.main()
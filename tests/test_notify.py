@@ -0,0 +1,88 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+# Date: 2026/10/18
+
+import unittest
+
+from utils.wx.pay.basic import WeChatPay
+from utils.wx.pay.notify import PaymentNotifyIngestor
+from utils.wx.pay.notify import SUCCESS_RESPONSE
+from utils.wx.tools import calculate_signature
+from utils.wx.tools import dict_to_xml_bytes
+from utils.wx.tools import xml_to_dict
+
+API_KEY = "192006250b4c09247ec02edce69f6a2d"
+
+
+def notify_body(api_key=API_KEY, **data):
+    data.setdefault("return_code", "SUCCESS")
+    data["sign"] = calculate_signature(data, api_key)
+    return dict_to_xml_bytes(data)
+
+
+class PaymentNotifyIngestorTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.handled = []
+        self.pay = WeChatPay("wx0000000000000000", None, "1900000109", api_key=API_KEY)
+        self.ingestor = PaymentNotifyIngestor(self.pay, handler=self.handled.append)
+
+    def assert_fail(self, response):
+        self.assertEqual(xml_to_dict(response)["return_code"], "FAIL")
+
+    def test_success(self):
+        body = notify_body(result_code="SUCCESS", transaction_id="4200000001", out_trade_no="1", total_fee="100")
+
+        self.assertEqual(self.ingestor.ingest(body), SUCCESS_RESPONSE)
+        # 重发的通知不再处理
+        self.assertEqual(self.ingestor.ingest(body), SUCCESS_RESPONSE)
+
+        self.assertEqual([data["transaction_id"] for data in self.handled], ["4200000001"])
+        self.assertEqual(self.handled[0]["total_fee"], 100)
+        self.assertEqual(self.ingestor.stats["duplicated"], 1)
+
+    def test_invalid_sign(self):
+        body = notify_body(api_key="wrong", result_code="SUCCESS", transaction_id="4200000001")
+
+        self.assert_fail(self.ingestor.ingest(body))
+        self.assertEqual(self.handled, [])
+
+    def test_failed_payment(self):
+        # 支付失败的通知没有微信订单号, 验签通过后应答成功
+        body = notify_body(result_code="FAIL", err_code="NOTENOUGH", out_trade_no="1")
+
+        self.assertEqual(self.ingestor.ingest(body), SUCCESS_RESPONSE)
+        self.assertEqual(self.ingestor.ingest(dict_to_xml_bytes({"return_code": "FAIL", "return_msg": "x"})),
+                         SUCCESS_RESPONSE)
+        self.assertEqual(self.handled, [])
+        self.assertEqual(self.ingestor.stats["ignored"], 2)
+
+    def test_handler_failed(self):
+        def handler(data):
+            if not calls:
+                calls.append(data)
+                raise IOError("database is down")
+            self.handled.append(data)
+
+        calls = []
+        ingestor = PaymentNotifyIngestor(self.pay, handler=handler)
+        body = notify_body(result_code="SUCCESS", transaction_id="4200000001")
+
+        # 处理失败时应答 FAIL, 微信重发后重新处理
+        self.assert_fail(ingestor.ingest(body))
+        self.assertEqual(ingestor.ingest(body), SUCCESS_RESPONSE)
+        self.assertEqual(len(self.handled), 1)
+
+    def test_background(self):
+        ingestor = PaymentNotifyIngestor(self.pay, handler=self.handled.append, background=True, max_workers=1)
+        ingestor.start()
+        self.assertEqual(ingestor.ingest(notify_body(result_code="SUCCESS", transaction_id="4200000001")),
+                         SUCCESS_RESPONSE)
+        ingestor.stop()
+
+        self.assertEqual(len(self.handled), 1)
+        self.assertEqual(ingestor.stats["processed"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,117 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+# Date: 2026/10/18
+
+import time
+import unittest
+
+from utils.wx.pay.poller import FAILED
+from utils.wx.pay.poller import ORDER_NOT_EXIST
+from utils.wx.pay.poller import OrderPoller
+
+
+class FakeOrder(object):
+
+    """
+    按商户订单号返回预设的查询/关单结果
+    """
+
+    def __init__(self, queries, closes=None):
+        self.queries = queries
+        self.closes = closes or {}
+        self.closed = []
+
+    def query(self, out_trade_no):
+        results = self.queries[out_trade_no]
+        result = results.pop(0) if len(results) > 1 else results[0]
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    def close(self, out_trade_no):
+        self.closed.append(out_trade_no)
+        return self.closes.get(out_trade_no, {"return_code": "SUCCESS", "result_code": "SUCCESS"})
+
+
+class FakePay(object):
+
+    def __init__(self, order):
+        self.order = order
+
+
+class OrderPollerTestCase(unittest.TestCase):
+
+    def poll(self, order, expire_in=0.05, timeout=2, **kwargs):
+        results = {}
+        options = dict(initial_delay=0.01, max_delay=0.05)
+        options.update(kwargs)
+
+        poller = OrderPoller(FakePay(order), on_result=lambda no, state, result: results.setdefault(no, state),
+                             **options)
+        poller.start()
+        for out_trade_no in order.queries:
+            poller.add(out_trade_no, time_expire=time.time() + expire_in)
+
+        deadline = time.time() + timeout
+        while len(results) < len(order.queries) and time.time() < deadline:
+            time.sleep(0.01)
+        poller.stop()
+
+        return results, poller
+
+    def test_final_state(self):
+        order = FakeOrder({"paid": [{"trade_state": "NOTPAY"}, {"trade_state": "SUCCESS"}]})
+        results, poller = self.poll(order, expire_in=10)
+
+        self.assertEqual(results, {"paid": "SUCCESS"})
+        self.assertEqual(order.closed, [])
+        self.assertEqual(poller.metrics["pending"], 0)
+
+    def test_close_expired(self):
+        order = FakeOrder({"notpay": [{"trade_state": "NOTPAY"}]})
+        results, poller = self.poll(order)
+
+        self.assertEqual(results, {"notpay": "CLOSED"})
+        self.assertEqual(order.closed, ["notpay"])
+        self.assertEqual(poller.metrics["closed"], 1)
+
+    def test_paid_before_close(self):
+        order = FakeOrder(
+            {"paid": [{"trade_state": "NOTPAY"}] * 3 + [{"trade_state": "SUCCESS"}]},
+            closes={"paid": {"return_code": "SUCCESS", "result_code": "FAIL", "err_code": "ORDERPAID"}},
+        )
+        results, _ = self.poll(order, expire_in=0)
+
+        self.assertEqual(results, {"paid": "SUCCESS"})
+
+    def test_order_not_exist(self):
+        order = FakeOrder({"missing": [{"return_code": "SUCCESS", "result_code": "FAIL", "err_code": "ORDERNOTEXIST"}]})
+        results, poller = self.poll(order)
+
+        self.assertEqual(results, {"missing": ORDER_NOT_EXIST})
+        self.assertEqual(order.closed, [])
+        self.assertEqual(poller.metrics["pending"], 0)
+
+    def test_query_failed_after_expired(self):
+        order = FakeOrder({"down": [IOError("connection refused")]})
+        results, poller = self.poll(order, expire_in=0, max_delay=0.1)
+
+        # 无法确认状态时不关单, 失效 max_delay 后放弃
+        self.assertEqual(results, {"down": FAILED})
+        self.assertEqual(order.closed, [])
+        self.assertGreater(poller.metrics["errors"], 1)
+
+    def test_stop_shuts_down_executor(self):
+        order = FakeOrder({"notpay": [{"trade_state": "NOTPAY"}]})
+        poller = OrderPoller(FakePay(order), initial_delay=0)
+        poller.start()
+        poller.add("notpay", time_expire=time.time() + 60)
+        poller.stop(wait=True)
+
+        self.assertFalse(poller._thread.is_alive())
+        with self.assertRaises(RuntimeError):
+            poller._executor.submit(time.time)
+
+
+if __name__ == "__main__":
+    unittest.main()
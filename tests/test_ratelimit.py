@@ -0,0 +1,128 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+# Date: 2026/10/18
+
+import time
+import threading
+import unittest
+
+from unittest import mock
+
+from utils.ratelimit import AdaptiveRateLimiter
+from utils.ratelimit import RateLimiter
+
+
+class FakeClock(object):
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class RateLimiterTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.clock = FakeClock()
+        patcher = mock.patch("utils.ratelimit.time.monotonic", self.clock)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_burst_then_wait(self):
+        limiter = RateLimiter(10, capacity=2)
+
+        self.assertEqual(limiter.reserve(), 0)
+        self.assertEqual(limiter.reserve(), 0)
+        # 令牌用完后按速率排队
+        self.assertAlmostEqual(limiter.reserve(), 0.1)
+        self.assertAlmostEqual(limiter.reserve(), 0.2)
+
+    def test_refill(self):
+        limiter = RateLimiter(10, capacity=2)
+        for _ in range(2):
+            limiter.reserve()
+
+        self.clock.now += 0.1
+        self.assertEqual(limiter.reserve(), 0)
+
+        # 不超过容量
+        self.clock.now += 10
+        for _ in range(2):
+            self.assertEqual(limiter.reserve(), 0)
+        self.assertGreater(limiter.reserve(), 0)
+
+    def test_default_capacity(self):
+        self.assertEqual(RateLimiter(50).capacity, 50)
+        self.assertEqual(RateLimiter(0.5).capacity, 1)
+
+
+class AdaptiveRateLimiterTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.clock = FakeClock()
+        patcher = mock.patch("utils.ratelimit.time.monotonic", self.clock)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_decrease_once_within_cooldown(self):
+        limiter = AdaptiveRateLimiter(100, cooldown=1)
+
+        limiter.decrease()
+        limiter.decrease()
+        self.assertEqual(limiter.rate, 50)
+        # 减速后不保留积攒的令牌
+        self.assertGreater(limiter.reserve(), 0)
+
+        self.clock.now += 1
+        limiter.decrease()
+        self.assertEqual(limiter.rate, 25)
+
+    def test_min_rate(self):
+        limiter = AdaptiveRateLimiter(100, min_rate=30, cooldown=0)
+        for _ in range(5):
+            limiter.decrease()
+        self.assertEqual(limiter.rate, 30)
+
+    def test_increase_to_max_rate(self):
+        limiter = AdaptiveRateLimiter(100, increase_step=20, cooldown=0)
+        limiter.decrease()
+
+        limiter.increase()
+        self.assertEqual(limiter.rate, 70)
+        for _ in range(5):
+            limiter.increase()
+        self.assertEqual(limiter.rate, 100)
+
+    def test_concurrent_increase(self):
+        limiter = AdaptiveRateLimiter(1000, min_rate=1, increase_step=1, cooldown=0)
+        for _ in range(10):
+            limiter.decrease()
+        start_rate = limiter.rate
+
+        def worker():
+            for _ in range(100):
+                limiter.increase()
+
+        threads = [threading.Thread(target=worker) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        # 每次增加都在锁内读取并更新速率, 不会丢失
+        self.assertEqual(limiter.rate, start_rate + 400)
+
+
+class AcquireTestCase(unittest.TestCase):
+
+    def test_acquire_sleeps(self):
+        limiter = RateLimiter(20, capacity=1)
+        started_at = time.monotonic()
+        for _ in range(3):
+            limiter.acquire()
+        self.assertGreaterEqual(time.monotonic() - started_at, 0.09)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,103 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+# Date: 2026/10/18
+
+import unittest
+
+from decimal import Decimal
+
+from utils.wx.pay import reconcile
+from utils.wx.pay.reconcile import AMOUNT_MISMATCH
+from utils.wx.pay.reconcile import BillReconciler
+from utils.wx.pay.reconcile import MISSING_IN_BILL
+from utils.wx.pay.reconcile import MISSING_LOCAL
+from utils.wx.pay.reconcile import STATUS_MISMATCH
+
+
+def payment(out_trade_no, total_fee, trade_state="SUCCESS"):
+    return {
+        "out_trade_no": out_trade_no,
+        "transaction_id": "wx" + out_trade_no,
+        "trade_state": trade_state,
+        "total_fee": Decimal(total_fee),
+        "refund_fee": Decimal("0"),
+    }
+
+
+def refund(out_trade_no, out_refund_no, refund_fee):
+    return {
+        "out_trade_no": out_trade_no,
+        "out_refund_no": out_refund_no,
+        "transaction_id": "wx" + out_trade_no,
+        "trade_state": "REFUND",
+        "total_fee": Decimal("0"),
+        "refund_fee": Decimal(refund_fee),
+    }
+
+
+class BillReconcilerTestCase(unittest.TestCase):
+
+    def reconcile(self, bill, orders):
+        reconciler = BillReconciler(bill, orders)
+        return reconciler, dict((mismatch.out_trade_no, mismatch) for mismatch in reconciler)
+
+    def test_mismatches(self):
+        bill = [
+            payment("1", "1.00"),
+            payment("2", "2.00"),
+            payment("3", "3.00"),
+            payment("4", "4.00"),
+        ]
+        orders = [
+            ("1", 100, "SUCCESS"),
+            ("2", 250, "SUCCESS"),
+            ("3", 300, "NOTPAY"),
+            ("5", 500, "SUCCESS"),
+            ("6", 600, "CLOSED"),
+        ]
+        reconciler, mismatches = self.reconcile(bill, orders)
+
+        self.assertEqual(mismatches["2"].kind, AMOUNT_MISMATCH)
+        self.assertEqual(mismatches["3"].kind, STATUS_MISMATCH)
+        self.assertEqual(mismatches["4"].kind, MISSING_LOCAL)
+        self.assertEqual(mismatches["4"].bill, (400, "SUCCESS", "wx4", 0))
+        self.assertEqual(mismatches["5"].kind, MISSING_IN_BILL)
+        self.assertEqual(sorted(mismatches), ["2", "3", "4", "5"])
+        self.assertEqual(reconciler.stats["bill"], 4)
+        self.assertEqual(reconciler.stats["local"], 5)
+        self.assertEqual(reconciler.stats["matched"], 2)
+
+    def test_refunds_excluded_from_payments(self):
+        bill = [
+            payment("1", "10.00"),
+            refund("1", "r1", "3.00"),
+            refund("1", "r2", "2.00"),
+            # 之前支付, 当日退款
+            refund("2", "r3", "5.00"),
+        ]
+        orders = [
+            ("1", 1000, "REFUND"),
+            ("2", 500, "REFUND"),
+        ]
+        reconciler, mismatches = self.reconcile(bill, orders)
+
+        self.assertEqual(mismatches, {})
+        self.assertEqual(reconciler.stats["matched"], 2)
+
+    def test_refund_amount_reported(self):
+        bill = [payment("1", "10.00"), refund("1", "r1", "3.00"), refund("1", "r2", "2.00")]
+        _, mismatches = self.reconcile(bill, [])
+
+        self.assertEqual(mismatches["1"].bill, (1000, "SUCCESS", "wx1", 500))
+
+    def test_batches(self):
+        bill = [payment(str(index), "1.00") for index in range(reconcile.BATCH_SIZE * 3 + 7)]
+        orders = [(str(index), 100, "SUCCESS") for index in range(1, reconcile.BATCH_SIZE * 3 + 7)]
+        reconciler, mismatches = self.reconcile(bill, orders)
+
+        self.assertEqual(list(mismatches), ["0"])
+        self.assertEqual(reconciler.stats["matched"], reconcile.BATCH_SIZE * 3 + 6)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,274 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+# Date: 2026/10/18
+
+import unittest
+
+from unittest import mock
+
+import requests
+
+from urllib3.exceptions import NewConnectionError
+
+from utils.ali.yun.basic import AliYunClient
+from utils.retry import CircuitBreaker
+from utils.retry import CircuitBreakers
+from utils.retry import CircuitOpenError
+from utils.retry import IDEMPOTENT_RETRY_POLICY
+from utils.retry import RetryPolicy
+from utils.retry import is_connect_error
+from utils.retry import send_with_retry
+
+URL = "https://dysmsapi.aliyuncs.com/"
+
+
+class FakeClock(object):
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class FakeResponse(object):
+
+    def __init__(self, status_code=200, data=None):
+        self.status_code = status_code
+        self.data = data if data is not None else {}
+
+    def json(self):
+        return self.data
+
+
+class FakeSend(object):
+
+    """
+    依次返回给定的响应或抛出给定的异常
+    """
+
+    def __init__(self, *results):
+        self.results = list(results)
+        self.calls = []
+
+    def __call__(self, method, url, **kwargs):
+        self.calls.append((method, url, kwargs))
+        result = self.results.pop(0)
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+
+def connect_error():
+    return requests.ConnectionError(NewConnectionError(None, "Connection refused"))
+
+
+class RetryTestCase(unittest.TestCase):
+
+    def setUp(self):
+        # 每个用例使用单独的熔断器, 不重试等待
+        for patcher in (
+            mock.patch("utils.retry.circuit_breakers", CircuitBreakers()),
+            mock.patch("utils.retry.time.sleep"),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+
+class RetryPolicyTestCase(unittest.TestCase):
+
+    def test_delay_backoff(self):
+        policy = RetryPolicy(backoff=0.2, max_backoff=0.5, jitter=0)
+
+        self.assertAlmostEqual(policy.delay(1), 0.2)
+        self.assertAlmostEqual(policy.delay(2), 0.4)
+        self.assertAlmostEqual(policy.delay(3), 0.5)
+
+    def test_can_retry(self):
+        policy = RetryPolicy(max_attempts=2)
+
+        self.assertTrue(policy.can_retry(1))
+        self.assertFalse(policy.can_retry(2))
+
+    def test_retryable_exception(self):
+        policy = RetryPolicy()
+
+        self.assertTrue(is_connect_error(connect_error()))
+        self.assertTrue(policy.is_retryable_exception(requests.ConnectTimeout()))
+        self.assertTrue(policy.is_retryable_exception(connect_error()))
+        # 读超时及连接中断时请求可能已被处理
+        self.assertFalse(policy.is_retryable_exception(requests.ReadTimeout()))
+        self.assertFalse(policy.is_retryable_exception(requests.ConnectionError("Connection aborted")))
+        self.assertFalse(policy.is_retryable_exception(CircuitOpenError()))
+
+        self.assertTrue(IDEMPOTENT_RETRY_POLICY.is_retryable_exception(requests.ReadTimeout()))
+        self.assertFalse(IDEMPOTENT_RETRY_POLICY.is_retryable_exception(CircuitOpenError()))
+
+
+class CircuitBreakerTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.clock = FakeClock()
+        patcher = mock.patch("utils.retry.time.monotonic", self.clock)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_open_after_threshold(self):
+        breaker = CircuitBreaker("example.com", failure_threshold=2, recovery_timeout=10)
+
+        breaker.before_request()
+        breaker.record_failure()
+        breaker.before_request()
+        breaker.record_failure()
+
+        self.assertEqual(breaker.state, CircuitBreaker.OPEN)
+        with self.assertRaises(CircuitOpenError):
+            breaker.before_request()
+
+    def test_success_resets_failures(self):
+        breaker = CircuitBreaker("example.com", failure_threshold=2)
+
+        breaker.record_failure()
+        breaker.record_success()
+        breaker.record_failure()
+
+        self.assertEqual(breaker.state, CircuitBreaker.CLOSED)
+
+    def test_half_open_single_probe(self):
+        breaker = CircuitBreaker("example.com", failure_threshold=1, recovery_timeout=10)
+        breaker.record_failure()
+
+        self.clock.now += 10
+        # 只放行一个探测请求
+        breaker.before_request()
+        self.assertEqual(breaker.state, CircuitBreaker.HALF_OPEN)
+        with self.assertRaises(CircuitOpenError):
+            breaker.before_request()
+
+        breaker.record_success()
+        self.assertEqual(breaker.state, CircuitBreaker.CLOSED)
+        breaker.before_request()
+
+    def test_half_open_failure_reopens(self):
+        breaker = CircuitBreaker("example.com", failure_threshold=3, recovery_timeout=10)
+        for _ in range(3):
+            breaker.record_failure()
+
+        self.clock.now += 10
+        breaker.before_request()
+        breaker.record_failure()
+
+        self.assertEqual(breaker.state, CircuitBreaker.OPEN)
+        with self.assertRaises(CircuitOpenError):
+            breaker.before_request()
+
+    def test_breakers_by_host(self):
+        breakers = CircuitBreakers()
+
+        self.assertIs(breakers.get("https://a.example.com/x"), breakers.get("https://a.example.com/y"))
+        self.assertIsNot(breakers.get("https://a.example.com/x"), breakers.get("https://b.example.com/x"))
+
+
+class SendWithRetryTestCase(RetryTestCase):
+
+    def test_retry_connect_error(self):
+        send = FakeSend(connect_error(), FakeResponse(200))
+
+        res = send_with_retry(send, "GET", URL, RetryPolicy())
+
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(len(send.calls), 2)
+
+    def test_no_retry_read_timeout(self):
+        send = FakeSend(requests.ReadTimeout(), FakeResponse(200))
+
+        with self.assertRaises(requests.ReadTimeout):
+            send_with_retry(send, "GET", URL, RetryPolicy())
+        self.assertEqual(len(send.calls), 1)
+
+    def test_idempotent_retry_read_timeout(self):
+        send = FakeSend(requests.ReadTimeout(), FakeResponse(502), FakeResponse(200))
+
+        res = send_with_retry(send, "GET", URL, IDEMPOTENT_RETRY_POLICY)
+
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(len(send.calls), 3)
+
+    def test_status(self):
+        # 默认只重试 503, 其它 5xx 直接返回
+        send = FakeSend(FakeResponse(503), FakeResponse(502))
+
+        res = send_with_retry(send, "GET", URL, RetryPolicy())
+
+        self.assertEqual(res.status_code, 502)
+        self.assertEqual(len(send.calls), 2)
+
+    def test_max_attempts(self):
+        send = FakeSend(*[connect_error() for _ in range(3)])
+
+        with self.assertRaises(requests.ConnectionError):
+            send_with_retry(send, "GET", URL, RetryPolicy(max_attempts=3))
+        self.assertEqual(len(send.calls), 3)
+
+    def test_circuit_open(self):
+        with mock.patch("utils.retry.circuit_breakers", CircuitBreakers(failure_threshold=2)):
+            send = FakeSend(*[connect_error() for _ in range(2)])
+            with self.assertRaises(requests.ConnectionError):
+                send_with_retry(send, "GET", URL, RetryPolicy(max_attempts=2))
+
+            # 熔断期间不再发送请求
+            with self.assertRaises(CircuitOpenError):
+                send_with_retry(send, "GET", URL, RetryPolicy())
+        self.assertEqual(len(send.calls), 2)
+
+
+class AliYunRetryTestCase(RetryTestCase):
+
+    def setUp(self):
+        super(AliYunRetryTestCase, self).setUp()
+        patcher = mock.patch("utils.ali.yun.basic.time.sleep")
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def client(self, *results, **kwargs):
+        session = mock.Mock()
+        session.request = FakeSend(*results)
+        return AliYunClient("testid", "testsecret", session=session, **kwargs)
+
+    def test_query_retry_throttling(self):
+        client = self.client(
+            FakeResponse(data={"Code": "Throttling.User"}),
+            FakeResponse(data={"Code": "OK", "TotalCount": 0}),
+        )
+
+        result = client.sms.query("15300000001", "20181018", 10, 1)
+
+        self.assertEqual(result["Code"], "OK")
+        calls = client._http.request.calls
+        self.assertEqual(len(calls), 2)
+        # 每次重试重新签名
+        self.assertNotEqual(calls[0][1], calls[1][1])
+
+    def test_send_no_retry(self):
+        # 发送短信返回服务端错误时可能已发送, 不重试
+        client = self.client(
+            FakeResponse(data={"Code": "isp.SYSTEM_ERROR"}),
+            FakeResponse(data={"Code": "OK"}),
+        )
+
+        result = client.sms.send("15300000001", "阿里云短信测试专用", "SMS_71390007", None)
+
+        self.assertEqual(result["Code"], "isp.SYSTEM_ERROR")
+        self.assertEqual(len(client._http.request.calls), 1)
+
+    def test_auto_retry_disabled(self):
+        client = self.client(
+            FakeResponse(data={"Code": "Throttling"}),
+            FakeResponse(data={"Code": "OK"}),
+            auto_retry=False,
+        )
+
+        result = client.sms.query("15300000001", "20181018", 10, 1)
+
+        self.assertEqual(result["Code"], "Throttling")
+        self.assertEqual(len(client._http.request.calls), 1)
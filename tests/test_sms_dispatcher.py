@@ -0,0 +1,116 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+# Date: 2026/10/18
+
+import json
+import unittest
+
+from utils.ali.yun.sms_dispatcher import BATCH_LIMIT
+from utils.ali.yun.sms_dispatcher import SEND_LIMIT
+from utils.ali.yun.sms_dispatcher import SmsDispatcher
+from utils.ali.yun.sms_dispatcher import _Submission
+from utils.ali.yun.sms_dispatcher import plan_calls
+
+SIGN_NAME = "阿里云短信测试专用"
+
+
+def submission(phone_number, template_param=None, template_code="SMS_71390007", sign_name=SIGN_NAME):
+    return _Submission(phone_number, sign_name, template_code, template_param)
+
+
+def phone_numbers(submissions):
+    return [submission.phone_number for submission in submissions]
+
+
+class FakeSms(object):
+
+    def __init__(self):
+        self.calls = []
+
+    def send(self, phone_numbers, sign_name, template_code, template_param):
+        self.calls.append(("SendSms", phone_numbers.split(",")))
+        return {"Code": "OK", "BizId": "biz{}".format(len(self.calls))}
+
+    def send_batch(self, phone_numbers, sign_names, template_code, template_params):
+        self.calls.append(("SendBatchSms", json.loads(phone_numbers)))
+        return {"Code": "OK", "BizId": "biz{}".format(len(self.calls))}
+
+
+class PlanCallsTestCase(unittest.TestCase):
+
+    def test_same_content(self):
+        submissions = [submission(str(15300000000 + index), '{"code":"1"}') for index in range(SEND_LIMIT + 1)]
+
+        calls = plan_calls(submissions)
+
+        self.assertEqual([(action, len(group)) for action, group in calls], [("SendSms", SEND_LIMIT), ("SendSms", 1)])
+
+    def test_different_content(self):
+        submissions = [
+            submission(str(15300000000 + index), '{"code":"%d"}' % index) for index in range(BATCH_LIMIT + 2)
+        ]
+
+        calls = plan_calls(submissions)
+
+        self.assertEqual(
+            [(action, len(group)) for action, group in calls],
+            [("SendBatchSms", BATCH_LIMIT), ("SendBatchSms", 2)]
+        )
+
+    def test_group_by_template(self):
+        calls = plan_calls([
+            submission("15300000001", template_code="SMS_1"),
+            submission("15300000002", template_code="SMS_2"),
+            submission("15300000003", template_code="SMS_1"),
+        ])
+
+        self.assertEqual(
+            sorted((action, phone_numbers(group)) for action, group in calls),
+            [("SendSms", ["15300000001", "15300000003"]), ("SendSms", ["15300000002"])]
+        )
+
+    def test_duplicated(self):
+        first = submission("15300000001", '{"code":"1"}')
+        duplicated = submission("15300000001", '{"code":"1"}')
+        other = submission("15300000001", '{"code":"2"}')
+
+        calls = plan_calls([first, duplicated, other])
+
+        # 相同内容只发送一次, 不同内容仍分别发送
+        self.assertEqual(len(calls), 1)
+        action, group = calls[0]
+        self.assertEqual(action, "SendBatchSms")
+        self.assertEqual(group, [first, other])
+
+        first.future.set_result("biz")
+        self.assertEqual(duplicated.future.result(timeout=0), "biz")
+
+    def test_duplicated_exception(self):
+        first = submission("15300000001")
+        duplicated = submission("15300000001")
+
+        self.assertEqual(plan_calls([first, duplicated]), [("SendSms", [first])])
+
+        first.future.set_exception(ValueError("isv.BUSINESS_LIMIT_CONTROL"))
+        with self.assertRaises(ValueError):
+            duplicated.future.result(timeout=0)
+
+
+class SmsDispatcherTestCase(unittest.TestCase):
+
+    def test_dispatch(self):
+        sms = FakeSms()
+        dispatcher = SmsDispatcher(sms, sign_name=SIGN_NAME, linger=0.5)
+        dispatcher.start()
+
+        futures = [
+            dispatcher.submit("15300000001", "SMS_71390007", {"code": "1"}),
+            dispatcher.submit("15300000002", "SMS_71390007", {"code": "1"}),
+            dispatcher.submit("15300000001", "SMS_71390007", {"code": "1"}),
+        ]
+        dispatcher.stop()
+
+        self.assertEqual(sms.calls, [("SendSms", ["15300000001", "15300000002"])])
+        self.assertEqual([future.result(timeout=1) for future in futures], ["biz1"] * 3)
+        self.assertEqual(dispatcher.stats["submitted"], 3)
+        self.assertEqual(dispatcher.stats["sent"], 2)
@@ -0,0 +1,80 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+# Date: 2026/10/18
+
+import os
+import csv
+import shutil
+import tempfile
+import unittest
+
+from utils.ali.yun.sms_report import SmsReportExporter
+
+
+class FakeSms(object):
+
+    """
+    每个号码有 counts[号码] 条记录, failing 中的 (号码, 页码) 查询失败
+    """
+
+    def __init__(self, counts, failing=()):
+        self.counts = counts
+        self.failing = set(failing)
+
+    def query(self, phone_number, send_date, page_size, current_page):
+        if (phone_number, current_page) in self.failing:
+            return {"Code": "isp.SYSTEM_ERROR", "Message": "error"}
+
+        total = self.counts[phone_number]
+        start = (current_page - 1) * page_size
+        rows = [
+            {"PhoneNum": phone_number, "OutId": str(index)} for index in range(start, min(start + page_size, total))
+        ]
+        return {"Code": "OK", "TotalCount": total, "SmsSendDetailDTOs": {"SmsSendDetailDTO": rows}}
+
+
+class SmsReportExporterTestCase(unittest.TestCase):
+
+    def exporter(self, sms):
+        return SmsReportExporter(sms, "20181018", max_workers=2, qps=None, page_size=2)
+
+    def test_iter_rows(self):
+        exporter = self.exporter(FakeSms({"15300000001": 5, "15300000002": 0, "15300000003": 2}))
+
+        rows = list(exporter.iter_rows(["15300000001", "15300000002", "15300000003"]))
+
+        self.assertEqual(
+            sorted((row["PhoneNum"], row["OutId"]) for row in rows),
+            [("15300000001", str(index)) for index in range(5)] + [("15300000003", "0"), ("15300000003", "1")]
+        )
+        self.assertEqual(exporter.stats["numbers"], 3)
+        self.assertEqual(exporter.stats["pages"], 5)
+        self.assertEqual(exporter.stats["rows"], 7)
+        self.assertEqual(exporter.failures, [])
+
+    def test_failures(self):
+        sms = FakeSms({"15300000001": 5, "15300000002": 5}, failing=[("15300000001", 1), ("15300000002", 2)])
+        exporter = self.exporter(sms)
+
+        rows = list(exporter.iter_rows(["15300000001", "15300000002"]))
+
+        self.assertEqual(len(rows), 3)
+        self.assertEqual(exporter.stats["errors"], 2)
+        failures = sorted(exporter.failures)
+        # 首页失败时其余页未查询
+        self.assertEqual(failures[0][:2], ("15300000001", 1))
+        self.assertIn("remaining pages not fetched", failures[0][2])
+        self.assertEqual(failures[1], ("15300000002", 2, "isp.SYSTEM_ERROR: error"))
+
+    def test_export_csv(self):
+        path = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, path)
+        filename = os.path.join(path, "20181018.csv")
+
+        stats = self.exporter(FakeSms({"15300000001": 3})).export(["15300000001"], filename)
+
+        with open(filename, encoding="utf-8", newline="") as fp:
+            rows = list(csv.DictReader(fp))
+        self.assertEqual(sorted(row["OutId"] for row in rows), ["0", "1", "2"])
+        self.assertEqual(stats["rows"], 3)
+        self.assertFalse(os.path.exists("{}.tmp".format(filename)))
@@ -0,0 +1,231 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+# Date: 2026/10/18
+
+"""
+    异步 HTTP 传输(基于 aiohttp)
+
+        接收与 `requests` 相同的请求参数, 返回读取完毕的响应对象(`stream=True` 时逐块读取),
+        使同步客户端的结果解析代码可以直接复用
+"""
+
+import ssl
+import json
+import asyncio
+import logging
+import threading
+
+try:
+    import aiohttp
+except ImportError:  # pragma: no cover
+    aiohttp = None
+
+import requests
+
+from utils.retry import ConnectError
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncResponse(object):
+
+    """
+    与 `requests.Response` 接口一致的响应对象(仅实现客户端用到的部分)
+
+        `stream=True` 时不预先读取响应内容, 通过 `iter_content` 逐块读取, 读取完毕后需 `close`;
+        由于读取需要等待, `iter_content` 为异步迭代器(`async for`)
+    """
+
+    def __init__(self, url, status_code, reason, headers, content=None, response=None):
+        self.url = url
+        self.status_code = status_code
+        self.reason = reason
+        self.headers = headers
+        self.content = content
+
+        self._response = response
+
+    @property
+    def text(self):
+        return self.content.decode("utf-8", "ignore")
+
+    def json(self):
+        return json.loads(self.text)
+
+    async def iter_content(self, chunk_size=1):
+        if self._response is None:
+            for start in range(0, len(self.content), chunk_size):
+                yield self.content[start:start + chunk_size]
+            return
+
+        try:
+            async for chunk in self._response.content.iter_chunked(chunk_size):
+                yield chunk
+        except asyncio.TimeoutError:
+            raise requests.ReadTimeout("Read timed out: {}".format(self.url))
+        except aiohttp.ClientError as exc:
+            raise requests.RequestException(str(exc))
+
+    def close(self):
+        if self._response is not None:
+            self._response.release()
+
+    def raise_for_status(self):
+        if 400 <= self.status_code < 600:
+            raise requests.HTTPError(
+                "{} Error: {} for url: {}".format(self.status_code, self.reason, self.url),
+                response=self
+            )
+
+
+class AsyncHTTPClient(object):
+
+    def __init__(self, pool_connections=10, pool_maxsize=10, max_retries=0, pool_block=False,
+                 keep_alive=True, hosts=None):
+        """初始化参数
+
+            参数同 `utils.http.build_session`, 同一连接池配置可同时用于同步/异步客户端
+
+        Parameters
+        ----------
+        pool_connections: int
+
+            连接池个数(域名数), 与 pool_maxsize 的乘积为总连接数
+
+        pool_maxsize: int
+
+            单个域名的最大连接数, `hosts` 中单独配置的域名取其中的最大值
+
+        max_retries: int
+
+            不使用, 重试由 `utils.retry.RetryPolicy` 处理
+
+        pool_block: bool
+
+            不使用, 连接数达到上限时总是等待空闲连接
+
+        keep_alive: bool
+
+            是否复用连接
+
+        hosts: dict
+
+            按域名单独配置连接池
+        """
+        self.limit_per_host = max(
+            [pool_maxsize] + [options.get("pool_maxsize", pool_maxsize) for options in (hosts or {}).values()]
+        )
+        self.limit = max(pool_connections * pool_maxsize, self.limit_per_host)
+        self.keep_alive = keep_alive
+
+        # 会话与事件循环绑定, 每个事件循环一个会话
+        self._sessions = {}
+        self._sessions_lock = threading.Lock()
+        self._ssl_contexts = {}
+
+    async def _get_session(self):
+        if aiohttp is None:
+            raise ImportError("aiohttp is required for the asyncio clients")
+
+        loop = asyncio.get_running_loop()
+
+        session = self._sessions.get(loop)
+        if session is not None and not session.closed:
+            return session
+
+        with self._sessions_lock:
+            stale_sessions = self._pop_stale_sessions()
+
+            connector = aiohttp.TCPConnector(
+                limit=self.limit, limit_per_host=self.limit_per_host, force_close=not self.keep_alive
+            )
+            session = self._sessions[loop] = aiohttp.ClientSession(connector=connector)
+
+        for stale_session in stale_sessions:
+            await self._close_session(stale_session)
+
+        return session
+
+    def _pop_stale_sessions(self):
+        # 已关闭的事件循环的会话不会再被使用
+        return [self._sessions.pop(loop) for loop in list(self._sessions) if loop.is_closed()]
+
+    @staticmethod
+    async def _close_session(session):
+        try:
+            await session.close()
+        except RuntimeError:
+            # 连接所属的事件循环已关闭, 无法正常关闭, 随对象回收释放
+            logger.warning("Close aiohttp session of a closed event loop failed")
+
+    def _get_ssl_context(self, cert):
+        key = tuple(cert) if isinstance(cert, (tuple, list)) else (cert, )
+        if key not in self._ssl_contexts:
+            context = ssl.create_default_context()
+            context.load_cert_chain(*key)
+            self._ssl_contexts[key] = context
+        return self._ssl_contexts[key]
+
+    def _convert_kwargs(self, kwargs):
+        """将 `requests` 风格参数转换为 `aiohttp` 参数
+
+        """
+        options = {}
+
+        params = kwargs.get("params")
+        if isinstance(params, dict):
+            # requests 会忽略值为 None 的参数
+            params = dict((k, str(v)) for k, v in params.items() if v is not None)
+        if params:
+            options["params"] = params
+
+        for key in ("data", "headers"):
+            if kwargs.get(key) is not None:
+                options[key] = kwargs[key]
+
+        timeout = kwargs.get("timeout")
+        if isinstance(timeout, (tuple, list)):
+            # requests 的 (连接超时, 读取超时)
+            options["timeout"] = aiohttp.ClientTimeout(sock_connect=timeout[0], sock_read=timeout[1])
+        elif timeout:
+            options["timeout"] = aiohttp.ClientTimeout(total=timeout)
+
+        # 商户证书
+        if kwargs.get("cert"):
+            options["ssl"] = self._get_ssl_context(kwargs["cert"])
+
+        return options
+
+    async def request(self, method, url, **kwargs):
+        session = await self._get_session()
+
+        # 转换为 requests 的异常, 使重试策略对同步/异步客户端一致
+        try:
+            res = await session.request(method.upper(), url, **self._convert_kwargs(kwargs))
+            if kwargs.get("stream"):
+                return AsyncResponse(str(res.url), res.status, res.reason, res.headers, response=res)
+            try:
+                content = await res.read()
+            finally:
+                res.release()
+            return AsyncResponse(str(res.url), res.status, res.reason, res.headers, content)
+        except aiohttp.ClientConnectorError as exc:
+            # 连接阶段失败, 请求未发出
+            raise ConnectError(str(exc))
+        except asyncio.TimeoutError:
+            raise requests.ReadTimeout("Read timed out: {}".format(url))
+        except aiohttp.ClientError as exc:
+            raise requests.RequestException(str(exc))
+
+    async def close(self):
+        """关闭当前及已关闭的事件循环的会话
+
+        """
+        with self._sessions_lock:
+            sessions = self._pop_stale_sessions()
+            session = self._sessions.pop(asyncio.get_running_loop(), None)
+            if session is not None:
+                sessions.append(session)
+
+        for session in sessions:
+            await self._close_session(session)
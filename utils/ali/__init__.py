@@ -16,6 +16,8 @@
 import logging
 import requests
 
+from utils.retry import RetryPolicy
+
 logger = logging.getLogger(__name__)
 
 
@@ -25,10 +27,18 @@ class BaseAli(object):
 
     _http = requests.session()
 
-    def __init__(self, timeout, auto_retry=False, debug=False):
+    # 重试策略, 见 `utils.retry.RetryPolicy`
+    retry_policy = RetryPolicy()
+
+    def __init__(self, timeout, auto_retry=False, debug=False, session=None):
         self.timeout = timeout
         self.auto_retry = auto_retry
         self.debug = debug
+        self.session = session
+
+        # 各业务(支付 / 转账 / 云)可传入单独配置连接池的会话
+        if session is not None:
+            self._http = session
 
     def request(self, *args, **kwargs):
         raise NotImplementedError()
@@ -11,6 +11,8 @@
 from django.conf import settings
 from django.utils.functional import LazyObject
 
+from utils.http import session_from_config
+
 from .pay.basic import AliPay
 from .yun.basic import AliYunClient
 
@@ -29,18 +31,22 @@ class AliApi(object):
         self.pay = AliPay(
             app_id=self.SPECIFIC_ALI_PAY_CONFIG["app_id"],
             app_private_key_path=self.SPECIFIC_ALI_PAY_CONFIG["app_private_key_path"],
-            ali_public_key_path=self.SPECIFIC_ALI_PAY_CONFIG["alipay_public_key_path"]
+            ali_public_key_path=self.SPECIFIC_ALI_PAY_CONFIG["alipay_public_key_path"],
+            session=session_from_config(self.SPECIFIC_ALI_PAY_CONFIG.get("http")),
+            sign_processes=self.SPECIFIC_ALI_PAY_CONFIG.get("sign_processes", 0)
         )
         # 转账类业务
         self.transfer = AliPay(
             app_id=self.DEFAULT_ALI_PAY_CONFIG["app_id"],
             app_private_key_path=self.DEFAULT_ALI_PAY_CONFIG["app_private_key_path"],
-            ali_public_key_path=self.DEFAULT_ALI_PAY_CONFIG["alipay_public_key_path"]
+            ali_public_key_path=self.DEFAULT_ALI_PAY_CONFIG["alipay_public_key_path"],
+            session=session_from_config(self.DEFAULT_ALI_PAY_CONFIG.get("http"))
         )
         # 阿里云业务
         self.yun = AliYunClient(
             app_id=self.ALI_YUN_CONFIG["ACCESS_KEY"],
-            secret=self.ALI_YUN_CONFIG["SECRET"]
+            secret=self.ALI_YUN_CONFIG["SECRET"],
+            session=session_from_config(self.ALI_YUN_CONFIG.get("HTTP"))
         )
 
 
@@ -5,6 +5,8 @@
 import json
 import inspect
 
+from decimal import Decimal
+from urllib.parse import parse_qsl
 from urllib.parse import quote_plus
 
 from Crypto.PublicKey import RSA
@@ -12,8 +14,12 @@ from Crypto.PublicKey import RSA
 from django.conf import settings
 from django.utils.timezone import now
 
+from utils.retry import send_with_retry
+
 from .. import BaseAli
-from ..tools import calculate_signature
+from ..tools import RSASigner
+from ..tools import RSAVerifier
+from ..tools import ProcessPoolSigner
 from . import api
 from .api.base import BaseAliPayAPI
 
@@ -40,10 +46,11 @@ class AliPay(BaseAli):
     # 统一收单相关
     order = api.AliOrder()
 
-    def __init__(self, app_id, app_private_key_path, ali_public_key_path, debug=False):
+    def __init__(self, app_id, app_private_key_path, ali_public_key_path, debug=False, session=None,
+                 sign_processes=0):
 
         # 暂时用不到父类方法参数(设置默认值)
-        super(AliPay, self).__init__(timeout=3, auto_retry=True, debug=debug)
+        super(AliPay, self).__init__(timeout=3, auto_retry=True, debug=debug, session=session)
 
         self.app_id = app_id
 
@@ -55,6 +62,15 @@ class AliPay(BaseAli):
         with open(ali_public_key_path) as fp:
             self.ali_public_key = RSA.importKey(fp.read())
 
+        # 验签对象只构建一次
+        self.verifier = RSAVerifier(self.ali_public_key)
+
+        # 签名对象只构建一次, 开启签名进程时批量签名使用进程池
+        if sign_processes:
+            self.signer = ProcessPoolSigner(app_private_key_path, sign_processes)
+        else:
+            self.signer = RSASigner(self.app_private_key)
+
     def __new__(cls, *args, **kwargs):
         self = super(AliPay, cls).__new__(cls)
         api_endpoints = inspect.getmembers(self, _is_api_endpoint)
@@ -74,11 +90,9 @@ class AliPay(BaseAli):
         else:
             url = url_or_endpoint
 
-        res = self._http.request(
-            method=method,
-            url=url,
-            **kwargs
-        )
+        retry_policy = kwargs.pop("retry_policy", None) or self.retry_policy
+
+        res = send_with_retry(self._http.request, method, url, retry_policy, **kwargs)
 
         res.raise_for_status()
 
@@ -100,7 +114,7 @@ class AliPay(BaseAli):
         # 拼接成待签名的字符串
         unsigned_string = "&".join("{0}={1}".format(k, v) for k, v in ordered_items)
         # 对上一步得到的字符串进行签名
-        sign = calculate_signature(unsigned_string.encode("utf-8"), self.app_private_key)
+        sign = self.signer.sign(unsigned_string.encode("utf-8"))
         # 处理URL
         quoted_string = "&".join("{0}={1}".format(k, quote_plus(v)) for k, v in ordered_items)
         # 添加签名，获得最终的订单信息字符串
@@ -183,3 +197,82 @@ class AliPay(BaseAli):
         params = self.get_url_params(body)
 
         return "{}?{}".format(self.API_BASE_URL, params)
+
+    @staticmethod
+    def _parse_notification(body):
+        """解析异步通知参数
+
+        """
+        if isinstance(body, dict):
+            return dict(body.items())
+
+        if isinstance(body, (bytes, bytearray, memoryview)):
+            body = bytes(body).decode("utf-8")
+
+        return dict(parse_qsl(body, keep_blank_values=True))
+
+    def verify_notification(self, data):
+        """校验异步通知签名
+
+            除 `sign`、`sign_type` 外的参数按参数名排序后拼接为待验签字符串
+
+        详情参考
+        https://docs.open.alipay.com/200/106120
+
+        Parameters
+        ----------
+        data : dict
+
+            通知参数
+
+        Returns
+        -------
+        bool
+        """
+        sign = data.get("sign")
+        unsigned_string = "&".join(
+            "{0}={1}".format(k, data[k]) for k in sorted(data) if k not in ("sign", "sign_type")
+        )
+        return self.verifier.verify(unsigned_string.encode("utf-8"), sign)
+
+    def parse_payment_result(self, body):
+        """解析支付宝异步通知
+
+            验签失败时 `state` 为 False, 金额字段转换为 `Decimal`
+
+        Parameters
+        ----------
+        body : bytes OR string OR dict
+
+            通知请求体(application/x-www-form-urlencoded)或已解析的参数(如 `request.POST`)
+
+        Returns
+        -------
+        dict
+        """
+        data = self._parse_notification(body)
+
+        if not self.verify_notification(data):
+            # 校验签名失败
+            data["state"] = False
+
+        for key in ("total_amount", "receipt_amount", "invoice_amount", "buyer_pay_amount", "point_amount"):
+            if data.get(key):
+                data[key] = Decimal(data[key])
+
+        return data
+
+    def parse_payment_results(self, bodies):
+        """批量解析异步通知(如从队列中取出的多条通知)
+
+        Parameters
+        ----------
+        bodies : iterable
+
+            通知请求体的可迭代对象
+
+        Returns
+        -------
+        list
+        """
+        return [self.parse_payment_result(body) for body in bodies]
@@ -2,26 +2,155 @@
 # -*- coding: utf-8 -*-
 # Date: 2018/8/2
 
+import os
 import time
 import uuid
+import threading
 
+from concurrent.futures import ProcessPoolExecutor
+
+from Crypto.PublicKey import RSA
 from Crypto.Signature import PKCS1_v1_5
 from Crypto.Hash import SHA256
 
+from base64 import decodebytes
 from base64 import encodebytes
 
 
 def calculate_signature(params, api_key):
     """计算签名
 
+    Parameters
+    ----------
+    params : bytes
+        待签名的数据
+
+    api_key: RSA key OR signer
+        应用私钥, 或 `PKCS1_v1_5.new` 预先构建的签名对象(避免每次签名重复构建)
+
+    Returns
+    -------
+    string
     """
-    signer = PKCS1_v1_5.new(api_key)
+    signer = PKCS1_v1_5.new(api_key) if isinstance(api_key, RSA.RsaKey) else api_key
     signature = signer.sign(SHA256.new(params))
     # base64 编码，转换为unicode表示并移除回车
     sign = encodebytes(signature).decode("utf8").replace("\n", "")
     return sign
 
 
+class RSASigner(object):
+
+    """
+    进程内签名, 签名对象只在初始化时构建一次
+    """
+
+    def __init__(self, private_key):
+        self._signer = PKCS1_v1_5.new(private_key)
+
+    def sign(self, params):
+        return calculate_signature(params, self._signer)
+
+    def sign_many(self, params_list):
+        return [self.sign(params) for params in params_list]
+
+
+class RSAVerifier(object):
+
+    """
+    验签, 验签对象只在初始化时构建一次
+    """
+
+    def __init__(self, public_key):
+        self._verifier = PKCS1_v1_5.new(public_key)
+
+    def verify(self, params, sign):
+        """校验签名
+
+        Parameters
+        ----------
+        params : bytes
+            待验签的数据
+
+        sign: string OR bytes
+            base64 编码的签名
+
+        Returns
+        -------
+        bool
+        """
+        if not sign:
+            return False
+
+        if not isinstance(sign, bytes):
+            sign = sign.encode("utf-8")
+
+        try:
+            signature = decodebytes(sign)
+        except ValueError:
+            return False
+
+        return self._verifier.verify(SHA256.new(params), signature)
+
+
+# 进程池中每个子进程的签名对象
+_process_signer = None
+
+
+def _init_process_signer(private_key_pem):
+    global _process_signer
+    _process_signer = PKCS1_v1_5.new(RSA.importKey(private_key_pem))
+
+
+def _process_sign(params):
+    return calculate_signature(params, _process_signer)
+
+
+class ProcessPoolSigner(RSASigner):
+
+    """
+    进程池签名
+
+        RSA 签名为 CPU 密集型操作, 批量签名(`sign_many`)时分摊到多个进程,
+        每个子进程启动时加载一次私钥并构建签名对象; 单次签名的跨进程开销大于签名本身, 仍在当前进程进行
+
+        进程池在首次批量签名时创建, 并按进程 id 区分, 预先 fork 的 worker 进程各自创建进程池
+    """
+
+    def __init__(self, private_key_path, processes=None):
+        with open(private_key_path) as fp:
+            self._private_key_pem = fp.read()
+
+        super(ProcessPoolSigner, self).__init__(RSA.importKey(self._private_key_pem))
+
+        self.processes = processes
+
+        self._executor = None
+        self._executor_pid = None
+        self._executor_lock = threading.Lock()
+
+    def _get_executor(self):
+        with self._executor_lock:
+            # fork 后继承的进程池属于父进程, 不能在子进程中使用
+            if self._executor is None or self._executor_pid != os.getpid():
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.processes,
+                    initializer=_init_process_signer,
+                    initargs=(self._private_key_pem, )
+                )
+                self._executor_pid = os.getpid()
+            return self._executor
+
+    def sign_many(self, params_list, chunksize=16):
+        return list(self._get_executor().map(_process_sign, params_list, chunksize=chunksize))
+
+    def shutdown(self):
+        with self._executor_lock:
+            if self._executor is not None and self._executor_pid == os.getpid():
+                self._executor.shutdown()
+            self._executor = None
+
+
 def get_uuid():
     """获取 `UUID`
 
@@ -0,0 +1,55 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+# Date: 2026/10/18
+
+"""
+    阿里云异步客户端
+
+        与 `AliYunClient` 共用签名及结果校验逻辑, 通过 aiohttp 发送请求,
+        接口类(`sms`, `vod`)的方法均返回协程, 使用时需 `await`
+
+        > client = AsyncAliYunClient(access_key, secret)
+        > await client.sms.send("13000000000", "签名", "SMS_0000", '{"code": "1234"}')
+"""
+
+import asyncio
+import logging
+
+from utils.aio import AsyncHTTPClient
+from utils.retry import async_send_with_retry
+from .basic import AliYunClient
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncAliYunClient(AliYunClient):
+
+    def __init__(self, *args, http=None, **kwargs):
+        """参数同 `AliYunClient`, http 为连接池配置, 同 `utils.http.build_session`
+
+        """
+        super(AsyncAliYunClient, self).__init__(*args, **kwargs)
+        self._aio_http = AsyncHTTPClient(**(http or {}))
+
+    async def request(self, method, action, **kwargs):
+        """参数同 `AliYunClient.request`
+
+        """
+        result_processor = kwargs.pop("result_processor", None)
+        retry_policy = kwargs.pop("retry_policy", None) or self.retry_policy
+
+        attempt = 0
+        while True:
+            attempt += 1
+            url, request_kwargs = self._prepare_request(action, dict(kwargs))
+
+            # 请求参数均已签名并拼接到 url 中
+            request_kwargs.pop("data", None)
+
+            res = await async_send_with_retry(self._aio_http.request, method, url, retry_policy, **request_kwargs)
+
+            result = self._handle_result(res, method, url, **request_kwargs)
+            if not self._should_retry(result, attempt, action):
+                return result if not result_processor else result_processor(result)
+
+            await asyncio.sleep(self.retry_policy.delay(attempt))
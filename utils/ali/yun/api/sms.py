@@ -6,6 +6,8 @@
     短信服务
 """
 
+from utils.retry import IDEMPOTENT_RETRY_POLICY
+
 from .base import BaseAliYunAPI
 
 
@@ -142,4 +144,5 @@ class AliYunSms(BaseAliYunAPI):
         if biz_id is not None:
             data["BizId"] = biz_id
 
-        return self._get(action="QuerySendDetails", data=data)
+        # 查询接口幂等, 连接中断及超时也可重试
+        return self._get(action="QuerySendDetails", data=data, retry_policy=IDEMPOTENT_RETRY_POLICY)
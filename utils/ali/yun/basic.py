@@ -4,11 +4,17 @@
 
 import hmac
 import base64
+import hashlib
 import inspect
+import time
 import logging
 
+from functools import lru_cache
 from urllib.parse import quote
 
+from utils.retry import RetryPolicy
+from utils.retry import send_with_retry
+
 from .. import BaseAli
 from ..yun import api
 from ..yun.api.base import BaseAliYunAPI
@@ -18,47 +24,111 @@ from ..tools import get_iso_8061_date
 logger = logging.getLogger(__name__)
 
 
-QUERY_STRING = None
+@lru_cache(maxsize=256)
+def _quote_key(key):
+    # 参数名取值有限, 缓存编码结果; 参数值(号码、随机码等)各不相同, 不缓存
+    return quote(key, safe="~")
+
 
+def _quote(value):
+    return quote(value if isinstance(value, str) else str(value), safe="~")
 
-def _get_signature(string_to_sign, secret, signer=hmac):
-    """获取签名
 
+def _quote_query(query_string):
+    """对已编码的请求字符串再次编码
+
+        已编码的字符串只包含不需编码的字符及 `%`, `=`, `&`, 替换即可
     """
-    secret = "{}&".format(secret)
-    hmb = signer.new(secret.encode("utf-8"), string_to_sign.encode("utf-8"), "sha1").digest()
-    return quote(base64.standard_b64encode(hmb).decode("ascii"), safe="~")
+    return query_string.replace("%", "%25").replace("=", "%3D").replace("&", "%26")
 
 
-def __pop_standard_urlencode(query):
-    ret = ""
-    for item in query:
-        
-        if not item[1]:
-            continue
+class AliYunSigner(object):
 
-        ret += quote(item[0], safe="~") + "=" + quote(item[1], safe="~") + "&"
+    """
+    阿里云 RPC 签名(HMAC-SHA1), 可在多线程中共用
 
-    return ret
+        固定的公共参数预先编码, 密钥的 HMAC 状态只构建一次, 每次签名复制后使用
+    """
 
+    # 接口响应类型均为 `JSON`
+    FORMAT = "JSON"
+    SIGNATURE_METHOD = "HMAC-SHA1"
+    SIGNATURE_VERSION = "1.0"
 
-def _compose_sign_string(query_params):
-    """组成签名字符串
+    def __init__(self, access_key_id, secret):
+        """初始化参数
 
-    """
+        Parameters
+        ----------
+        access_key_id: string
 
-    sorted_parameters = sorted(query_params.items(), key=lambda url_params: url_params[0])
+            访问 key
 
-    string_to_sign = __pop_standard_urlencode(sorted_parameters)
+        secret: string
 
-    query_string = string_to_sign[:-1]
+            访问秘钥
+        """
+        self.access_key_id = access_key_id
+        self._hmac = hmac.new("{}&".format(secret).encode("utf-8"), digestmod=hashlib.sha1)
+        # (参数名, 编码后的 `参数名=参数值`)
+        self._static_items = [
+            (key, "{}={}".format(_quote_key(key), _quote(value))) for key, value in (
+                ("AccessKeyId", access_key_id),
+                ("Format", self.FORMAT),
+                ("SignatureMethod", self.SIGNATURE_METHOD),
+                ("SignatureVersion", self.SIGNATURE_VERSION),
+            )
+        ]
+        self._static_keys = frozenset(key for key, _ in self._static_items)
+
+    def canonicalize(self, params):
+        """组成规范化请求字符串
+
+        Parameters
+        ----------
+        params: dict
 
-    global QUERY_STRING
-    QUERY_STRING = query_string
+            请求参数(不含固定的公共参数), 值为空(None、空字符串、0 等)的参数不参与签名, 同原实现
 
-    tosign = "GET&%2F&" + quote(query_string, safe="~")
+        Returns
+        -------
+        string
+        """
+        items = list(self._static_items)
+        for key, value in params.items():
+            if not value or key in self._static_keys:
+                continue
+            items.append((key, "{}={}".format(_quote_key(key), _quote(value))))
 
-    return tosign
+        items.sort()
+        return "&".join(pair for _, pair in items)
+
+    def sign(self, params, method="GET"):
+        """签名
+
+        Parameters
+        ----------
+        params: dict
+
+            请求参数, 同 `canonicalize`
+
+        method: string
+
+            请求方法
+
+        Returns
+        -------
+        string
+            带签名的请求字符串, 可直接拼接到接口地址后
+        """
+        query_string = self.canonicalize(params)
+        string_to_sign = "{}&%2F&{}".format(method.upper(), _quote_query(query_string))
+
+        mac = self._hmac.copy()
+        mac.update(string_to_sign.encode("utf-8"))
+        signature = base64.standard_b64encode(mac.digest()).decode("ascii")
+
+        return "{}&Signature={}".format(query_string, quote(signature, safe="~"))
 
 
 def _is_api_endpoint(instance):
@@ -71,6 +141,15 @@ class AliYunClient(BaseAli):
 
     API_BASE_URL = ""  # 阿里云api网关地址均从使用的接口定义
 
+    # 幂等接口在流控及服务端错误时重新签名后重试(auto_retry 开启时)
+    retry_policy = RetryPolicy(retryable_codes=(
+        "Throttling", "Throttling.User", "Throttling.Api", "ServiceUnavailable",
+        "InternalError", "isp.SYSTEM_ERROR", "SignatureNonceUsed",
+    ))
+
+    # 按返回码重试的接口, 发送短信等非幂等接口即使返回服务端错误也可能已执行, 不重试
+    IDEMPOTENT_ACTIONS = frozenset(["QuerySendDetails"])
+
     # 点播api
     vod = api.AliYunVod()
     # 短信api
@@ -88,12 +167,13 @@ class AliYunClient(BaseAli):
             setattr(self, name, api_ins)
         return self
 
-    def __init__(self, app_id, secret, timeout=None, auto_retry=False):
+    def __init__(self, app_id, secret, timeout=None, auto_retry=True, session=None):
         super(AliYunClient, self).__init__(
-            timeout, auto_retry
+            timeout, auto_retry, session=session
         )
         self.app_id = app_id
         self.secret = secret
+        self.signer = AliYunSigner(app_id, secret)
 
     def request(self, method, action, **kwargs):
         """构造请求用户授权的url
@@ -113,6 +193,33 @@ class AliYunClient(BaseAli):
         -------
         dict
         """
+        # 结果解析器, 如果需要定制可单独定制
+        result_processor = kwargs.pop("result_processor", None)
+        retry_policy = kwargs.pop("retry_policy", None) or self.retry_policy
+
+        attempt = 0
+        while True:
+            attempt += 1
+            # 每次请求重新签名(时间戳及随机码)
+            url, request_kwargs = self._prepare_request(action, dict(kwargs))
+
+            res = send_with_retry(self._http.request, method, url, retry_policy, **request_kwargs)
+
+            # res.raise_for_status()
+
+            result = self._handle_result(res, method, url, **request_kwargs)
+            if not self._should_retry(result, attempt, action):
+                return result if not result_processor else result_processor(result)
+
+            time.sleep(self.retry_policy.delay(attempt))
+
+    def _prepare_request(self, action, kwargs):
+        """构建签名后的请求地址(同步/异步客户端共用)
+
+        Returns
+        -------
+        (url, kwargs): tuple
+        """
         query_string = ""
 
         api_base_url = kwargs.pop("api_base_url", self.API_BASE_URL)
@@ -132,37 +239,17 @@ class AliYunClient(BaseAli):
 
             # 时间戳
             data["Timestamp"] = get_iso_8061_date()
-            # 签名算法名称
-            data["SignatureMethod"] = "HMAC-SHA1"
-            # 签名版本
-            data["SignatureVersion"] = "1.0"
             # 随机码
             data["SignatureNonce"] = get_uuid()
-            # access key
-            data["AccessKeyId"] = self.app_id
-            # 接口响应类型均为 `JSON`
-            data["Format"] = "JSON"
 
-            # 计算签名
-            string_to_sign = _compose_sign_string(data)
-            signature = _get_signature(string_to_sign, self.secret)
+            # 计算签名, access key 等固定参数由签名对象添加
+            query_string = "?" + self.signer.sign(data)
 
-            query_string = '?{}{}'.format(QUERY_STRING, "&" + "Signature=" + signature)
-
-        # 结果解析器, 如果需要定制可单独定制
-        result_processor = kwargs.pop("result_processor", None)
+        kwargs.pop("version", None)
 
         url = "{}{}".format(api_base_url, query_string)
 
-        res = self._http.request(
-            method=method,
-            url=url,
-            **kwargs
-        )
-
-        # res.raise_for_status()
-
-        return self._handle_result(res, method, url, result_processor, **kwargs)
+        return url, kwargs
 
     def _handle_result(self, res, method=None, url=None,
                        result_processor=None, **kwargs):
@@ -197,6 +284,22 @@ class AliYunClient(BaseAli):
         if not isinstance(result, dict):
             return result
 
+        self._check_result(result, url)
+
+        return result if not result_processor else result_processor(result)
+
+    def _should_retry(self, result, attempt, action):
+        """业务结果是否需要重试(同步/异步客户端共用), 只重试幂等接口
+
+        """
+        if not isinstance(result, dict) or not self.auto_retry or action not in self.IDEMPOTENT_ACTIONS:
+            return False
+        return self.retry_policy.is_retryable_code(result.get("Code")) and self.retry_policy.can_retry(attempt)
+
+    def _check_result(self, result, url=None):
+        """校验结果(同步/异步客户端共用)
+
+        """
         if "Code" in result:
 
             code = result.get("Code")
@@ -206,11 +309,6 @@ class AliYunClient(BaseAli):
                     url, code, result.get("Message")
                 ))
 
-            if code in []:
-                self.request(method, url, **kwargs)
-
-        return result if not result_processor else result_processor(result)
-
     def get(self, url, **kwargs):
         return self.request(
             method="get",
@@ -0,0 +1,350 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+# Date: 2026/10/18
+
+"""
+    短信合并发送
+
+        逐条提交的短信在很短的等待窗口内合并为尽量少的接口调用, 并发发送后按接收号码返回结果:
+
+            同一签名、模板及模板变量的号码合并为 `SendSms`(每次最多 1000 个号码)
+
+            同一模板但内容各不相同的号码合并为 `SendBatchSms`(每次最多 100 个号码)
+
+        > dispatcher = SmsDispatcher(ali_api.yun.sms, sign_name="阿里云短信测试专用")
+        > dispatcher.start()
+        > future = dispatcher.submit("15300000001", "SMS_71390007", {"code": "1234"})
+        > future.result()  # BizId
+
+        需使用同步客户端; 同一次调用的号码共用一个 BizId, 调用失败时该次调用的所有号码均抛出异常;
+        合并窗口内重复提交的相同号码及内容只发送一次
+"""
+
+import json
+import time
+import queue
+import logging
+import threading
+
+from functools import partial
+from concurrent.futures import Future
+from concurrent.futures import ThreadPoolExecutor
+
+from utils.ratelimit import RateLimiter
+
+logger = logging.getLogger(__name__)
+
+
+# SendSms 每次最多号码数
+SEND_LIMIT = 1000
+# SendBatchSms 每次最多号码数
+BATCH_LIMIT = 100
+
+
+class _Submission(object):
+
+    __slots__ = ("phone_number", "sign_name", "template_code", "template_param", "future")
+
+    def __init__(self, phone_number, sign_name, template_code, template_param):
+        self.phone_number = phone_number
+        self.sign_name = sign_name
+        self.template_code = template_code
+        self.template_param = template_param
+        self.future = Future()
+
+
+def _copy_result(future, source):
+    if source.cancelled():
+        future.cancel()
+    elif source.exception() is not None:
+        future.set_exception(source.exception())
+    else:
+        future.set_result(source.result())
+
+
+def plan_calls(submissions):
+    """将待发送短信分组为接口调用
+
+    Parameters
+    ----------
+    submissions: list
+
+        待发送短信
+
+    Returns
+    -------
+    list
+        [(action, submissions), ...], action 为 SendSms 或 SendBatchSms;
+        号码及内容相同的短信只发送一次, 重复的短信不在其中, 结果与首条一致
+    """
+    by_template = {}
+    firsts = {}
+    for submission in submissions:
+        key = (submission.template_code, submission.sign_name, submission.template_param, submission.phone_number)
+        first = firsts.setdefault(key, submission)
+        if first is not submission:
+            first.future.add_done_callback(partial(_copy_result, submission.future))
+            continue
+
+        groups = by_template.setdefault(submission.template_code, {})
+        groups.setdefault((submission.sign_name, submission.template_param), []).append(submission)
+
+    calls = []
+    for groups in by_template.values():
+        singles = []
+        for group in groups.values():
+            if len(group) == 1:
+                singles.append(group[0])
+                continue
+            for index in range(0, len(group), SEND_LIMIT):
+                calls.append(("SendSms", group[index:index + SEND_LIMIT]))
+
+        # 内容各不相同的号码合并批量发送
+        for index in range(0, len(singles), BATCH_LIMIT):
+            chunk = singles[index:index + BATCH_LIMIT]
+            calls.append(("SendSms" if len(chunk) == 1 else "SendBatchSms", chunk))
+
+    return calls
+
+
+class SmsDispatcher(object):
+
+    def __init__(self, sms, sign_name=None, linger=0.05, max_workers=4, qps=None, queue_size=10000):
+        """初始化参数
+
+        Parameters
+        ----------
+        sms: AliYunSms
+
+            短信接口
+
+        sign_name: string
+
+            默认短信签名
+
+        linger: float
+
+            收到第一条短信后等待合并的时间(秒)
+
+        max_workers: int
+
+            并发调用数
+
+        qps: float OR None
+
+            每秒最多调用次数, 默认不限制
+
+        queue_size: int
+
+            队列容量, 在途调用达到 `max_workers * 2` 后不再从队列取出, 队列满时 `submit` 阻塞
+        """
+        self.sms = sms
+        self.sign_name = sign_name
+        self.linger = linger
+        self.max_workers = max_workers
+        self.limiter = RateLimiter(qps, capacity=1) if qps else None
+
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._executor = None
+        self._thread = None
+        self._stopped = True
+        # 检查是否已停止与入队需同时进行, 保证停止后最后一次取出时不会遗漏
+        self._submit_lock = threading.Lock()
+        # 在途调用数上限, 使队列满时 `submit` 阻塞
+        self._in_flight = threading.BoundedSemaphore(max_workers * 2)
+        self._stats_lock = threading.Lock()
+        self.stats = {
+            "submitted": 0,
+            "sent": 0,
+            "failed": 0,
+            "send_sms": 0,
+            "send_batch_sms": 0,
+        }
+
+    def _incr(self, name, value=1):
+        with self._stats_lock:
+            self.stats[name] += value
+
+    def submit(self, phone_number, template_code, template_param=None, sign_name=None):
+        """提交短信
+
+        Parameters
+        ----------
+        phone_number: string
+
+            接收号码
+
+        template_code: string
+
+            短信模板ID
+
+        template_param: dict OR string OR None
+
+            短信模板变量, dict 或 JSON 串
+
+        sign_name: string
+
+            短信签名, 默认为初始化时的签名
+
+        Returns
+        -------
+        Future
+            结果为发送流水号 BizId
+        """
+        sign_name = sign_name or self.sign_name
+        if not sign_name:
+            raise ValueError("sign_name is required")
+
+        if isinstance(template_param, dict):
+            # 相同变量序列化结果一致, 便于合并
+            template_param = json.dumps(template_param, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+
+        submission = _Submission(phone_number, sign_name, template_code, template_param)
+        with self._submit_lock:
+            if self._stopped:
+                raise RuntimeError("SmsDispatcher is not running")
+            self._queue.put(submission)
+        self._incr("submitted")
+        return submission.future
+
+    def start(self):
+        self._stopped = False
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers)
+        self._thread = threading.Thread(target=self._run, name="ali-sms-dispatcher", daemon=True)
+        self._thread.start()
+
+    def stop(self, wait=True):
+        """发送完已提交的短信后停止, wait 为 False 时在后台发送完成
+
+        """
+        with self._submit_lock:
+            if self._stopped:
+                return
+            self._stopped = True
+            self._queue.put(None)
+        if wait and self._thread is not None:
+            self._thread.join()
+
+    def _run(self):
+        try:
+            self._loop()
+        except Exception as exc:
+            logger.exception("SmsDispatcher stopped unexpectedly: {}".format(exc))
+            with self._submit_lock:
+                self._stopped = True
+            self._fail(self._drain(), RuntimeError("SmsDispatcher stopped unexpectedly"))
+        finally:
+            # 线程池由发送线程关闭, 保证停止前取出的短信均已提交
+            self._executor.shutdown(wait=True)
+
+    def _fail(self, submissions, exc):
+        for submission in submissions:
+            if submission.future.set_running_or_notify_cancel():
+                submission.future.set_exception(exc)
+        self._incr("failed", len(submissions))
+
+    def _loop(self):
+        while True:
+            submission = self._queue.get()
+            if submission is None:
+                self._dispatch(self._drain())
+                return
+
+            batch = [submission]
+            stopping = False
+            deadline = time.monotonic() + self.linger
+
+            while len(batch) < SEND_LIMIT:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    submission = self._queue.get(timeout=timeout)
+                except queue.Empty:
+                    break
+                if submission is None:
+                    stopping = True
+                    break
+                batch.append(submission)
+
+            if stopping:
+                # 停止时与 `stop` 并发提交的短信
+                batch.extend(self._drain())
+
+            self._dispatch(batch)
+
+            if stopping:
+                return
+
+    def _drain(self):
+        submissions = []
+        while True:
+            try:
+                submission = self._queue.get_nowait()
+            except queue.Empty:
+                return submissions
+            if submission is not None:
+                submissions.append(submission)
+
+    def _dispatch(self, batch):
+        # 跳过已取消的短信
+        batch = [submission for submission in batch if submission.future.set_running_or_notify_cancel()]
+
+        calls = plan_calls(batch)
+        for index, (action, submissions) in enumerate(calls):
+            self._in_flight.acquire()
+            try:
+                self._executor.submit(self._call, action, submissions)
+            except Exception as exc:
+                self._in_flight.release()
+                # 未能提交的调用
+                for _, rest in calls[index:]:
+                    for submission in rest:
+                        submission.future.set_exception(exc)
+                    self._incr("failed", len(rest))
+                raise
+
+    def _send(self, action, submissions):
+        first = submissions[0]
+
+        if action == "SendSms":
+            return self.sms.send(
+                ",".join(submission.phone_number for submission in submissions),
+                first.sign_name,
+                first.template_code,
+                first.template_param,
+            )
+
+        return self.sms.send_batch(
+            json.dumps([submission.phone_number for submission in submissions]),
+            json.dumps([submission.sign_name for submission in submissions], ensure_ascii=False),
+            first.template_code,
+            "[{}]".format(",".join(submission.template_param or "{}" for submission in submissions)),
+        )
+
+    def _call(self, action, submissions):
+        try:
+            self._do_call(action, submissions)
+        finally:
+            self._in_flight.release()
+
+    def _do_call(self, action, submissions):
+        self._incr("send_sms" if action == "SendSms" else "send_batch_sms")
+
+        if self.limiter is not None:
+            self.limiter.acquire()
+
+        try:
+            result = self._send(action, submissions)
+            if result.get("Code") != "OK":
+                raise ValueError("{}: {}".format(result.get("Code"), result.get("Message")))
+        except Exception as exc:
+            logger.error("AliApi {} to {} numbers failed: {}".format(action, len(submissions), exc))
+            self._incr("failed", len(submissions))
+            for submission in submissions:
+                submission.future.set_exception(exc)
+            return
+
+        self._incr("sent", len(submissions))
+        for submission in submissions:
+            submission.future.set_result(result.get("BizId"))
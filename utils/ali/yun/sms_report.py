@@ -0,0 +1,236 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+# Date: 2026/10/18
+
+"""
+    短信发送记录导出
+
+        `QuerySendDetails` 每次只能查询一个号码一天的一页记录(最多 50 条), 导出时以有界线程池并发查询,
+        首页返回总数后再查询其余页, 按 QPS 限流, 查询到的记录按到达顺序逐条返回/写入文件, 不在内存中汇总:
+
+        > exporter = SmsReportExporter(ali_api.yun.sms, "20181018")
+        > exporter.export(phone_numbers, "/data/sms/20181018.csv.gz")
+        > exporter.failures  # 查询失败的 (号码, 页码, 错误), 页码为 1 时该号码的其余页均未查询
+
+        需使用同步客户端
+"""
+
+import os
+import csv
+import gzip
+import json
+import time
+import logging
+import threading
+
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import wait
+
+from utils.ratelimit import RateLimiter
+
+logger = logging.getLogger(__name__)
+
+
+# 每页最多记录数
+PAGE_SIZE = 50
+
+# CSV 列, 同 SmsSendDetailDTO 字段
+FIELDS = ("PhoneNum", "SendStatus", "ErrCode", "TemplateCode", "Content", "SendDate", "ReceiveDate", "OutId")
+
+
+class SmsReportExporter(object):
+
+    def __init__(self, sms, send_date, max_workers=8, qps=50, page_size=PAGE_SIZE):
+        """初始化参数
+
+        Parameters
+        ----------
+        sms: AliYunSms
+
+            短信接口
+
+        send_date: string
+
+            发送日期, yyyyMMdd
+
+        max_workers: int
+
+            并发查询数
+
+        qps: float OR None
+
+            每秒最多查询次数, 按账号的接口限额设置, None 为不限制
+
+        page_size: int
+
+            每页记录数, 最大 50
+        """
+        self.sms = sms
+        self.send_date = send_date
+        self.max_workers = max_workers
+        self.page_size = min(page_size, PAGE_SIZE)
+        self.limiter = RateLimiter(qps, capacity=1) if qps else None
+
+        self._stats_lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        # 查询失败的 (号码, 页码, 错误信息), 每次导出重新统计
+        self.failures = []
+        self.stats = {
+            "numbers": 0,
+            "pages": 0,
+            "rows": 0,
+            "errors": 0,
+            "elapsed": 0,
+        }
+
+    def _incr(self, name, value=1):
+        with self._stats_lock:
+            self.stats[name] += value
+
+    def _fail(self, phone_number, page, error):
+        if page == 1:
+            # 首页失败时总数未知, 该号码的其余页均未查询
+            error = "{}; remaining pages not fetched".format(error)
+        logger.error("AliApi QuerySendDetails {} page {} failed: {}".format(phone_number, page, error))
+        with self._stats_lock:
+            self.stats["errors"] += 1
+            self.failures.append((phone_number, page, error))
+
+    def _fetch(self, phone_number, page):
+        """查询一页
+
+        Returns
+        -------
+        (phone_number, page, total_count, rows): tuple
+        """
+        if self.limiter is not None:
+            self.limiter.acquire()
+
+        try:
+            result = self.sms.query(phone_number, self.send_date, self.page_size, page)
+        except Exception as exc:
+            self._fail(phone_number, page, str(exc))
+            return phone_number, page, 0, []
+
+        self._incr("pages")
+
+        if result.get("Code") != "OK":
+            self._fail(phone_number, page, "{}: {}".format(result.get("Code"), result.get("Message")))
+            return phone_number, page, 0, []
+
+        rows = (result.get("SmsSendDetailDTOs") or {}).get("SmsSendDetailDTO") or []
+        return phone_number, page, int(result.get("TotalCount") or 0), rows
+
+    def iter_rows(self, phone_numbers):
+        """逐条返回发送记录, 顺序与号码顺序无关
+
+        Parameters
+        ----------
+        phone_numbers: iterable
+
+            接收号码, 可以是生成器
+
+        Returns
+        -------
+        generator
+            SmsSendDetailDTO: dict
+        """
+        self._reset()
+
+        started_at = time.time()
+        numbers = iter(phone_numbers)
+        # 已知总数的号码的其余页, 优先于新号码查询
+        pages = deque()
+        executor = ThreadPoolExecutor(max_workers=self.max_workers)
+        pending = set()
+
+        try:
+            while True:
+                # 在途查询不超过线程数的两倍, 避免一次性提交全部号码
+                while len(pending) < self.max_workers * 2:
+                    if pages:
+                        phone_number, page = pages.popleft()
+                    else:
+                        phone_number = next(numbers, None)
+                        if phone_number is None:
+                            break
+                        page = 1
+                        self._incr("numbers")
+                    pending.add(executor.submit(self._fetch, phone_number, page))
+
+                if not pending:
+                    return
+
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    phone_number, page, total_count, rows = future.result()
+
+                    if page == 1 and total_count > self.page_size:
+                        page_count = (total_count + self.page_size - 1) // self.page_size
+                        pages.extend((phone_number, index) for index in range(2, page_count + 1))
+
+                    for row in rows:
+                        self._incr("rows")
+                        yield row
+        finally:
+            for future in pending:
+                future.cancel()
+            executor.shutdown(wait=True)
+
+            self.stats["elapsed"] = time.time() - started_at
+
+    def export(self, phone_numbers, path, fmt=None):
+        """导出到文件
+
+        Parameters
+        ----------
+        phone_numbers: iterable
+
+            接收号码
+
+        path: string
+
+            文件路径, 以 .gz 结尾时使用 gzip 压缩; 先写入临时文件, 完成后替换
+
+        fmt: string OR None
+
+            csv 或 jsonl, 默认按文件名判断
+
+        Returns
+        -------
+        dict
+            统计数据
+        """
+        if fmt is None:
+            fmt = "csv" if ".csv" in os.path.basename(path) else "jsonl"
+        if fmt not in ("csv", "jsonl"):
+            raise ValueError("Unsupported format: {}".format(fmt))
+
+        opener = gzip.open if path.endswith(".gz") else open
+        tmp_path = "{}.tmp".format(path)
+
+        try:
+            with opener(tmp_path, "wt", encoding="utf-8", newline="") as fp:
+                if fmt == "csv":
+                    writer = csv.DictWriter(fp, fieldnames=FIELDS, extrasaction="ignore")
+                    writer.writeheader()
+                    for row in self.iter_rows(phone_numbers):
+                        writer.writerow(row)
+                else:
+                    for row in self.iter_rows(phone_numbers):
+                        fp.write(json.dumps(row, ensure_ascii=False))
+                        fp.write("\n")
+
+            os.replace(tmp_path, path)
+        except BaseException:
+            # 不保留写了一半的临时文件
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+        logger.info("AliApi sms report {} exported to {}: {}".format(self.send_date, path, self.stats))
+        return self.stats
@@ -0,0 +1,108 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+# Date: 2026/10/18
+
+"""
+    HTTP 会话构建
+
+        `requests.session()` 默认的连接池大小为 10, 多线程共享同一会话时,
+        超出的线程只能等待或新建后丢弃连接, 因此按客户端配置连接池
+"""
+
+import requests
+
+from requests.adapters import HTTPAdapter
+from requests.packages.urllib3.util.retry import Retry
+
+
+def _build_adapter(pool_connections=10, pool_maxsize=10, max_retries=0, pool_block=False):
+    if isinstance(max_retries, dict):
+        max_retries = Retry(**max_retries)
+
+    return HTTPAdapter(
+        pool_connections=pool_connections,
+        pool_maxsize=pool_maxsize,
+        max_retries=max_retries,
+        pool_block=pool_block,
+    )
+
+
+def build_session(pool_connections=10, pool_maxsize=10, max_retries=0, pool_block=False,
+                  keep_alive=True, hosts=None):
+    """构建连接池会话
+
+    Parameters
+    ----------
+    pool_connections: int
+
+        缓存的连接池个数(每个域名一个连接池)
+
+    pool_maxsize: int
+
+        每个连接池保持的最大连接数, 一般与并发线程数一致
+
+    max_retries: int OR dict
+
+        连接失败的重试次数, 为 dict 时作为 `urllib3.Retry` 的参数; 各客户端已由 `utils.retry.RetryPolicy` 重试,
+        一般保持为 0, 避免两层重试叠加
+
+    pool_block: bool
+
+        连接数达到 pool_maxsize 时是否阻塞等待空闲连接(否则新建连接, 用完后丢弃)
+
+    keep_alive: bool
+
+        是否复用连接
+
+    hosts: dict
+
+        按域名单独配置连接池, 如:
+
+            {"https://api.weixin.qq.com": {"pool_maxsize": 64}}
+
+        未配置的参数使用上面的默认值
+
+    Returns
+    -------
+    requests.Session
+    """
+    options = {
+        "pool_connections": pool_connections,
+        "pool_maxsize": pool_maxsize,
+        "max_retries": max_retries,
+        "pool_block": pool_block,
+    }
+
+    session = requests.session()
+
+    adapter = _build_adapter(**options)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+
+    for prefix, host_options in (hosts or {}).items():
+        host_options = dict(options, **host_options)
+        session.mount(prefix, _build_adapter(**host_options))
+
+    if not keep_alive:
+        session.headers["Connection"] = "close"
+
+    return session
+
+
+def session_from_config(http_config):
+    """按客户端的连接池配置构建会话
+
+    Parameters
+    ----------
+    http_config: dict OR None
+
+        `build_session` 的参数
+
+    Returns
+    -------
+    requests.Session OR None
+        未配置时返回 None, 客户端使用类共享的会话
+    """
+    if not http_config:
+        return None
+    return build_session(**http_config)
@@ -0,0 +1,141 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+# Date: 2026/10/18
+
+"""
+    限流工具
+"""
+
+import time
+import threading
+
+
+class RateLimiter(object):
+
+    """
+    令牌桶限流(线程安全)
+
+        获取令牌时先预占, 令牌不足的部分按速率换算为等待时间, 并发调用按先后顺序依次放行
+    """
+
+    def __init__(self, rate, capacity=None):
+        """初始化参数
+
+        Parameters
+        ----------
+        rate: float
+
+            每秒产生的令牌数, 即允许的 QPS
+
+        capacity: float
+
+            令牌桶容量(允许的突发数), 默认与 rate 相同
+        """
+        self.rate = float(rate)
+        self.capacity = float(capacity or max(rate, 1))
+
+        self._tokens = self.capacity
+        self._updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated_at) * self.rate)
+        self._updated_at = now
+
+    def reserve(self, tokens=1):
+        """预占令牌
+
+        Returns
+        -------
+        需要等待的时间(秒): float
+        """
+        with self._lock:
+            self._refill(time.monotonic())
+            self._tokens -= tokens
+            if self._tokens >= 0:
+                return 0
+            return -self._tokens / self.rate
+
+    def acquire(self, tokens=1):
+        """获取令牌, 令牌不足时阻塞等待
+
+        """
+        wait = self.reserve(tokens)
+        if wait > 0:
+            time.sleep(wait)
+
+
+class AdaptiveRateLimiter(RateLimiter):
+
+    """
+    自适应令牌桶限流(AIMD)
+
+        被限流时速率减半, 之后每次成功调用线性增加, 逐步恢复到上限;
+        同一时间在途的多个请求同时被限流时只减速一次
+    """
+
+    def __init__(self, rate, min_rate=None, capacity=None, decrease_factor=0.5, increase_step=None,
+                 cooldown=1):
+        """初始化参数
+
+        Parameters
+        ----------
+        rate: float
+
+            速率上限(QPS)
+
+        min_rate: float
+
+            速率下限, 默认为上限的 1/20
+
+        capacity: float
+
+            令牌桶容量
+
+        decrease_factor: float
+
+            被限流时速率的乘数
+
+        increase_step: float
+
+            每次成功调用增加的速率, 默认为上限的 1/100
+
+        cooldown: float
+
+            两次减速的最小间隔(秒)
+        """
+        super(AdaptiveRateLimiter, self).__init__(rate, capacity)
+        self.max_rate = float(rate)
+        self.min_rate = float(min_rate or self.max_rate / 20)
+        self.decrease_factor = decrease_factor
+        self.increase_step = float(increase_step or self.max_rate / 100)
+        self.cooldown = cooldown
+
+        self._decreased_at = 0
+
+    def _set_rate(self, rate):
+        # 先按旧速率补充令牌
+        self._refill(time.monotonic())
+        self.rate = rate
+
+    def decrease(self):
+        """被限流, 降低速率
+
+        """
+        with self._lock:
+            now = time.monotonic()
+            if now - self._decreased_at < self.cooldown:
+                return
+            self._decreased_at = now
+            self._set_rate(max(self.min_rate, self.rate * self.decrease_factor))
+            # 清空积攒的令牌, 避免减速后仍有突发
+            self._tokens = min(self._tokens, 0)
+
+    def increase(self):
+        """调用成功, 逐步恢复速率
+
+        """
+        with self._lock:
+            if self.rate >= self.max_rate:
+                return
+            self._set_rate(min(self.max_rate, self.rate + self.increase_step))
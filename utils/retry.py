@@ -0,0 +1,305 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+# Date: 2026/10/18
+
+"""
+    重试及熔断
+
+        RetryPolicy         有限次数的指数退避重试, 区分可重试的网络异常、HTTP 状态码及接口返回码
+
+        CircuitBreaker      按域名熔断: 连续失败达到阈值后在一段时间内直接失败(CircuitOpenError),
+                            之后放行单个探测请求, 成功则恢复
+
+        默认只重试连接阶段失败(连接超时/拒绝, 请求未发出)及 503, 连接中断、读超时、502/504
+        时请求可能已被处理, 不重试, 避免发送消息、短信等非幂等接口重复执行;
+        查询等幂等接口可在请求时传入 `retry_policy=IDEMPOTENT_RETRY_POLICY` 放宽重试
+
+        重试只在此处进行, 连接池(utils.http.build_session)不再配置 max_retries
+"""
+
+import time
+import random
+import asyncio
+import logging
+import threading
+
+from urllib.parse import urlparse
+
+import requests
+
+from urllib3.exceptions import ConnectTimeoutError
+from urllib3.exceptions import NewConnectionError
+
+logger = logging.getLogger(__name__)
+
+
+class CircuitOpenError(requests.ConnectionError):
+
+    """
+    熔断期间直接失败
+    """
+
+
+class ConnectError(requests.ConnectionError):
+
+    """
+    连接阶段失败, 请求未发出(异步客户端使用)
+    """
+
+
+def is_connect_error(exc):
+    """是否为连接阶段的失败(请求未发出, 重试不会重复执行)
+
+    """
+    if isinstance(exc, (requests.ConnectTimeout, ConnectError)):
+        return True
+    if not isinstance(exc, requests.ConnectionError) or not exc.args:
+        return False
+    # requests 将 urllib3 的 MaxRetryError 作为第一个参数, reason 为实际原因
+    reason = getattr(exc.args[0], "reason", exc.args[0])
+    return isinstance(reason, (NewConnectionError, ConnectTimeoutError))
+
+
+class RetryPolicy(object):
+
+    def __init__(self, max_attempts=3, backoff=0.2, max_backoff=2, jitter=0.1,
+                 retry_statuses=(503, ), retry_exceptions=None, retryable_codes=()):
+        """初始化参数
+
+        Parameters
+        ----------
+        max_attempts: int
+
+            最多请求次数(含首次)
+
+        backoff: float
+
+            首次重试前的等待时间(秒), 之后每次翻倍
+
+        max_backoff: float
+
+            最长等待时间(秒)
+
+        jitter: float
+
+            随机增加的等待时间比例, 避免多个进程同时重试
+
+        retry_statuses: tuple
+
+            可重试的 HTTP 状态码
+
+        retry_exceptions: tuple OR None
+
+            可重试的异常, 默认只重试连接阶段的失败(`is_connect_error`)
+
+        retryable_codes: iterable
+
+            可重试的接口返回码, 如微信的 -1(系统繁忙)
+        """
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.jitter = jitter
+        self.retry_statuses = frozenset(retry_statuses)
+        self.retry_exceptions = tuple(retry_exceptions) if retry_exceptions is not None else None
+        self.retryable_codes = frozenset(retryable_codes)
+
+    def delay(self, attempt):
+        """第 attempt 次请求失败后的等待时间
+
+        """
+        delay = min(self.backoff * (2 ** (attempt - 1)), self.max_backoff)
+        return delay * (1 + random.random() * self.jitter)
+
+    def can_retry(self, attempt):
+        return attempt < self.max_attempts
+
+    def is_retryable_code(self, code):
+        return code in self.retryable_codes
+
+    def is_retryable_status(self, status_code):
+        return status_code in self.retry_statuses
+
+    def is_retryable_exception(self, exc):
+        if isinstance(exc, CircuitOpenError):
+            return False
+        if self.retry_exceptions is None:
+            return is_connect_error(exc)
+        return isinstance(exc, self.retry_exceptions)
+
+
+# 幂等接口(查询等)使用: 连接中断、超时及网关错误均可重试
+IDEMPOTENT_RETRY_POLICY = RetryPolicy(
+    retry_statuses=(502, 503, 504), retry_exceptions=(requests.ConnectionError, requests.Timeout)
+)
+
+
+class CircuitBreaker(object):
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, name, failure_threshold=5, recovery_timeout=30):
+        """初始化参数
+
+        Parameters
+        ----------
+        name: string
+
+            名称(域名)
+
+        failure_threshold: int
+
+            连续失败多少次后熔断
+
+        recovery_timeout: float
+
+            熔断多久后放行探测请求(秒)
+        """
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+
+        self.state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0
+        self._probing = False
+        self._lock = threading.Lock()
+
+    def before_request(self):
+        """请求前检查, 熔断中抛出 CircuitOpenError
+
+        """
+        with self._lock:
+            if self.state == self.CLOSED:
+                return
+
+            if self.state == self.OPEN and time.monotonic() - self._opened_at >= self.recovery_timeout:
+                self.state = self.HALF_OPEN
+                self._probing = False
+
+            if self.state == self.HALF_OPEN and not self._probing:
+                # 只放行一个探测请求
+                self._probing = True
+                return
+
+        raise CircuitOpenError("Circuit for {} is open".format(self.name))
+
+    def record_success(self):
+        with self._lock:
+            if self.state != self.CLOSED:
+                logger.info("Circuit for {} is closed".format(self.name))
+            self.state = self.CLOSED
+            self._failures = 0
+            self._probing = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self.state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                if self.state != self.OPEN:
+                    logger.error("Circuit for {} is open after {} failures".format(self.name, self._failures))
+                self.state = self.OPEN
+                self._opened_at = time.monotonic()
+                self._probing = False
+
+
+class CircuitBreakers(object):
+
+    """
+    按域名管理熔断器, 同步/异步客户端共用
+    """
+
+    def __init__(self, failure_threshold=5, recovery_timeout=30):
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+
+        self._breakers = {}
+        self._lock = threading.Lock()
+
+    def get(self, url):
+        host = urlparse(url).netloc
+        breaker = self._breakers.get(host)
+        if breaker is None:
+            with self._lock:
+                breaker = self._breakers.setdefault(
+                    host, CircuitBreaker(host, self.failure_threshold, self.recovery_timeout)
+                )
+        return breaker
+
+
+circuit_breakers = CircuitBreakers()
+
+
+def send_with_retry(send, method, url, policy, **kwargs):
+    """发送请求, 网络异常及网关错误按策略重试, 并记录到对应域名的熔断器
+
+    Parameters
+    ----------
+    send: func
+
+        发送函数, 如 `requests.Session.request`
+
+    policy: RetryPolicy
+
+        重试策略
+
+    Returns
+    -------
+    response
+    """
+    breaker = circuit_breakers.get(url)
+    attempt = 0
+
+    while True:
+        attempt += 1
+        breaker.before_request()
+
+        try:
+            res = send(method=method, url=url, **kwargs)
+        except Exception as exc:
+            breaker.record_failure()
+            if not (policy.is_retryable_exception(exc) and policy.can_retry(attempt)):
+                raise
+            logger.warning("Retry {} {} after error: {}".format(method, url, exc))
+        else:
+            if res.status_code < 500:
+                breaker.record_success()
+                return res
+            breaker.record_failure()
+            if not (policy.is_retryable_status(res.status_code) and policy.can_retry(attempt)):
+                return res
+            logger.warning("Retry {} {} after status {}".format(method, url, res.status_code))
+
+        time.sleep(policy.delay(attempt))
+
+
+async def async_send_with_retry(send, method, url, policy, **kwargs):
+    """同 `send_with_retry`, send 为协程函数
+
+    """
+    breaker = circuit_breakers.get(url)
+    attempt = 0
+
+    while True:
+        attempt += 1
+        breaker.before_request()
+
+        try:
+            res = await send(method=method, url=url, **kwargs)
+        except Exception as exc:
+            breaker.record_failure()
+            if not (policy.is_retryable_exception(exc) and policy.can_retry(attempt)):
+                raise
+            logger.warning("Retry {} {} after error: {}".format(method, url, exc))
+        else:
+            if res.status_code < 500:
+                breaker.record_success()
+                return res
+            breaker.record_failure()
+            if not (policy.is_retryable_status(res.status_code) and policy.can_retry(attempt)):
+                return res
+            logger.warning("Retry {} {} after status {}".format(method, url, res.status_code))
+
+        await asyncio.sleep(policy.delay(attempt))
@@ -9,6 +9,8 @@
 import logging
 import requests
 
+from utils.retry import RetryPolicy
+
 
 logger = logging.getLogger(__name__)
 
@@ -29,12 +31,19 @@ class BaseWeChat(object):
 
     _http = requests.session()
 
+    # 网络异常及网关错误的重试策略, 子类可按接口返回码扩展
+    retry_policy = RetryPolicy()
+
     def __init__(self, app_id, timeout=None, session=None, auto_retry=True):
         self.app_id = app_id
         self.timeout = timeout
         self.session = session
         self.auto_retry = auto_retry
 
+        # 指定会话时使用独立的连接池, 否则使用类共享的会话
+        if session is not None:
+            self._http = session
+
     def request(self, *args, **kwargs):
         raise NotImplementedError()
 
@@ -8,9 +8,12 @@
 
 from django.conf import settings
 from django.utils.functional import LazyObject
+from django.utils.module_loading import import_string
 
+from utils.http import session_from_config
 from utils.wx.client import WeChatClient
 from utils.wx.pay import WeChatPay
+from utils.wx.pay import WeChatPayRegistry
 from utils.wx.others.oauth import WeChatOAuth
 
 
@@ -24,25 +27,58 @@ class WxApi(object):
     WECHAT_CONFIG = settings.THIRD_PART_CONFIG["WX"]
 
     def __init__(self, ):
+        # 连接池配置
+        http_config = self.WECHAT_CONFIG.get("http") or {}
         # 注册消息类api
         self.client = WeChatClient(
             app_id=self.WECHAT_CONFIG["app_id"],
             secret=self.WECHAT_CONFIG["secret"],
+            storage=self._get_storage("token_storage"),
+            session=session_from_config(http_config.get("client")),
+            rate_limits=self.WECHAT_CONFIG.get("rate_limits"),
+            # 后台提前刷新凭证, 首次读取凭证时启动
+            token_refresher=self.WECHAT_CONFIG.get("token_refresher"),
         )
+        # 用户信息缓存
+        profile_storage = self._get_storage("profile_storage")
+        if profile_storage is not None:
+            self.client.user.cache = profile_storage
+            self.client.user.cache_ttl = self.WECHAT_CONFIG["profile_storage"].get("ttl", self.client.user.cache_ttl)
         # 注册支付类api
+        pay_session = session_from_config(http_config.get("pay"))
         self.pay = WeChatPay(
             app_id=self.WECHAT_CONFIG["app_id"],
             api_key_path=self.WECHAT_CONFIG["api_key_path"],
             mch_id=self.WECHAT_CONFIG["mch_id"],
-            debug=self.WECHAT_CONFIG["debug"]
+            debug=self.WECHAT_CONFIG["debug"],
+            session=pay_session,
+        )
+        # 注册多商户支付api(服务商 / 多商户号)
+        self.pays = WeChatPayRegistry(
+            merchants=self.WECHAT_CONFIG.get("merchants") or {},
+            session=pay_session,
+            debug=self.WECHAT_CONFIG["debug"],
+            **(self.WECHAT_CONFIG.get("pay_registry") or {})
         )
         # 注册 oauth认证
         self.oauth = WeChatOAuth(
             app_id=self.WECHAT_CONFIG["app_id"],
             secret=self.WECHAT_CONFIG["secret"],
-            redirect_uri=self.WECHAT_CONFIG["redirect_uri"]
+            redirect_uri=self.WECHAT_CONFIG["redirect_uri"],
+            session=session_from_config(http_config.get("oauth")),
+            storage=self._get_storage("oauth_storage"),
         )
 
+    def _get_storage(self, name):
+        """根据配置构建凭证存储, 未配置时使用进程内存储
+
+        """
+        storage_config = self.WECHAT_CONFIG.get(name)
+        if not storage_config:
+            return None
+        storage_cls = import_string(storage_config["backend"])
+        return storage_cls(**storage_config.get("options", {}))
+
 
 class DefaultApi(LazyObject):
 
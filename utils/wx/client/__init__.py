@@ -3,3 +3,5 @@
 
 # 微信公众号接口类
 from .basic import WeChatClient
+# 公众号异步接口类
+from .aio import AsyncWeChatClient
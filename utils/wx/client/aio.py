@@ -0,0 +1,133 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+# Date: 2026/10/18
+
+"""
+    公众号异步客户端
+
+        与 `WeChatClient` 共用请求构建、结果校验、凭证存储逻辑, 通过 aiohttp 发送请求,
+        接口类(`message`, `user`, `misc`)的方法均返回协程, 使用时需 `await`
+
+        > client = AsyncWeChatClient(app_id, secret, storage=wx_api.client.storage)
+        > await client.message.send_text(openid, "hello")
+
+        凭证的读取及刷新放入线程池执行(进程内存储直接读取), 以复用同步客户端的跨进程/进程内单次刷新逻辑
+"""
+
+import asyncio
+import logging
+
+import requests
+
+from utils.aio import AsyncHTTPClient
+from utils.retry import async_send_with_retry
+from utils.wx.client.basic import WeChatClient
+from utils.wx.storage import MemoryStorage
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncWeChatClient(WeChatClient):
+
+    def __init__(self, *args, http=None, **kwargs):
+        """参数同 `WeChatClient`, http 为连接池配置, 同 `utils.http.build_session`
+
+        """
+        super(AsyncWeChatClient, self).__init__(*args, **kwargs)
+        self._aio_http = AsyncHTTPClient(**(http or {}))
+
+    async def _get_access_token(self, stale_token=None):
+        self._ensure_token_refresher()
+
+        loop = asyncio.get_running_loop()
+
+        # 文件 / 缓存服务存储的读取会阻塞事件循环, 进程内存储直接读取
+        if isinstance(self.storage, MemoryStorage):
+            access_token, expires_at = self._get_stored_token()
+        else:
+            access_token, expires_at = await loop.run_in_executor(None, self._get_stored_token)
+
+        if stale_token is None and self._is_token_valid(access_token, expires_at, self.TOKEN_REFRESH_AHEAD):
+            return access_token
+
+        return await loop.run_in_executor(None, self._refresh_access_token, stale_token)
+
+    async def _combine(self, results, callback):
+        """并发等待多个请求后合并结果
+
+        """
+        return callback(await asyncio.gather(*results))
+
+    async def _handle_result(self, res, method=None, url=None,
+                             result_processor=None, **kwargs):
+        """结果解析, 参数同 `WeChatClient._handle_result`
+
+        """
+        if not isinstance(res, dict):
+            result = res.json()
+        else:
+            result = res
+
+        if not isinstance(result, dict):
+            return result
+
+        attempt = kwargs.pop("retries", 0) + 1
+
+        retry = self._check_result(result)
+        self._update_rate_limit(url, result)
+
+        if retry and self.retry_policy.can_retry(attempt):
+            kwargs["params"]["access_token"] = await self._get_access_token(
+                stale_token=kwargs["params"].get("access_token")
+            )
+
+            return await self.request(
+                method=method,
+                url_or_endpoint=url,
+                result_processor=result_processor,
+                retries=attempt,
+                **kwargs
+            )
+
+        if self.auto_retry and self.retry_policy.is_retryable_code(result.get("errcode")) \
+                and self.retry_policy.can_retry(attempt):
+            await asyncio.sleep(self.retry_policy.delay(attempt))
+
+            return await self.request(
+                method=method,
+                url_or_endpoint=url,
+                result_processor=result_processor,
+                retries=attempt,
+                **kwargs
+            )
+
+        return result if not result_processor else result_processor(result)
+
+    async def request(self, method, url_or_endpoint, **kwargs):
+
+        url, kwargs = self._prepare_request(url_or_endpoint, kwargs)
+
+        limiter = self._get_rate_limiter(url)
+        if limiter is not None:
+            wait = limiter.reserve()
+            if wait > 0:
+                await asyncio.sleep(wait)
+
+        if isinstance(kwargs["params"], dict) and not kwargs["params"].get("access_token"):
+            kwargs["params"]["access_token"] = await self._get_access_token()
+
+        result_processor = kwargs.pop("result_processor", None)
+        retries = kwargs.pop("retries", 0)
+        # 单次请求的重试策略(幂等接口放宽重试), 默认为 `retry_policy`
+        retry_policy = kwargs.pop("retry_policy", None)
+
+        res = await async_send_with_retry(self._aio_http.request, method, url, retry_policy or self.retry_policy, **kwargs)
+
+        try:
+            res.raise_for_status()
+        except requests.RequestException as exc:
+            logger.error(str(exc))
+
+        return await self._handle_result(
+            res, method, url, result_processor, retries=retries, retry_policy=retry_policy, **kwargs
+        )
@@ -6,6 +6,7 @@ from django.utils import six
 from django.utils.crypto import get_random_string
 
 from utils.wx.client.api.base import BaseWeChatClientAPI
+from utils.wx.client.bulk import TemplateFanOut
 
 
 class WeChatMessage(BaseWeChatClientAPI):
@@ -99,6 +100,56 @@ class WeChatMessage(BaseWeChatClientAPI):
             data=tpl_data
         )
 
+    def send_template_bulk(self, recipients, template_id, url=None, mini_program=None,
+                           max_workers=16, rate=None):
+        """批量发送模板消息
+
+            由有界线程池并发发送, 返回值可迭代, 按完成顺序逐条返回每个接收人的发送结果,
+            迭代过程中及结束后可通过 `stats` 查看发送数、成功数、失败数及吞吐量(条/秒)
+
+            > sender = client.message.send_template_bulk(recipients, COURSE_NOTICE_TEMPLATE, rate=50)
+            > for item in sender:
+            >     if item.error or item.result.get("errcode"):
+            >         ...
+            > sender.stats
+
+            仅支持同步客户端, 异步客户端调用时抛出 TypeError
+
+        Parameters
+        ----------
+        recipients : iterable
+
+            (openid, data) 的可迭代对象, data 为模板消息数据
+
+        template_id: string
+
+            模板 ID
+
+        url: string
+
+            链接地址
+
+        mini_program: dict
+
+            跳小程序所需数据
+
+        max_workers: int
+
+            最大并发数
+
+        rate: float
+
+            每秒最多发送条数, 不传则不限制
+
+        Returns
+        -------
+        TemplateFanOut
+        """
+        return TemplateFanOut(
+            self, recipients, template_id, url=url, mini_program=mini_program,
+            max_workers=max_workers, rate=rate
+        )
+
     def send_articles(self, openid, articles, account=None):
         """发送图文消息
 
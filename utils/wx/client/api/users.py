@@ -4,11 +4,32 @@
 
 
 from utils.wx.client.api.base import BaseWeChatClientAPI
+from utils.wx.client.followers import FollowerIterator
+from utils.wx.storage import LRUMemoryStorage
 
 
 class WeChatUser(BaseWeChatClientAPI):
 
-    def get(self, openid, lang='zh_CN'):
+    # 用户信息缓存时间(秒)
+    PROFILE_CACHE_TTL = 3600
+    # 批量获取用户信息每次最多 100 个
+    BATCH_GET_LIMIT = 100
+
+    def __init__(self, client=None, cache=None):
+        super(WeChatUser, self).__init__(client)
+        # 用户信息缓存, 多进程部署时可替换为 `DjangoCacheStorage`
+        self.cache = cache if cache is not None else LRUMemoryStorage()
+        self.cache_ttl = self.PROFILE_CACHE_TTL
+
+    def _cache_key(self, openid, lang):
+        return "wechat:{}:user:{}:{}".format(self.app_id, openid, lang)
+
+    def _save_profile(self, result, lang):
+        if result.get("openid") and not result.get("errcode"):
+            self.cache.set(self._cache_key(result["openid"], lang), result, ttl=self.cache_ttl)
+        return result
+
+    def get(self, openid, lang='zh_CN', use_cache=True):
         """获取用户基本信息（包括UnionID机制）
 
         详情参考: https://mp.weixin.qq.com/wiki?t=resource/res_main&id=mp1421140839
@@ -22,19 +43,92 @@ class WeChatUser(BaseWeChatClientAPI):
         lang: string
             返回国家地区语言版本，zh_CN 简体，zh_TW 繁体，en 英语
 
+        use_cache: bool
+            是否优先读取缓存, 缓存时间为 `cache_ttl`
+
         Returns
         -------
         dict
         """
         assert lang in ('zh_CN', 'zh_TW', 'en')
+
+        if use_cache:
+            profile = self.cache.get(self._cache_key(openid, lang))
+            if profile is not None:
+                return self._client._combine([], lambda results: profile)
+
         return self._get(
             'user/info',
             params={
                 'openid': openid,
                 'lang': lang
-            }
+            },
+            result_processor=lambda result: self._save_profile(result, lang)
         )
 
+    def get_batch(self, openids, lang='zh_CN', use_cache=True):
+        """批量获取用户基本信息, 未缓存的用户每 100 个合并为一次请求, 结果写入缓存
+
+        详情参考: https://mp.weixin.qq.com/wiki?t=resource/res_main&id=mp1421140839
+
+        Parameters
+        ----------
+
+        openids: iterable
+            openid 列表
+
+        lang: string
+            返回国家地区语言版本，zh_CN 简体，zh_TW 繁体，en 英语
+
+        use_cache: bool
+            是否优先读取缓存
+
+        Returns
+        -------
+        dict
+            openid: 用户信息, 获取失败的用户不包含在内
+        """
+        assert lang in ('zh_CN', 'zh_TW', 'en')
+
+        profiles = {}
+        missing = []
+        seen = set()
+        for openid in openids:
+            if openid in seen:
+                continue
+            seen.add(openid)
+            profile = self.cache.get(self._cache_key(openid, lang)) if use_cache else None
+            if profile is not None:
+                profiles[openid] = profile
+            else:
+                missing.append(openid)
+
+        def save_profiles(result):
+            for profile in result.get("user_info_list", []):
+                self._save_profile(profile, lang)
+            return result
+
+        calls = []
+        for start in range(0, len(missing), self.BATCH_GET_LIMIT):
+            calls.append(self._post(
+                'user/info/batchget',
+                data={
+                    'user_list': [
+                        {'openid': openid, 'lang': lang}
+                        for openid in missing[start:start + self.BATCH_GET_LIMIT]
+                    ]
+                },
+                result_processor=save_profiles
+            ))
+
+        def merge(results):
+            for result in results:
+                for profile in result.get("user_info_list", []):
+                    profiles[profile["openid"]] = profile
+            return profiles
+
+        return self._client._combine(calls, merge)
+
     def get_followers(self, first_openid=None):
         """获取用户列表
 
@@ -57,3 +151,21 @@ class WeChatUser(BaseWeChatClientAPI):
             'user/get',
             params=params
         )
+
+    def iter_followers(self, first_openid=None, prefetch=True):
+        """遍历全部关注者 openid(仅适用于同步客户端)
+
+        Parameters
+        ----------
+
+        first_openid: string
+            可选。第一个拉取的 openid，不填默认从头开始拉取
+
+        prefetch: bool
+            是否在消费当前页时后台拉取下一页
+
+        Returns
+        -------
+        FollowerIterator
+        """
+        return FollowerIterator(self, first_openid=first_openid, prefetch=prefetch)
@@ -9,12 +9,19 @@ import logging
 import requests
 import threading
 
+from urllib.parse import urlparse
+
 from django.conf import settings
 from django.core.mail import send_mail
 
 from utils.wx.client.api.base import BaseWeChatClientAPI
 from utils.wx.errcodes import WeChatErrorCode
 from utils.wx.client import api
+from utils.wx.client.refresher import AccessTokenRefresher
+from utils.wx.storage import MemoryStorage
+from utils.ratelimit import AdaptiveRateLimiter
+from utils.retry import RetryPolicy
+from utils.retry import send_with_retry
 from utils.wx import BaseWeChat
 
 logger = logging.getLogger(__name__)
@@ -28,6 +35,9 @@ class WeChatClient(BaseWeChat):
 
     API_BASE_URL = "https://api.weixin.qq.com/cgi-bin/"
 
+    # 系统繁忙(-1)时退避重试
+    retry_policy = RetryPolicy(retryable_codes=(WeChatErrorCode.SYSTEM_BUSY.value, ))
+
     # 消息
     message = api.WeChatMessage()
     # 用户
@@ -35,6 +45,13 @@ class WeChatClient(BaseWeChat):
     # 混合工具
     misc = api.WeChatMisc()
 
+    # 凭证提前刷新的时间(秒)
+    TOKEN_REFRESH_AHEAD = 300
+    # 刷新凭证的锁最长持有时间(秒)
+    TOKEN_LOCK_TTL = 10
+    # 拉取凭证的超时时间(秒, 连接/读取), 须小于锁的持有时间, 避免锁过期后其它进程同时拉取使凭证互相失效
+    TOKEN_FETCH_TIMEOUT = (3, 5)
+
     def __new__(cls, *args, **kwargs):
         self = super(WeChatClient, cls).__new__(cls)
         api_endpoints = inspect.getmembers(self, _is_api_endpoint)
@@ -44,13 +61,30 @@ class WeChatClient(BaseWeChat):
             setattr(self, name, api_ins)
         return self
 
-    def __init__(self, app_id, secret, timeout=None, session=None, auto_retry=True):
+    def __init__(self, app_id, secret, timeout=None, session=None, auto_retry=True, storage=None,
+                 rate_limits=None, token_refresher=None):
         super(WeChatClient, self).__init__(
             app_id, timeout, session, auto_retry
         )
         self.secret = secret
-        self.expires_at = 0
-        self.__access_token = None
+        # 凭证存储, 多进程部署时需使用可共享的存储
+        self.storage = storage or MemoryStorage()
+        self._token_key = "wechat:{}:access_token".format(app_id)
+        self._token_refresher = None
+        # 后台刷新参数, 首次读取凭证时在当前进程启动刷新线程, 预先 fork 的 worker 进程各自启动
+        self._token_refresher_options = token_refresher
+        self._refresher_lock = threading.Lock()
+        # 进程内同一时间只有一个线程刷新凭证, 其余线程等待其结果
+        self._token_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        # fetches: 实际拉取凭证次数, coalesced: 等待其它线程刷新结果的调用次数
+        self.token_stats = {"fetches": 0, "coalesced": 0}
+        # 按接口限流, 如 {"message/template/send": 50, "user/info": {"rate": 100, "min_rate": 5}},
+        # "*" 为其余接口的默认限流
+        self.rate_limiters = {}
+        self._url_limiters = {}
+        for endpoint, rate in (rate_limits or {}).items():
+            self.set_rate_limit(endpoint, rate)
 
     def _handle_result(self, res, method=None, url=None,
                        result_processor=None, **kwargs):
@@ -91,6 +125,52 @@ class WeChatClient(BaseWeChat):
         if not isinstance(result, dict):
             return result
 
+        # 已请求次数, 重试以有限次数为限, 避免凭证持续失效时无限递归
+        attempt = kwargs.pop("retries", 0) + 1
+
+        retry = self._check_result(result)
+        self._update_rate_limit(url, result)
+
+        if retry and self.retry_policy.can_retry(attempt):
+            kwargs["params"]["access_token"] = self._refresh_access_token(
+                stale_token=kwargs["params"].get("access_token")
+            )
+
+            return self.request(
+                method=method,
+                url_or_endpoint=url,
+                result_processor=result_processor,
+                retries=attempt,
+                **kwargs
+            )
+
+        if self.auto_retry and self.retry_policy.is_retryable_code(result.get("errcode")) \
+                and self.retry_policy.can_retry(attempt):
+            time.sleep(self.retry_policy.delay(attempt))
+
+            return self.request(
+                method=method,
+                url_or_endpoint=url,
+                result_processor=result_processor,
+                retries=attempt,
+                **kwargs
+            )
+
+        return result if not result_processor else result_processor(result)
+
+    def _check_result(self, result):
+        """校验结果(同步/异步客户端共用)
+
+        Parameters
+        ----------
+        result : dict
+
+            接口返回的数据
+
+        Returns
+        -------
+        是否需要刷新凭证后重试: bool
+        """
         if "base_resp" in result:
             # Different response in device APIs. Fuck Tencent!
             result.update(errcode=result.pop("base_resp"))
@@ -108,15 +188,7 @@ class WeChatClient(BaseWeChat):
                     WeChatErrorCode.INVALID_ACCESS_TOKEN.value,
                     WeChatErrorCode.EXPIRED_ACCESS_TOKEN.value,):
                 logger.info("Access token expired, fetch a new one and retry request")
-
-                kwargs["params"]["access_token"] = self._fetch_access_token()
-
-                return self.request(
-                    method=method,
-                    url_or_endpoint=url,
-                    result_processor=result_processor,
-                    **kwargs
-                )
+                return True
 
             elif errcode == WeChatErrorCode.OUT_OF_API_FREQ_LIMIT.value:
                 # api 使用频率超过限制
@@ -128,10 +200,15 @@ class WeChatClient(BaseWeChat):
 
         logger.info("WxApi client res: {}".format(result))
 
-        return result if not result_processor else result_processor(result)
+        return False
 
-    def request(self, method, url_or_endpoint, **kwargs):
+    def _prepare_request(self, url_or_endpoint, kwargs):
+        """构建请求地址及参数(同步/异步客户端共用), `access_token` 由调用方填充
 
+        Returns
+        -------
+        (url, kwargs): tuple
+        """
         if not url_or_endpoint.startswith(("http://", "https://")):
             api_base_url = kwargs.pop("api_base_url", self.API_BASE_URL)
             url = "{base}{endpoint}".format(
@@ -144,22 +221,32 @@ class WeChatClient(BaseWeChat):
         if "params" not in kwargs:
             kwargs["params"] = {}
 
-        if isinstance(kwargs["params"], dict):
-            kwargs["params"]["access_token"] = self.access_token
-
         if isinstance(kwargs.get("data", ""), dict):
             body = json.dumps(kwargs["data"], ensure_ascii=False)
             body = body.encode('utf-8')
             kwargs['data'] = body
 
         kwargs["timeout"] = kwargs.get("timeout", self.timeout)
+
+        return url, kwargs
+
+    def request(self, method, url_or_endpoint, **kwargs):
+
+        url, kwargs = self._prepare_request(url_or_endpoint, kwargs)
+
+        limiter = self._get_rate_limiter(url)
+        if limiter is not None:
+            limiter.acquire()
+
+        if isinstance(kwargs["params"], dict):
+            kwargs["params"]["access_token"] = self.access_token
+
         result_processor = kwargs.pop("result_processor", None)
+        retries = kwargs.pop("retries", 0)
+        # 单次请求的重试策略(幂等接口放宽重试), 默认为 `retry_policy`
+        retry_policy = kwargs.pop("retry_policy", None)
 
-        res = self._http.request(
-            method=method,
-            url=url,
-            **kwargs
-        )
+        res = send_with_retry(self._http.request, method, url, retry_policy or self.retry_policy, **kwargs)
 
         try:
             res.raise_for_status()
@@ -168,14 +255,76 @@ class WeChatClient(BaseWeChat):
             # 发送错误消息至
 
         return self._handle_result(
-            res, method, url, result_processor, **kwargs
+            res, method, url, result_processor, retries=retries, retry_policy=retry_policy, **kwargs
         )
 
+    def set_rate_limit(self, endpoint, rate):
+        """设置接口限流
+
+        Parameters
+        ----------
+        endpoint : string
+
+            接口, 如 `message/template/send`, "*" 表示其余所有接口
+
+        rate : float OR dict
+
+            每秒调用次数上限, 或 `AdaptiveRateLimiter` 的参数
+        """
+        options = rate if isinstance(rate, dict) else {"rate": rate}
+        self.rate_limiters[endpoint.strip("/")] = AdaptiveRateLimiter(**options)
+        self._url_limiters = {}
+
+    def _get_rate_limiter(self, url):
+        if not self.rate_limiters:
+            return None
+
+        try:
+            return self._url_limiters[url]
+        except KeyError:
+            pass
+
+        path = urlparse(url).path.strip("/")
+        limiter = self.rate_limiters.get("*")
+        for endpoint, item in self.rate_limiters.items():
+            if path == endpoint or path.endswith("/" + endpoint):
+                limiter = item
+                break
+
+        self._url_limiters[url] = limiter
+        return limiter
+
+    def _update_rate_limit(self, url, result):
+        """根据结果调整限流速率: 被限流(45009)时减速, 成功时逐步恢复
+
+        """
+        limiter = self._get_rate_limiter(url)
+        if limiter is None:
+            return
+
+        errcode = result.get("errcode", 0)
+        if errcode == WeChatErrorCode.OUT_OF_API_FREQ_LIMIT.value:
+            limiter.decrease()
+            logger.warning("Slow down wx api {} to {:.2f}/s".format(url, limiter.rate))
+        elif errcode == 0:
+            limiter.increase()
+
+    def _combine(self, results, callback):
+        """合并多个请求的结果(同步客户端中 results 为已完成的结果)
+
+            接口类通过该方法组合多个请求或直接返回缓存, 使同一份代码同时适用于同步/异步客户端
+        """
+        return callback(results)
+
+    def _incr_token_stat(self, name):
+        with self._stats_lock:
+            self.token_stats[name] += 1
+
     def _fetch_access_token(self):
 
-        logger.info("Fetching access token appid is {}, secret is {}".format(
-            self.app_id, self.secret
-        ))
+        self._incr_token_stat("fetches")
+
+        logger.info("Fetching access token appid is {}".format(self.app_id))
 
         url = "https://api.weixin.qq.com/cgi-bin/token"
         params = {
@@ -184,7 +333,7 @@ class WeChatClient(BaseWeChat):
             "secret": self.secret
         }
 
-        res = self._http.get(url=url, params=params)
+        res = self._http.get(url=url, params=params, timeout=self.TOKEN_FETCH_TIMEOUT)
 
         res.raise_for_status()
 
@@ -201,11 +350,161 @@ class WeChatClient(BaseWeChat):
             )
             task.start()
 
-        self.expires_at = int(time.time()) + result.get("expires_in", 0)
+        access_token = result.get("access_token", )
+
+        if access_token:
+            expires_in = result.get("expires_in", 0)
+            self.storage.set(self._token_key, {
+                "access_token": access_token,
+                "expires_at": int(time.time()) + expires_in
+            }, ttl=expires_in or None)
+
+        return access_token
+
+    def _get_stored_token(self):
+        """从存储中读取凭证
+
+        Returns
+        -------
+        (access_token, expires_at): tuple
+        """
+        token = self.storage.get(self._token_key) or {}
+        return token.get("access_token"), token.get("expires_at", 0)
+
+    @staticmethod
+    def _is_token_valid(access_token, expires_at, ahead=0):
+        if not access_token:
+            return False
+        # 未设置过期时间的为用户提供的凭证
+        return not expires_at or expires_at - time.time() > ahead
+
+    def _refresh_access_token(self, stale_token=None, ahead=None):
+        """刷新凭证
+
+            进程内合并并发刷新: 同一时间只有一个线程去刷新, 其余线程等待并直接使用其结果
+
+        Parameters
+        ----------
+        stale_token: string
+            已被微信判定失效的凭证
+
+        ahead: int
+            剩余有效期小于该值(秒)时刷新
+
+        Returns
+        -------
+        access_token: string
+        """
+        if not self._token_lock.acquire(False):
+            self._incr_token_stat("coalesced")
+
+            with self._token_lock:
+                pass
+
+            access_token, expires_at = self._get_stored_token()
+            if access_token != stale_token and self._is_token_valid(access_token, expires_at):
+                return access_token
+
+            # 刷新的线程失败了, 由当前线程重新刷新
+            self._token_lock.acquire()
+
+        try:
+            return self._refresh_shared_access_token(stale_token, ahead)
+        finally:
+            self._token_lock.release()
+
+    def _refresh_shared_access_token(self, stale_token=None, ahead=None):
+        """跨进程刷新凭证
+
+            通过存储锁保证多个进程同时只有一个去拉取凭证, 其余进程:
+
+                当前凭证仍在有效期内, 直接使用旧凭证, 不等待
+
+                当前凭证已失效, 等待持锁进程刷新完成后读取新凭证
+
+        Parameters
+        ----------
+        stale_token: string
+            已被微信判定失效的凭证, 存储中的凭证与其不同时说明已被其它进程刷新
+
+        ahead: int
+            剩余有效期小于该值(秒)时刷新, 默认为 `TOKEN_REFRESH_AHEAD`
+
+        Returns
+        -------
+        access_token: string
+        """
+        lock_key = "{}:lock".format(self._token_key)
+        ahead = self.TOKEN_REFRESH_AHEAD if ahead is None else ahead
+
+        if self.storage.acquire_lock(lock_key, self.TOKEN_LOCK_TTL):
+            try:
+                # 获取锁期间可能已有其它进程完成了刷新
+                access_token, expires_at = self._get_stored_token()
+                if access_token != stale_token and self._is_token_valid(access_token, expires_at, ahead):
+                    return access_token
+                return self._fetch_access_token()
+            finally:
+                self.storage.release_lock(lock_key)
 
-        self.__access_token = result.get("access_token", )
+        access_token, expires_at = self._get_stored_token()
+        if access_token != stale_token and self._is_token_valid(access_token, expires_at):
+            return access_token
 
-        return result.get("access_token", )
+        deadline = time.time() + self.TOKEN_LOCK_TTL
+        while time.time() < deadline:
+            time.sleep(0.05)
+            access_token, expires_at = self._get_stored_token()
+            if access_token != stale_token and self._is_token_valid(access_token, expires_at):
+                return access_token
+
+        logger.warning("Wait for access token refreshing timeout, fetch it directly")
+
+        return self._fetch_access_token()
+
+    def start_token_refresher(self, ahead=600, jitter=60):
+        """启动后台刷新凭证线程
+
+            在凭证过期前主动刷新, 业务请求不再同步等待凭证获取
+
+        Parameters
+        ----------
+        ahead: int
+            提前刷新的时间(秒)
+
+        jitter: int
+            随机抖动(秒)
+
+        Returns
+        -------
+        AccessTokenRefresher
+        """
+        with self._refresher_lock:
+            self._token_refresher_options = {"ahead": ahead, "jitter": jitter}
+            # fork 出的子进程中父进程的线程不再存活, 需重新启动
+            if self._token_refresher is None or not self._token_refresher.is_alive():
+                self._token_refresher = AccessTokenRefresher(self, ahead=ahead, jitter=jitter)
+                self._token_refresher.start()
+            return self._token_refresher
+
+    def stop_token_refresher(self):
+        with self._refresher_lock:
+            self._token_refresher_options = None
+            if self._token_refresher is not None:
+                self._token_refresher.stop()
+                self._token_refresher = None
+
+    def _ensure_token_refresher(self):
+        options = self._token_refresher_options
+        if options is None:
+            return
+        refresher = self._token_refresher
+        if refresher is None or not refresher.is_alive():
+            self.start_token_refresher(**options)
+
+    @property
+    def expires_at(self):
+        return self._get_stored_token()[1]
 
     @property
     def access_token(self):
@@ -221,15 +520,11 @@ class WeChatClient(BaseWeChat):
         access_token: string
         """
 
-        if self.__access_token:
-            if not self.expires_at:
-                # user provided access_token, just return it
-                return self.__access_token
+        self._ensure_token_refresher()
 
-            timestamp = time.time()
-            if self.expires_at - timestamp > 300:
-                return self.__access_token
+        access_token, expires_at = self._get_stored_token()
 
-        self._fetch_access_token()
+        if self._is_token_valid(access_token, expires_at, self.TOKEN_REFRESH_AHEAD):
+            return access_token
 
-        return self.__access_token
+        return self._refresh_access_token()
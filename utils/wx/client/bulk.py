@@ -0,0 +1,142 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+# Date: 2026/10/18
+
+"""
+    模板消息批量发送
+
+        接收 (openid, data) 的可迭代对象, 由有界线程池并发发送, 按完成顺序逐条返回发送结果,
+        任意时刻最多只有 `max_workers * 2` 个接收人在内存中, 适用于数万人的活动通知
+"""
+
+import time
+import inspect
+import logging
+
+from collections import namedtuple
+from concurrent.futures import FIRST_COMPLETED
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import wait
+
+from utils.ratelimit import RateLimiter
+
+logger = logging.getLogger(__name__)
+
+
+# 单个接收人的发送结果, error 为发送过程中出现的异常
+TemplateSendResult = namedtuple("TemplateSendResult", ["openid", "result", "error"])
+
+
+class TemplateFanOut(object):
+
+    def __init__(self, message, recipients, template_id, url=None, mini_program=None,
+                 max_workers=16, rate=None):
+        """初始化参数
+
+        Parameters
+        ----------
+        message: WeChatMessage
+
+            消息接口
+
+        recipients: iterable
+
+            (openid, data) 的可迭代对象, 可以是生成器
+
+        template_id: string
+
+            模板 ID
+
+        url: string
+
+            链接地址
+
+        mini_program: dict
+
+            跳小程序所需数据
+
+        max_workers: int
+
+            最大并发数
+
+        rate: float
+
+            每秒最多发送条数, 不传则不限制
+        """
+        if inspect.iscoroutinefunction(message._client.request):
+            # 异步客户端的接口返回协程, 线程池中无法等待
+            raise TypeError("TemplateFanOut requires a sync WeChatClient, "
+                            "use asyncio.gather with a semaphore for AsyncWeChatClient")
+
+        self.message = message
+        self.recipients = recipients
+        self.template_id = template_id
+        self.url = url
+        self.mini_program = mini_program
+        self.max_workers = max_workers
+        # 平滑发送, 不允许突发
+        self.limiter = RateLimiter(rate, capacity=1) if rate else None
+
+        self.stats = {
+            "total": 0,
+            "success": 0,
+            "failed": 0,
+            "elapsed": 0,
+            "throughput": 0,
+        }
+
+    def _send(self, openid, data):
+        if self.limiter is not None:
+            self.limiter.acquire()
+
+        try:
+            result = self.message.send_template(
+                openid, self.template_id, data, url=self.url, mini_program=self.mini_program
+            )
+        except Exception as exc:
+            logger.error("Send wx template to {} failed: {}".format(openid, exc))
+            return TemplateSendResult(openid, None, exc)
+
+        return TemplateSendResult(openid, result, None)
+
+    def _collect(self, future, started_at):
+        result = future.result()
+
+        self.stats["total"] += 1
+        if result.error is None and isinstance(result.result, dict) and result.result.get("errcode", 0) == 0:
+            self.stats["success"] += 1
+        else:
+            self.stats["failed"] += 1
+
+        self.stats["elapsed"] = time.time() - started_at
+        if self.stats["elapsed"]:
+            self.stats["throughput"] = self.stats["total"] / self.stats["elapsed"]
+
+        return result
+
+    def __iter__(self):
+        started_at = time.time()
+        executor = ThreadPoolExecutor(max_workers=self.max_workers)
+        pending = set()
+
+        try:
+            for openid, data in self.recipients:
+                # 控制在途任务数量, 避免一次性读入全部接收人
+                while len(pending) >= self.max_workers * 2:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        yield self._collect(future, started_at)
+
+                pending.add(executor.submit(self._send, openid, data))
+
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield self._collect(future, started_at)
+        finally:
+            # 迭代提前终止时取消尚未开始的任务
+            for future in pending:
+                future.cancel()
+            executor.shutdown(wait=True)
+
+            logger.info("Send wx template {} finished: {}".format(self.template_id, self.stats))
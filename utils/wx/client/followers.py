@@ -0,0 +1,451 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+# Date: 2026/10/18
+
+"""
+    关注者列表
+
+        FollowerIterator    逐页拉取全部关注者 openid(每页最多 10000 个), 可在消费当前页时后台预取下一页
+
+        OpenIdSet           定长 openid 的有序紧凑集合, 千万级关注者只占用 `openid 长度 * 数量` 字节,
+                            用于成员判断及与其它集合的有序比较
+
+        FollowerSync        关注者同步, 持久化拉取游标及关注者快照, 每次运行得到新增/取消关注的用户
+"""
+
+import os
+import json
+import time
+import heapq
+import bisect
+import logging
+import tempfile
+
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+
+class FollowerIterator(object):
+
+    """
+    关注者 openid 迭代器(仅适用于同步客户端)
+
+        > for openid in client.user.iter_followers():
+        >     ...
+    """
+
+    def __init__(self, user, first_openid=None, prefetch=True):
+        """初始化参数
+
+        Parameters
+        ----------
+        user: WeChatUser
+
+            用户接口
+
+        first_openid: string
+
+            第一个拉取的 openid, 不填默认从头开始拉取
+
+        prefetch: bool
+
+            是否在消费当前页时后台拉取下一页
+        """
+        self.user = user
+        self.first_openid = first_openid
+        self.prefetch = prefetch
+
+        # 关注者总数(拉取第一页后可用)
+        self.total = None
+        # 最后一页返回的 next_openid, 可用于中断后继续拉取
+        self.next_openid = first_openid
+
+    def _fetch(self, next_openid):
+        result = self.user.get_followers(next_openid)
+        if result.get("errcode"):
+            raise ValueError("{}: {}".format(result["errcode"], result.get("errmsg")))
+        return result
+
+    def iter_pages(self):
+        """逐页返回 (openids, next_openid)
+
+        """
+        executor = ThreadPoolExecutor(max_workers=1) if self.prefetch else None
+        future = None
+
+        try:
+            result = self._fetch(self.first_openid)
+
+            while True:
+                self.total = result.get("total", self.total)
+                openids = (result.get("data") or {}).get("openid") or []
+                next_openid = result.get("next_openid")
+
+                # 最后一页的 count 为 0 或没有 next_openid
+                has_next = bool(openids) and bool(next_openid)
+                if has_next and executor is not None:
+                    future = executor.submit(self._fetch, next_openid)
+
+                if openids:
+                    yield openids, next_openid
+                    self.next_openid = next_openid
+
+                if not has_next:
+                    break
+
+                result = future.result() if future is not None else self._fetch(next_openid)
+                future = None
+        finally:
+            if future is not None:
+                future.cancel()
+            if executor is not None:
+                executor.shutdown(wait=True)
+
+    def __iter__(self):
+        for openids, _ in self.iter_pages():
+            for openid in openids:
+                yield openid
+
+
+class _Items(object):
+
+    """
+    按下标访问定长记录(供 bisect 使用)
+    """
+
+    def __init__(self, data, width):
+        self.data = data
+        self.width = width
+
+    def __len__(self):
+        return len(self.data) // self.width
+
+    def __getitem__(self, index):
+        start = index * self.width
+        return self.data[start:start + self.width]
+
+
+class OpenIdSet(object):
+
+    """
+    定长 openid 有序集合
+
+        > followers = OpenIdSet.from_iterable(client.user.iter_followers())
+        > "oXXXX" in followers
+    """
+
+    # 公众号 openid 长度
+    WIDTH = 28
+    # 构建时每次在内存中排序的 openid 数量
+    CHUNK_SIZE = 1000000
+
+    def __init__(self, data=b"", width=WIDTH):
+        """初始化参数
+
+        Parameters
+        ----------
+        data: bytes
+
+            已排序去重的 openid 依次拼接而成的字节串
+
+        width: int
+
+            openid 长度
+        """
+        if len(data) % width:
+            raise ValueError("Data length {} is not a multiple of {}".format(len(data), width))
+
+        self.data = bytes(data)
+        self.width = width
+        self._items = _Items(self.data, width)
+
+    @classmethod
+    def from_iterable(cls, openids, width=WIDTH, chunk_size=CHUNK_SIZE):
+        """分块排序后归并构建, 任意时刻只有一个块以 str 形式存在
+
+        """
+        chunks = []
+        chunk = []
+
+        def flush():
+            chunk.sort()
+            chunks.append(b"".join(chunk))
+            del chunk[:]
+
+        for openid in openids:
+            openid = openid.encode("ascii") if not isinstance(openid, bytes) else openid
+            if len(openid) != width:
+                raise ValueError("Invalid openid length: {!r}".format(openid))
+            chunk.append(openid)
+            if len(chunk) >= chunk_size:
+                flush()
+
+        if chunk:
+            flush()
+
+        if len(chunks) == 1:
+            items = cls._dedupe(cls(chunks[0], width))
+        else:
+            items = cls._dedupe(heapq.merge(*(cls(data, width) for data in chunks)))
+
+        data = bytearray()
+        for item in items:
+            data += item
+        del chunks[:]
+
+        return cls(bytes(data), width)
+
+    @staticmethod
+    def _dedupe(items):
+        last = None
+        for item in items:
+            if item != last:
+                yield item
+                last = item
+
+    def _key(self, openid):
+        return openid.encode("ascii") if not isinstance(openid, bytes) else openid
+
+    def __len__(self):
+        return len(self._items)
+
+    def __iter__(self):
+        width = self.width
+        for start in range(0, len(self.data), width):
+            yield self.data[start:start + width]
+
+    def __contains__(self, openid):
+        key = self._key(openid)
+        index = bisect.bisect_left(self._items, key)
+        return index < len(self._items) and self._items[index] == key
+
+    def __eq__(self, other):
+        return isinstance(other, OpenIdSet) and self.width == other.width and self.data == other.data
+
+    def diff(self, other):
+        """与另一个集合有序归并比较
+
+        Returns
+        -------
+        (added, removed): tuple
+
+            added 为仅在 self 中的 openid, removed 为仅在 other 中的 openid(均为 bytes 列表)
+        """
+        added, removed = [], []
+
+        mine, theirs = iter(self), iter(other)
+        a, b = next(mine, None), next(theirs, None)
+
+        while a is not None or b is not None:
+            if b is None or (a is not None and a < b):
+                added.append(a)
+                a = next(mine, None)
+            elif a is None or b < a:
+                removed.append(b)
+                b = next(theirs, None)
+            else:
+                a, b = next(mine, None), next(theirs, None)
+
+        return added, removed
+
+
+def _atomic_write(path, data):
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path))
+    try:
+        with os.fdopen(fd, "wb") as fp:
+            fp.write(data)
+            fp.flush()
+            os.fsync(fp.fileno())
+        os.replace(tmp_path, path)
+    except Exception:
+        os.remove(tmp_path)
+        raise
+
+
+class FollowerSync(object):
+
+    """
+    关注者同步
+
+        增量同步从上次结束的 next_openid 继续拉取, 只能得到新增的关注者, 依赖于新关注的用户追加在列表末尾;
+        微信未对列表顺序作出保证, 因此距上次全量同步超过 `full_interval` 时自动改为全量同步,
+        取消关注也只有全量同步(与快照归并比较)才能得到
+
+        每拉取一页即追加写入临时文件并保存游标, 进程中断后再次运行会从中断的位置继续;
+        新快照写入单独的文件, 由状态文件的原子替换切换, 中断后重新运行得到的结果相同
+
+        > sync = FollowerSync(client.user, "/data/wx/followers")
+        > added, removed = sync.run(full=False)
+        > sync.stats
+    """
+
+    SNAPSHOT_FILE = "followers.snapshot"
+    # 快照文件按版本号命名, 状态文件中记录当前版本
+    SNAPSHOT_VERSION_FILE = "followers.snapshot.{}"
+    PENDING_FILE = "followers.pending"
+    STATE_FILE = "followers.state.json"
+
+    def __init__(self, user, path, prefetch=True, width=OpenIdSet.WIDTH, full_interval=7 * 24 * 3600):
+        """初始化参数
+
+        Parameters
+        ----------
+        user: WeChatUser
+
+            用户接口(同步客户端)
+
+        path: string
+
+            状态文件目录
+
+        prefetch: bool
+
+            是否后台预取下一页
+
+        width: int
+
+            openid 长度
+
+        full_interval: int OR None
+
+            距上次全量同步超过该秒数时改为全量同步, None 为不自动全量同步
+        """
+        self.user = user
+        self.path = path
+        self.prefetch = prefetch
+        self.width = width
+        self.full_interval = full_interval
+
+        self.stats = {
+            "rows": 0,
+            "added": 0,
+            "removed": 0,
+            "elapsed": 0,
+            "rows_per_sec": 0,
+        }
+
+        if not os.path.isdir(path):
+            os.makedirs(path)
+
+    def _file(self, name):
+        return os.path.join(self.path, name)
+
+    def _load_state(self):
+        try:
+            with open(self._file(self.STATE_FILE)) as fp:
+                return json.load(fp)
+        except (IOError, OSError, ValueError):
+            return {}
+
+    def _save_state(self, state):
+        _atomic_write(self._file(self.STATE_FILE), json.dumps(state).encode("utf-8"))
+
+    def _snapshot_file(self, state):
+        version = state.get("snapshot")
+        if version is None:
+            return self._file(self.SNAPSHOT_FILE)
+        return self._file(self.SNAPSHOT_VERSION_FILE.format(version))
+
+    def load_snapshot(self, state=None):
+        """读取上次同步后的关注者快照
+
+        """
+        state = self._load_state() if state is None else state
+        try:
+            with open(self._snapshot_file(state), "rb") as fp:
+                return OpenIdSet(fp.read(), self.width)
+        except (IOError, OSError):
+            return OpenIdSet(b"", self.width)
+
+    def _iter_pending(self):
+        with open(self._file(self.PENDING_FILE), "rb") as fp:
+            for line in fp:
+                line = line.rstrip(b"\n")
+                if line:
+                    yield line
+
+    def _fetch(self, state):
+        progress = state["progress"]
+        followers = FollowerIterator(self.user, first_openid=progress["next_openid"], prefetch=self.prefetch)
+
+        with open(self._file(self.PENDING_FILE), "ab") as fp:
+            for openids, next_openid in followers.iter_pages():
+                fp.write("".join("{}\n".format(openid) for openid in openids).encode("ascii"))
+                fp.flush()
+                os.fsync(fp.fileno())
+
+                self.stats["rows"] += len(openids)
+                progress["next_openid"] = next_openid
+                self._save_state(state)
+
+                logger.info("Sync wx followers: {} rows, {:.1f} rows/sec".format(
+                    self.stats["rows"], self.stats["rows"] / max(time.time() - self._started_at, 1e-6)
+                ))
+
+    def run(self, full=False):
+        """执行同步
+
+        Parameters
+        ----------
+        full: bool
+
+            是否全量同步, 没有快照时总是全量同步
+
+        Returns
+        -------
+        (added, removed): tuple
+
+            新增及取消关注的 openid(bytes) 列表, 增量同步时 removed 总是为空
+        """
+        self._started_at = time.time()
+        self.stats = dict.fromkeys(self.stats, 0)
+        state = self._load_state()
+
+        if state.get("progress"):
+            logger.info("Resume wx follower sync from {}".format(state["progress"]["next_openid"]))
+        else:
+            full = full or not state.get("cursor")
+            if self.full_interval is not None and time.time() - state.get("full_at", 0) > self.full_interval:
+                full = True
+            state["progress"] = {
+                "full": full,
+                "next_openid": None if full else state.get("cursor"),
+            }
+            open(self._file(self.PENDING_FILE), "wb").close()
+            self._save_state(state)
+
+        self._fetch(state)
+
+        snapshot = self.load_snapshot(state)
+        fetched = OpenIdSet.from_iterable(self._iter_pending(), self.width)
+
+        if state["progress"]["full"]:
+            added, removed = fetched.diff(snapshot)
+            current = fetched
+        else:
+            added, removed = [openid for openid in fetched if openid not in snapshot], []
+            current = OpenIdSet.from_iterable(heapq.merge(snapshot, added), self.width)
+
+        # 先写入新版本的快照, 再由状态文件切换, 切换前中断时仍使用旧快照重新比较
+        version = state.get("snapshot", 0) + 1
+        new_state = {
+            "cursor": state["progress"]["next_openid"],
+            "snapshot": version,
+            "full_at": self._started_at if state["progress"]["full"] else state.get("full_at", 0),
+        }
+        _atomic_write(self._file(self.SNAPSHOT_VERSION_FILE.format(version)), current.data)
+        self._save_state(new_state)
+
+        os.remove(self._file(self.PENDING_FILE))
+        old_snapshot = self._snapshot_file(state)
+        if os.path.exists(old_snapshot):
+            os.remove(old_snapshot)
+
+        self.stats["added"] = len(added)
+        self.stats["removed"] = len(removed)
+        self.stats["elapsed"] = time.time() - self._started_at
+        self.stats["rows_per_sec"] = self.stats["rows"] / max(self.stats["elapsed"], 1e-6)
+        logger.info("Sync wx followers finished: {}".format(self.stats))
+
+        return added, removed
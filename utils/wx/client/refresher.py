@@ -0,0 +1,94 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+# Date: 2026/10/18
+
+"""
+    access_token 后台刷新
+
+        在凭证过期前(提前量 + 随机抖动)由后台线程主动刷新, 业务请求只读取存储中的凭证,
+        不再由恰好跨过过期边界的请求同步拉取凭证
+"""
+
+import time
+import random
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+
+class AccessTokenRefresher(threading.Thread):
+
+    def __init__(self, client, ahead=600, jitter=60, retry_interval=30):
+        """初始化参数
+
+        Parameters
+        ----------
+        client: WeChatClient
+
+            公众号客户端
+
+        ahead: int
+
+            提前刷新的时间(秒), 需大于 `WeChatClient.TOKEN_REFRESH_AHEAD`, 否则业务请求仍会同步刷新
+
+        jitter: int
+
+            随机抖动(秒), 多个进程错开刷新时间
+
+        retry_interval: int
+
+            刷新失败后的重试间隔(秒)
+        """
+        super(AccessTokenRefresher, self).__init__(name="wechat-token-refresher-{}".format(client.app_id))
+        self.daemon = True
+
+        self.client = client
+        self.ahead = ahead
+        self.jitter = jitter
+        self.retry_interval = retry_interval
+
+        self._stopped = threading.Event()
+
+    def _next_threshold(self):
+        # 每轮刷新前随机一次, 刷新时按同一阈值判断, 否则阈值大于 `ahead` 的部分会被当作仍在有效期内而跳过
+        return self.ahead + random.uniform(0, self.jitter)
+
+    def _next_wait(self, threshold):
+        access_token, expires_at = self.client._get_stored_token()
+        if not access_token:
+            return 0
+        if not expires_at:
+            # 用户提供的凭证不需要刷新
+            return None
+        return expires_at - threshold - time.time()
+
+    def run(self):
+        threshold = self._next_threshold()
+
+        while not self._stopped.is_set():
+            wait = self._next_wait(threshold)
+
+            if wait is None:
+                return
+
+            if wait > 0:
+                self._stopped.wait(wait)
+                continue
+
+            try:
+                access_token = self.client._refresh_access_token(ahead=threshold)
+            except Exception:
+                logger.exception("Refresh wx access token failed")
+                access_token = None
+
+            if not access_token:
+                self._stopped.wait(self.retry_interval)
+            elif (self._next_wait(threshold) or 0) <= 0:
+                # 其它进程正在刷新, 稍后再检查
+                self._stopped.wait(1)
+            else:
+                threshold = self._next_threshold()
+
+    def stop(self):
+        self._stopped.set()
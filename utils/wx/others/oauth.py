@@ -3,11 +3,17 @@
 # Date: 2018/6/29
 
 import json
+import time
 import logging
 import requests
+import threading
 
 from django.utils import six
 
+from utils.retry import RetryPolicy
+from utils.retry import send_with_retry
+from utils.wx.storage import LRUMemoryStorage
+
 logger = logging.getLogger(__name__)
 
 
@@ -20,10 +26,17 @@ class WeChatOAuth(object):
 
     _http = requests.session()
 
+    retry_policy = RetryPolicy()
+
     API_BASE_URL = "https://api.weixin.qq.com/"
     OAUTH_BASE_URL = "https://open.weixin.qq.com/connect/"
 
-    def __init__(self, app_id, secret, redirect_uri=""):
+    # refresh_token 有效期为 30 天
+    REFRESH_TOKEN_TTL = 30 * 24 * 3600
+    # access_token 提前过期的秒数
+    TOKEN_REFRESH_AHEAD = 60
+
+    def __init__(self, app_id, secret, redirect_uri="", session=None, storage=None):
         """初始化参数
 
         Parameters
@@ -38,6 +51,13 @@ class WeChatOAuth(object):
         redirect_uri: string
             OAuth2 redirect URI
 
+        session: requests.Session
+            可选, 独立的连接池会话, 默认使用类共享的会话
+
+        storage: BaseStorage
+            可选, 用户凭证存储(按 openid 保存), 默认为进程内 LRU 存储;
+            多进程部署时可使用 `DjangoCacheStorage` 共享
+
         Returns
         -------
         dict
@@ -48,11 +68,21 @@ class WeChatOAuth(object):
         self.secret = secret
         self.redirect_uri = redirect_uri
 
-        # 关键参数
-        self.access_token = None
-        self.openid = None
-        self.expires_in = None
-        self.refresh_token = None
+        if session is not None:
+            self._http = session
+
+        # 实例为进程内共享的单例, 用户凭证不能保存在实例属性上
+        self.storage = storage if storage is not None else LRUMemoryStorage()
+        # 当前线程最近一次授权的用户, 兼容不传 openid 的调用
+        self._current = threading.local()
+
+    @property
+    def openid(self):
+        return getattr(self._current, "openid", None)
+
+    @property
+    def access_token(self):
+        return getattr(self._current, "access_token", None)
 
     def _request(self, method, url_or_endpoint, **kwargs):
         if not url_or_endpoint.startswith(('http://', 'https://')):
@@ -68,11 +98,9 @@ class WeChatOAuth(object):
             body = body.encode('utf-8')
             kwargs['data'] = body
 
-        res = self._http.request(
-            method=method,
-            url=url,
-            **kwargs
-        )
+        retry_policy = kwargs.pop("retry_policy", None) or self.retry_policy
+
+        res = send_with_retry(self._http.request, method, url, retry_policy, **kwargs)
 
         res.raise_for_status()
 
@@ -169,10 +197,7 @@ class WeChatOAuth(object):
                 'grant_type': 'authorization_code'
             }
         )
-        self.access_token = res.get("access_token")
-        self.openid = res.get("openid")
-        self.refresh_token = res.get("refresh_token")
-        self.expires_in = res.get("expires_in")
+        self._save_access_token(res, refresh_expires_at=int(time.time()) + self.REFRESH_TOKEN_TTL)
         return res
 
     def refresh_access_token(self, refresh_token):
@@ -196,12 +221,85 @@ class WeChatOAuth(object):
                 'refresh_token': refresh_token
             }
         )
-        self.access_token = res['access_token']
-        self.openid = res['openid']
-        self.refresh_token = res['refresh_token']
-        self.expires_in = res['expires_in']
+        # 刷新不会延长 refresh_token 的有效期, 沿用授权时的过期时间
+        token = self.storage.get(self._token_key(res["openid"])) if res.get("openid") else None
+        self._save_access_token(res, refresh_expires_at=(token or {}).get("refresh_expires_at"))
         return res
 
+    def _token_key(self, openid):
+        return "wechat:{}:oauth:{}".format(self.app_id, openid)
+
+    def _save_access_token(self, res, refresh_expires_at=None):
+        if not res.get("access_token") or not res.get("openid"):
+            return
+
+        self._current.openid = res["openid"]
+        self._current.access_token = res["access_token"]
+
+        now = int(time.time())
+        if refresh_expires_at is None:
+            # 未记录授权时间的旧凭证
+            refresh_expires_at = now + self.REFRESH_TOKEN_TTL
+        if refresh_expires_at <= now:
+            return
+
+        self.storage.set(self._token_key(res["openid"]), {
+            "access_token": res["access_token"],
+            "refresh_token": res.get("refresh_token"),
+            "scope": res.get("scope"),
+            "expires_at": now + int(res.get("expires_in") or 7200),
+            "refresh_expires_at": refresh_expires_at,
+        }, ttl=refresh_expires_at - now)
+
+    def get_access_token(self, openid):
+        """获取用户的 access_token, 过期时使用 refresh_token 刷新
+
+        Parameters
+        ----------
+
+        openid: string
+            微信 openid
+
+        Returns
+        -------
+        string, 用户未授权或 refresh_token 失效时返回 None
+        """
+        token = self.storage.get(self._token_key(openid))
+        if not token:
+            return None
+
+        if token["expires_at"] - self.TOKEN_REFRESH_AHEAD > time.time():
+            return token["access_token"]
+
+        if not token.get("refresh_token"):
+            return None
+
+        res = self.refresh_access_token(token["refresh_token"])
+        if not res.get("access_token"):
+            # refresh_token 失效, 需要用户重新授权
+            self.storage.delete(self._token_key(openid))
+            return None
+        return res["access_token"]
+
+    def _get_user(self, openid, access_token):
+        """确定请求的用户及其凭证
+
+            未传 openid 时为当前线程最近一次授权的用户
+        """
+        if not openid:
+            openid = self.openid
+            access_token = access_token or self.access_token
+            if not openid:
+                raise ValueError("openid is required")
+
+        if access_token:
+            return openid, access_token
+
+        access_token = self.get_access_token(openid)
+        if not access_token:
+            raise ValueError("No oauth access_token for openid: {}".format(openid))
+        return openid, access_token
+
     def get_user_info(self, openid=None, access_token=None, lang="zh_CN"):
         """获取用户信息
 
@@ -209,10 +307,10 @@ class WeChatOAuth(object):
         ----------
 
         openid: string
-            可选，微信 openid，默认获取当前授权用户信息
+            可选，微信 openid，默认为当前线程最近一次授权的用户
 
         access_token: string
-            可选，access_token，默认使用当前授权用户的 access_token
+            可选，access_token，默认使用该用户已保存的 access_token
 
         lang: string
             可选，语言偏好, 默认为 `zh_CN`
@@ -222,8 +320,7 @@ class WeChatOAuth(object):
         -------
         dict
         """
-        openid = openid or self.openid
-        access_token = access_token or self.access_token
+        openid, access_token = self._get_user(openid, access_token)
         return self._get(
             'sns/userinfo',
             params={
@@ -240,18 +337,20 @@ class WeChatOAuth(object):
         ----------
 
         openid: string
-            可选, 微信 openid，默认获取当前授权用户信息
+            可选，微信 openid，默认为当前线程最近一次授权的用户
 
         access_token: string
-            可选, access_token，默认使用当前授权用户的 access_token
+            可选, access_token，默认使用该用户已保存的 access_token
                 网页授权接口调用凭证, 注意：此access_token与基础支持的access_token不同
 
         Returns
         -------
         bool
         """
-        openid = openid or self.openid
-        access_token = access_token or self.access_token
+        try:
+            openid, access_token = self._get_user(openid, access_token)
+        except ValueError:
+            return False
         res = self._get(
             'sns/auth',
             params={
@@ -4,3 +4,7 @@
 
 # 微信支付全局API
 from .basic import WeChatPay
+# 微信支付异步API
+from .aio import AsyncWeChatPay
+# 多商户客户端缓存
+from .registry import WeChatPayRegistry
@@ -0,0 +1,78 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+# Date: 2026/10/18
+
+"""
+    微信支付异步客户端
+
+        与 `WeChatPay` 共用签名及结果校验逻辑, 通过 aiohttp 发送请求,
+        接口类(`order`, `refund`, `red_pack` ...)中发起请求的方法均返回协程, 使用时需 `await`
+
+        > pay = AsyncWeChatPay(app_id, api_key_path, mch_id)
+        > await pay.order.query(out_trade_no="201810180001")
+"""
+
+import asyncio
+import inspect
+import logging
+
+import requests
+
+from utils.aio import AsyncHTTPClient
+from utils.retry import async_send_with_retry
+from utils.wx.pay.basic import WeChatPay
+from utils.wx.tools import xml_to_dict
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncWeChatPay(WeChatPay):
+
+    def __init__(self, *args, http=None, **kwargs):
+        """参数同 `WeChatPay`, http 为连接池配置, 同 `utils.http.build_session`
+
+        """
+        super(AsyncWeChatPay, self).__init__(*args, **kwargs)
+        self._aio_http = AsyncHTTPClient(**(http or {}))
+
+    async def request(self, method, url_or_endpoint, **kwargs):
+        response_processor = kwargs.pop("response_processor", None)
+        retry_policy = kwargs.pop("retry_policy", None) or self.retry_policy
+
+        attempt = 0
+        resigned = False
+        while True:
+            attempt += 1
+
+            if self.debug and isinstance(kwargs.get("data", ""), dict) and not self._has_sandbox_api_key():
+                # 沙箱密钥仅调试模式使用, 缓存失效时放入线程池获取
+                loop = asyncio.get_running_loop()
+                self.debug_api_key = await loop.run_in_executor(None, self._get_sandbox_api_key)
+
+            url, request_kwargs = self._prepare_request(url_or_endpoint, dict(kwargs))
+
+            res = await async_send_with_retry(self._aio_http.request, method, url, retry_policy, **request_kwargs)
+
+            try:
+                res.raise_for_status()
+            except requests.HTTPError:
+                res.close()
+                raise
+
+            if response_processor is not None:
+                result = response_processor(res)
+                # 流式响应的处理需异步读取
+                if inspect.isawaitable(result):
+                    result = await result
+                return result
+
+            data = xml_to_dict(res.content)
+            if not resigned and self._is_sandbox_sign_error(data):
+                resigned = True
+                continue
+
+            result = self._check_result(data)
+            if not self._should_retry(result, attempt):
+                return result
+
+            await asyncio.sleep(self.retry_policy.delay(attempt))
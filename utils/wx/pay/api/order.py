@@ -8,6 +8,7 @@
 
 import logging
 
+from utils.retry import IDEMPOTENT_RETRY_POLICY
 from utils.wx.pay.api.base import BaseWeChatPayAPI
 
 
@@ -138,7 +139,8 @@ class WeChatOrder(BaseWeChatPayAPI):
             "transaction_id": transaction_id,
             "out_trade_no": out_trade_no,
         }
-        return self._post('pay/orderquery', data=data)
+        # 查询接口幂等, 连接中断及超时也可重试
+        return self._post('pay/orderquery', data=data, retry_policy=IDEMPOTENT_RETRY_POLICY)
 
     def close(self, out_trade_no):
         """关闭订单
@@ -7,6 +7,7 @@
 
 
 from utils.wx.pay.api.base import BaseWeChatPayAPI
+from utils.wx.pay.redpack_batch import RedPackBatch
 
 
 class WeChatRedPack(BaseWeChatPayAPI):
@@ -216,3 +217,47 @@ class WeChatRedPack(BaseWeChatPayAPI):
             "appid": self.app_id,
         }
         return self._post("mmpaymkttransfers/gethbinfo", data=data)
+
+    def send_batch(self, payouts, journal_path, defaults=None, max_workers=4, per_minute=1800,
+                   reconcile=True):
+        """批量发放普通红包
+
+            > batch = pay.red_pack.send_batch(payouts, "/data/redpack/20181018.jsonl", defaults={
+            >     "wishing": "...", "client_ip": "...", "act_name": "...", "remark": "...", "send_name": "...",
+            > })
+            > batch.run()
+
+        Parameters
+        ----------
+        payouts: iterable
+
+            发放明细, 每项为 `send` 的参数(dict), 必须包含 mch_billno, re_openid, total_amount
+
+        journal_path: string
+
+            发放日志文件路径, 中断后使用同一文件重新运行即可继续
+
+        defaults: dict
+
+            所有红包共用的参数
+
+        max_workers: int
+
+            最大并发数
+
+        per_minute: int
+
+            每分钟最多发放个数
+
+        reconcile: bool
+
+            发放结束后是否查询核对
+
+        Returns
+        -------
+        RedPackBatch
+        """
+        return RedPackBatch(
+            self, payouts, journal_path, defaults=defaults, max_workers=max_workers,
+            per_minute=per_minute, reconcile=reconcile
+        )
@@ -9,6 +9,8 @@
 from datetime import datetime, date
 
 from utils.wx.pay.api.base import BaseWeChatPayAPI
+from utils.wx.pay.bill import BillReader
+from utils.wx.pay.reconcile import BillReconciler
 
 
 class WeChatTools(BaseWeChatPayAPI):
@@ -38,7 +40,7 @@ class WeChatTools(BaseWeChatPayAPI):
         }
         return self._post('tools/shorturl', data=data)
 
-    def download_bill(self, bill_date, bill_type='ALL', device_info=None):
+    def download_bill(self, bill_date, bill_type='ALL', device_info=None, tar_type=None, stream=True):
         """下载对账单
 
 
@@ -60,6 +62,19 @@ class WeChatTools(BaseWeChatPayAPI):
 
             微信支付分配的终端设备号，填写此字段，只下载该设备号的对账单
 
+        tar_type: string, default: None
+
+            压缩账单，传入 GZIP 时返回 gzip 压缩的账单
+
+        stream: bool, default: True
+
+            是否边下载边解析, 大账单不会整体读入内存
+
+        Returns
+        -------
+        BillReader
+
+            逐行迭代账单明细, 迭代完成后 `summary` 为汇总数据; 下载失败时迭代抛出 ValueError
         """
         if isinstance(bill_date, (datetime, date)):
             bill_date = bill_date.strftime('%Y%m%d')
@@ -70,4 +85,38 @@ class WeChatTools(BaseWeChatPayAPI):
             "bill_type": bill_type,
             "device_info": device_info,
         }
-        return self._post('pay/downloadbill', data=data)
+        if tar_type:
+            data["tar_type"] = tar_type
+        return self._post('pay/downloadbill', data=data, stream=stream,
+                          response_processor=BillReader.from_response)
+
+    def reconcile(self, bill_date, orders, status_map=None, device_info=None):
+        """按对账单核对本地订单
+
+        Parameters
+        ----------
+
+        bill_date: string
+
+            对账日期
+
+        orders: iterable
+
+            本地订单, (out_trade_no, total_fee, status) 的可迭代对象, total_fee 单位为分
+
+        status_map: dict
+
+            本地订单状态与微信交易状态的对应关系
+
+        device_info: string, default: None
+
+            终端设备号
+
+        Returns
+        -------
+        BillReconciler
+
+            迭代得到差异订单 `Mismatch`, 迭代完成后 `stats` 为统计数据
+        """
+        bill = self.download_bill(bill_date, bill_type="ALL", device_info=device_info, tar_type="GZIP")
+        return BillReconciler(bill, orders, status_map=status_map)
@@ -2,22 +2,33 @@
 # -*- coding: utf-8 -*-
 # Date: 2018/5/17
 
+import time
 import inspect
 import logging
+import threading
 
 from django.utils.crypto import get_random_string
 
 
+from utils.retry import RetryPolicy
+from utils.retry import send_with_retry
 from utils.wx import BaseWeChat
 from utils.wx.pay import api
 from utils.wx.pay.api.base import BaseWeChatPayAPI
 from utils.wx.tools import calculate_signature
 from utils.wx.tools import dict_to_xml
+from utils.wx.tools import dict_to_xml_bytes
+from utils.wx.tools import read_xml
 from utils.wx.tools import xml_to_dict
 
 logger = logging.getLogger(__name__)
 
 
+def load_api_key(api_key_path):
+    with open(api_key_path, ) as f:
+        return f.read().strip("\n")
+
+
 def _is_api_endpoint(instance):
     return issubclass(instance.__class__, BaseWeChatPayAPI)
 
@@ -26,6 +37,12 @@ class WeChatPay(BaseWeChat):
 
     API_BASE_URL = "https://api.mch.weixin.qq.com/"
 
+    # 沙箱密钥缓存时间(秒)
+    SANDBOX_KEY_TTL = 3600
+
+    # 系统错误(SYSTEMERROR)时使用相同参数重新请求
+    retry_policy = RetryPolicy(retryable_codes=("SYSTEMERROR", ))
+
     # 订单API
     order = api.WeChatOrder()
     # 工具API
@@ -47,7 +64,7 @@ class WeChatPay(BaseWeChat):
         return self
 
     def __init__(self, app_id, api_key_path, mch_id, session=None, sub_mch_id=None,
-                 mch_cert=None, mch_key=None, timeout=None, debug=False):
+                 mch_cert=None, mch_key=None, timeout=None, debug=False, api_key=None):
         super(WeChatPay, self).__init__(
             app_id, timeout, session, False
         )
@@ -58,11 +75,21 @@ class WeChatPay(BaseWeChat):
         self.mch_key = mch_key
         self.debug = debug
         self.debug_api_key = None
+        self._debug_api_key_expires_at = 0
+        self._debug_api_key_lock = threading.Lock()
 
-        with open(api_key_path, ) as f:
-            self.api_key = f.read().strip("\n")
+        # 已读取的密钥(如由 `WeChatPayRegistry` 统一缓存)可直接传入, 避免每次构建时读取文件
+        self.api_key = api_key if api_key is not None else load_api_key(api_key_path)
 
-    def request(self, method, url_or_endpoint, **kwargs):
+    def _prepare_request(self, url_or_endpoint, kwargs):
+        """构建请求地址并对请求数据签名(同步/异步客户端共用)
+
+            调试模式下需先获取沙箱密钥 `debug_api_key`
+
+        Returns
+        -------
+        (url, kwargs): tuple
+        """
         if not url_or_endpoint.startswith(('http://', 'https://')):
             api_base_url = kwargs.pop('api_base_url', self.API_BASE_URL)
             if self.debug:
@@ -86,29 +113,54 @@ class WeChatPay(BaseWeChat):
             if "nonce_str" not in data:
                 data.setdefault("nonce_str", get_random_string(32))
 
-            if self.debug:
-                self.debug_api_key = self._fetch_sanbox_api_key()
-
             data.pop("sign", None)
 
             sign = calculate_signature(data, self.debug_api_key if self.debug else self.api_key)
 
             data["sign"] = sign.upper() if self.debug else sign
 
-            body = dict_to_xml(data)
+            kwargs["data"] = dict_to_xml_bytes(data)
 
-            body = body.encode('utf-8')
-            kwargs["data"] = body
+        if self.mch_cert and self.mch_key:
+            # 红包、退款等接口需要商户证书
+            kwargs.setdefault("cert", (self.mch_cert, self.mch_key))
 
-        res = self._http.request(
-            method=method,
-            url=url,
-            **kwargs
-        )
+        return url, kwargs
+
+    def request(self, method, url_or_endpoint, **kwargs):
+        response_processor = kwargs.pop("response_processor", None)
+        retry_policy = kwargs.pop("retry_policy", None) or self.retry_policy
+
+        attempt = 0
+        resigned = False
+        while True:
+            attempt += 1
+
+            if self.debug and isinstance(kwargs.get("data", ""), dict):
+                self.debug_api_key = self._get_sandbox_api_key()
+
+            # 每次重试重新签名(请求数据不变), 沙箱密钥更新后使用新密钥
+            url, request_kwargs = self._prepare_request(url_or_endpoint, dict(kwargs))
+
+            res = send_with_retry(self._http.request, method, url, retry_policy, **request_kwargs)
 
-        res.raise_for_status()
+            res.raise_for_status()
 
-        return self._handle_result(res)
+            if response_processor is not None:
+                # 非 xml 响应(如对账单)由调用方自行解析
+                return response_processor(res)
+
+            data = xml_to_dict(res.content)
+            if not resigned and self._is_sandbox_sign_error(data):
+                # 沙箱密钥已失效, 使用新密钥重新签名后重试一次
+                resigned = True
+                continue
+
+            result = self._check_result(data)
+            if not self._should_retry(result, attempt):
+                return result
+
+            time.sleep(self.retry_policy.delay(attempt))
 
     def get(self, url, **kwargs):
         return self.request(
@@ -126,7 +178,39 @@ class WeChatPay(BaseWeChat):
 
     def _handle_result(self, res):
         data = xml_to_dict(res.content)
+        self._is_sandbox_sign_error(data)
+        return self._check_result(data)
+
+    def _is_sandbox_sign_error(self, data):
+        """沙箱签名错误时使沙箱密钥失效, 下次请求重新获取(同步/异步客户端共用)
+
+        Returns
+        -------
+        bool
+        """
+        if not self.debug or data.get("return_code") == "SUCCESS" or "签名" not in (data.get("return_msg") or ""):
+            return False
+
+        logger.warning("WxApi pay sandbox sign error, invalidate sandbox key: {}".format(data.get("return_msg")))
+        self.invalidate_sandbox_api_key()
+        return True
+
+    def _should_retry(self, result, attempt):
+        """业务结果是否需要重试(同步/异步客户端共用)
+
+            微信要求系统错误时使用相同参数重新调用, 按商户订单号(红包为商户单号)保证幂等
+        """
+        if not self.retry_policy.is_retryable_code(result.get("err_code")):
+            return False
+        if not self.retry_policy.can_retry(attempt):
+            return False
+        logger.warning("Retry wx pay request after {}: {}".format(result.get("err_code"), result.get("err_code_des")))
+        return True
 
+    def _check_result(self, data):
+        """校验结果(同步/异步客户端共用)
+
+        """
         return_code = data["return_code"]
 
         if return_code != "SUCCESS" and data.get("result_code") != "SUCCESS":
@@ -137,6 +221,25 @@ class WeChatPay(BaseWeChat):
 
         return data
 
+    def _has_sandbox_api_key(self):
+        return self.debug_api_key is not None and self._debug_api_key_expires_at > time.time()
+
+    def _get_sandbox_api_key(self):
+        """获取沙箱密钥, 缓存 `SANDBOX_KEY_TTL` 秒, 并发请求只获取一次
+
+        """
+        if self._has_sandbox_api_key():
+            return self.debug_api_key
+
+        with self._debug_api_key_lock:
+            if not self._has_sandbox_api_key():
+                self.debug_api_key = self._fetch_sanbox_api_key()
+                self._debug_api_key_expires_at = time.time() + self.SANDBOX_KEY_TTL if self.debug_api_key else 0
+            return self.debug_api_key
+
+    def invalidate_sandbox_api_key(self):
+        self._debug_api_key_expires_at = 0
+
     def _fetch_sanbox_api_key(self):
         nonce_str = get_random_string(32)
         sign = calculate_signature({'mch_id': self.mch_id, 'nonce_str': nonce_str}, self.api_key)
@@ -147,14 +250,16 @@ class WeChatPay(BaseWeChat):
         })
         headers = {'Content-Type': 'text/xml'}
         api_url = '{base}sandboxnew/pay/getsignkey'.format(base=self.API_BASE_URL)
-        response = self._http.post(api_url, data=payload, headers=headers)
-        return xml_to_dict(response.text).get("sandbox_signkey")
+        response = send_with_retry(self._http.request, "post", api_url, self.retry_policy,
+                                   data=payload, headers=headers)
+        return xml_to_dict(response.content).get("sandbox_signkey")
 
     def parse_payment_result(self, xml):
         """解析微信支付结果通知
 
+            xml 可以是请求体(bytes / string), 也可以是可读取的文件对象(如 Django 的 `request`), 后者增量解析
         """
-        data = xml_to_dict(xml)
+        data = read_xml(xml) if hasattr(xml, "read") else xml_to_dict(xml)
 
         sign = data.pop('sign', None)
 
@@ -0,0 +1,264 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+# Date: 2026/10/18
+
+"""
+    微信支付对账单解析
+
+        对账单为文本格式:
+
+            第一行为表头, 随后每行为一笔交易(每个字段以 ` 开头),
+            倒数第二行为汇总表头, 最后一行为汇总数据
+
+        下载失败时返回 `xml` 格式的错误信息; `tar_type=GZIP` 时成功的账单为 gzip 压缩数据
+
+        解析按数据块增量进行, 不会将整个账单读入内存
+"""
+
+import io
+import csv
+import zlib
+import tempfile
+import functools
+from decimal import Decimal
+
+from utils.aio import AsyncResponse
+from utils.wx.tools import xml_to_dict
+
+# 对账单字段名
+BILL_FIELDS = {
+    "交易时间": "trade_time",
+    "公众账号ID": "appid",
+    "商户号": "mch_id",
+    "特约商户号": "sub_mch_id",
+    "子商户号": "sub_mch_id",
+    "设备号": "device_info",
+    "微信订单号": "transaction_id",
+    "商户订单号": "out_trade_no",
+    "用户标识": "openid",
+    "交易类型": "trade_type",
+    "交易状态": "trade_state",
+    "付款银行": "bank_type",
+    "货币种类": "fee_type",
+    "应结订单金额": "settlement_total_fee",
+    "总金额": "total_fee",
+    "代金券金额": "coupon_fee",
+    "代金券或立减优惠金额": "coupon_fee",
+    "企业红包金额": "coupon_fee",
+    "微信退款单号": "refund_id",
+    "商户退款单号": "out_refund_no",
+    "退款金额": "refund_fee",
+    "充值券退款金额": "coupon_refund_fee",
+    "代金券或立减优惠退款金额": "coupon_refund_fee",
+    "企业红包退款金额": "coupon_refund_fee",
+    "退款类型": "refund_channel",
+    "退款状态": "refund_status",
+    "商品名称": "body",
+    "商户数据包": "attach",
+    "手续费": "poundage",
+    "费率": "rate",
+    "订单金额": "total_fee",
+    "申请退款金额": "apply_refund_fee",
+    "费率备注": "rate_remark",
+}
+
+# 汇总字段名
+BILL_SUMMARY_FIELDS = {
+    "总交易单数": "total_count",
+    "应结订单总金额": "settlement_total_fee",
+    "总交易额": "total_fee",
+    "退款总金额": "refund_fee",
+    "总退款金额": "refund_fee",
+    "充值券退款总金额": "coupon_refund_fee",
+    "企业红包退款总金额": "coupon_refund_fee",
+    "总代金券或立减优惠退款金额": "coupon_refund_fee",
+    "手续费总金额": "poundage",
+    "订单总金额": "total_fee",
+    "申请退款总金额": "apply_refund_fee",
+}
+
+# 金额字段(单位: 元)
+AMOUNT_FIELDS = frozenset([
+    "settlement_total_fee",
+    "total_fee",
+    "coupon_fee",
+    "refund_fee",
+    "coupon_refund_fee",
+    "poundage",
+    "apply_refund_fee",
+])
+
+GZIP_MAGIC = b"\x1f\x8b"
+
+# 异步下载的账单在内存中缓存的最大字节数, 超过后写入临时文件
+SPOOL_SIZE = 8 * 1024 * 1024
+
+
+def _strip_fields(fields):
+    # 字段以 ` 开头, 防止 excel 将长数字转换为科学计数法
+    return [field[1:] if field.startswith("`") else field for field in fields]
+
+
+def _to_amount(value):
+    return Decimal(value) if value else Decimal("0")
+
+
+class BillReader(object):
+
+    """
+    对账单读取
+
+        > bill = pay.tools.download_bill("20181018")
+        > for row in bill:
+        >     row["out_trade_no"], row["total_fee"]
+        > bill.summary
+
+        迭代完成后 `summary` 为汇总数据(金额为 `Decimal`, 单位元)
+    """
+
+    def __init__(self, chunks, close=None):
+        """初始化参数
+
+        Parameters
+        ----------
+        chunks: iterable
+
+            账单内容的 bytes 数据块
+
+        close: func
+
+            读取结束后的回调, 如关闭响应连接
+        """
+        self._chunks = chunks
+        self._close = close
+
+        self.header = None
+        self.summary = None
+
+    @classmethod
+    def from_response(cls, response, chunk_size=64 * 1024):
+        if isinstance(response, AsyncResponse):
+            return cls._from_async_response(response, chunk_size)
+        return cls(response.iter_content(chunk_size), close=response.close)
+
+    @classmethod
+    async def _from_async_response(cls, response, chunk_size):
+        """异步客户端: 逐块下载到临时文件(超过 SPOOL_SIZE 时写入磁盘), 解析时从临时文件读取
+
+        """
+        fp = tempfile.SpooledTemporaryFile(max_size=SPOOL_SIZE)
+        try:
+            async for chunk in response.iter_content(chunk_size):
+                fp.write(chunk)
+        except BaseException:
+            fp.close()
+            raise
+        finally:
+            response.close()
+
+        fp.seek(0)
+        return cls(iter(functools.partial(fp.read, chunk_size), b""), close=fp.close)
+
+    def _iter_raw(self):
+        chunks = iter(self._chunks)
+
+        first = b""
+        for first in chunks:
+            if first:
+                break
+
+        if first.lstrip().startswith(b"<xml"):
+            # 下载失败, 返回的是错误信息
+            data = xml_to_dict(first + b"".join(chunks))
+            raise ValueError("{}: {}".format(data.get("return_code"), data.get("return_msg")))
+
+        if not first.startswith(GZIP_MAGIC):
+            yield first
+            yield from chunks
+            return
+
+        decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        yield decompressor.decompress(first)
+        for chunk in chunks:
+            yield decompressor.decompress(chunk)
+        yield decompressor.flush()
+
+    def _open(self):
+        """以文本流读取账单
+
+            换行交由 csv 处理(newline=""), 带引号字段中的换行不会被拆分
+        """
+        raw = io.BufferedReader(_ChunkReader(self._iter_raw()))
+        return io.TextIOWrapper(raw, encoding="utf-8-sig", errors="replace", newline="")
+
+    def _parse_row(self, fields):
+        row = dict(zip(self.header, fields))
+        for key in AMOUNT_FIELDS.intersection(row):
+            row[key] = _to_amount(row[key])
+        return row
+
+    def _parse_summary(self, header, fields):
+        summary = {}
+        for name, value in zip(header, fields):
+            key = BILL_SUMMARY_FIELDS.get(name, name)
+            if key == "total_count":
+                summary[key] = int(value or 0)
+            elif key in AMOUNT_FIELDS:
+                summary[key] = _to_amount(value)
+            else:
+                summary[key] = value
+        return summary
+
+    def __iter__(self):
+        try:
+            summary_header = None
+
+            # 商品名称、商户数据包等字段可能包含逗号(带引号), 按 csv 解析
+            for fields in csv.reader(self._open()):
+
+                if not fields:
+                    continue
+
+                if self.header is None:
+                    self.header = [BILL_FIELDS.get(name, name) for name in fields]
+                    continue
+
+                if summary_header is not None:
+                    self.summary = self._parse_summary(summary_header, _strip_fields(fields))
+                    break
+
+                if not fields[0].startswith("`"):
+                    # 交易明细结束, 接下来是汇总数据
+                    summary_header = fields
+                    continue
+
+                yield self._parse_row(_strip_fields(fields))
+        finally:
+            if self._close is not None:
+                self._close()
+
+
+class _ChunkReader(io.RawIOBase):
+
+    """
+    将 bytes 数据块迭代器包装为只读流
+    """
+
+    def __init__(self, chunks):
+        self._chunks = chunks
+        self._buffer = b""
+
+    def readable(self):
+        return True
+
+    def readinto(self, b):
+        while not self._buffer:
+            self._buffer = next(self._chunks, None)
+            if self._buffer is None:
+                self._buffer = b""
+                return 0
+
+        size = min(len(b), len(self._buffer))
+        b[:size] = self._buffer[:size]
+        self._buffer = self._buffer[size:]
+        return size
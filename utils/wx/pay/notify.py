@@ -0,0 +1,235 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+# Date: 2026/10/18
+
+"""
+    支付结果通知接收
+
+        微信在未收到 SUCCESS 应答时会多次重发通知, 接收时验签和去重, 默认在请求线程中调用业务处理函数,
+        处理成功后才应答 SUCCESS, 处理失败时应答 FAIL 由微信重发:
+
+        > ingestor = PaymentNotifyIngestor(wx_api.pay, handler=handle_payment)
+        >
+        > def notify_view(request):
+        >     return HttpResponse(ingestor.ingest(request), content_type="text/xml")
+
+        background=True 时通过验签的通知放入进程内队列, 由后台线程处理, 视图立即应答(需先 `start`);
+        已应答的通知只保存在内存中, 进程退出时队列中未处理的通知会丢失, 需由订单轮询/对账补偿
+
+        去重按 transaction_id 进行, 多进程部署时 dedup 需使用可共享的存储(DjangoCacheStorage / RedisStorage),
+        FileStorage 的锁在释放后即失效, 不能用于去重
+"""
+
+import time
+import queue
+import logging
+import threading
+
+from utils.wx.storage import LRUMemoryStorage
+from utils.wx.tools import dict_to_xml_bytes
+
+logger = logging.getLogger(__name__)
+
+
+SUCCESS_RESPONSE = dict_to_xml_bytes({"return_code": "SUCCESS", "return_msg": "OK"})
+
+
+def fail_response(message):
+    return dict_to_xml_bytes({"return_code": "FAIL", "return_msg": message})
+
+
+class PaymentNotifyIngestor(object):
+
+    def __init__(self, pay, handler, dedup=None, dedup_ttl=86400, background=False, max_workers=4,
+                 queue_size=10000, max_retries=3, retry_interval=1):
+        """初始化参数
+
+        Parameters
+        ----------
+        pay: WeChatPay
+
+            支付客户端, 用于验签
+
+        handler: func
+
+            业务处理函数 handler(data), data 为 `parse_payment_result` 的结果
+
+        dedup: BaseStorage
+
+            去重存储, 默认为容量 100000 的进程内 LRU 存储
+
+        dedup_ttl: int
+
+            去重记录保留时间(秒)
+
+        background: bool
+
+            是否放入队列由后台线程处理(先应答后处理), 默认在请求线程中处理后应答
+
+        max_workers: int
+
+            处理线程数(后台处理)
+
+        queue_size: int
+
+            队列容量, 队列满时应答 FAIL 由微信稍后重发
+
+        max_retries: int
+
+            后台处理失败时的重试次数
+
+        retry_interval: float
+
+            后台处理的重试间隔(秒)
+        """
+        self.pay = pay
+        self.handler = handler
+        self.dedup = dedup if dedup is not None else LRUMemoryStorage(maxsize=100000)
+        self.dedup_ttl = dedup_ttl
+        self.background = background
+        self.max_workers = max_workers
+        self.max_retries = max_retries
+        self.retry_interval = retry_interval
+
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._threads = []
+        self._stats_lock = threading.Lock()
+        self.stats = {
+            "accepted": 0,
+            "duplicated": 0,
+            # 支付失败的通知(没有微信订单号), 应答成功后不处理
+            "ignored": 0,
+            "rejected": 0,
+            "processed": 0,
+            "failed": 0,
+        }
+
+    def _incr(self, name):
+        with self._stats_lock:
+            self.stats[name] += 1
+
+    def _dedup_key(self, transaction_id):
+        return "wechat:{}:pay_notify:{}".format(self.pay.mch_id, transaction_id)
+
+    def ingest(self, body):
+        """接收通知
+
+        Parameters
+        ----------
+        body: bytes OR string OR file-like
+
+            通知请求体, 可直接传入 Django 的 `request`
+
+        Returns
+        -------
+        应答微信的 xml: bytes
+        """
+        data = self.pay.parse_payment_result(body)
+
+        if data.get("return_code") == "FAIL":
+            # 通信失败的通知没有签名
+            self._incr("ignored")
+            logger.warning("Wx pay notify failed: {}".format(data.get("return_msg")))
+            return SUCCESS_RESPONSE
+
+        if data.get("state") is False:
+            self._incr("rejected")
+            logger.error("Invalid wx pay notify sign: {}".format(data))
+            return fail_response("签名失败")
+
+        if data.get("result_code") == "FAIL":
+            self._incr("ignored")
+            logger.warning("Wx pay notify {} failed: {} {}".format(
+                data.get("out_trade_no"), data.get("err_code"), data.get("err_code_des")
+            ))
+            return SUCCESS_RESPONSE
+
+        if not data.get("transaction_id"):
+            self._incr("rejected")
+            logger.error("Invalid wx pay notify without transaction_id: {}".format(data))
+            return fail_response("参数格式校验错误")
+
+        key = self._dedup_key(data["transaction_id"])
+        if not self.dedup.acquire_lock(key, self.dedup_ttl):
+            self._incr("duplicated")
+            if not self.background and not self.dedup.get("{}:done".format(key)):
+                # 同一通知正在另一请求中处理, 处理可能失败, 不能应答成功
+                return fail_response("处理中")
+            # 已接收过的重发通知直接应答成功
+            return SUCCESS_RESPONSE
+
+        if not self.background:
+            return self._handle_now(key, data)
+
+        try:
+            self._queue.put_nowait(data)
+        except queue.Full:
+            self.dedup.release_lock(key)
+            self._incr("rejected")
+            logger.error("Wx pay notify queue is full, reject {}".format(data["transaction_id"]))
+            return fail_response("系统繁忙")
+
+        self._incr("accepted")
+        return SUCCESS_RESPONSE
+
+    def _handle_now(self, key, data):
+        try:
+            self.handler(data)
+        except Exception as exc:
+            # 释放去重记录, 由微信重发
+            self.dedup.release_lock(key)
+            self._incr("failed")
+            logger.exception("Handle wx pay notify {} failed: {}".format(data["transaction_id"], exc))
+            return fail_response("处理失败")
+
+        self.dedup.set("{}:done".format(key), True, self.dedup_ttl)
+        self._incr("accepted")
+        self._incr("processed")
+        return SUCCESS_RESPONSE
+
+    def _handle(self, data):
+        for attempt in range(self.max_retries + 1):
+            try:
+                self.handler(data)
+            except Exception as exc:
+                logger.exception("Handle wx pay notify {} failed ({}): {}".format(
+                    data.get("transaction_id"), attempt + 1, exc
+                ))
+                time.sleep(self.retry_interval * (attempt + 1))
+            else:
+                self._incr("processed")
+                return
+
+        # 已应答成功, 微信不会再重发, 需通过订单查询/对账补偿
+        self._incr("failed")
+
+    def _run(self):
+        while True:
+            data = self._queue.get()
+            try:
+                if data is None:
+                    return
+                self._handle(data)
+            finally:
+                self._queue.task_done()
+
+    def start(self):
+        for index in range(self.max_workers):
+            thread = threading.Thread(target=self._run, name="wx-pay-notify-{}".format(index), daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self, wait=True):
+        """处理完队列中的通知后停止
+
+        """
+        for _ in self._threads:
+            self._queue.put(None)
+        if wait:
+            for thread in self._threads:
+                thread.join()
+        self._threads = []
+
+    @property
+    def queue_size(self):
+        return self._queue.qsize()
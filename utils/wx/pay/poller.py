@@ -0,0 +1,381 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+# Date: 2026/10/18
+
+"""
+    订单状态轮询
+
+        支付结果通知可能丢失, 对未支付的订单按指数退避定时查询, 到达订单失效时间后自动关闭订单;
+        所有订单共用一个调度线程(小顶堆按下次查询时间排序)及一个查询线程池
+
+        > poller = OrderPoller(wx_api.pay, on_result=handle_order)
+        > poller.start()
+        > poller.add("201810180001", time_expire="20181018130000")
+        > poller.metrics
+"""
+
+import time
+import heapq
+import logging
+import threading
+
+from datetime import datetime, timedelta, timezone
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+
+# 微信支付时间均为北京时间
+BEIJING_TZ = timezone(timedelta(hours=8))
+
+# 订单终态, 查询到后不再轮询
+FINAL_STATES = frozenset(["SUCCESS", "REFUND", "CLOSED", "REVOKED", "PAYERROR"])
+
+# 订单不存在(如统一下单失败), 失效后回调并不再轮询
+ORDER_NOT_EXIST = "ORDERNOTEXIST"
+# 失效后仍无法确认状态(查询/关单持续失败), 回调并不再轮询
+FAILED = "FAILED"
+
+
+def to_timestamp(value):
+    """将订单失效时间转换为时间戳
+
+    Parameters
+    ----------
+    value: datetime OR string OR float
+
+        datetime(不带时区时视为北京时间), yyyyMMddHHmmss 格式的北京时间, 或时间戳
+    """
+    if isinstance(value, (int, float)):
+        return float(value)
+
+    if not isinstance(value, datetime):
+        value = datetime.strptime(value, "%Y%m%d%H%M%S")
+
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=BEIJING_TZ)
+
+    return value.timestamp()
+
+
+class _PendingOrder(object):
+
+    __slots__ = ("out_trade_no", "expire_at", "delay", "due_at", "attempts")
+
+    def __init__(self, out_trade_no, expire_at, delay, due_at):
+        self.out_trade_no = out_trade_no
+        self.expire_at = expire_at
+        self.delay = delay
+        self.due_at = due_at
+        self.attempts = 0
+
+
+class OrderPoller(object):
+
+    def __init__(self, pay, on_result=None, max_workers=8, initial_delay=5, max_delay=300,
+                 backoff=2, expire_after=7200, close_expired=True):
+        """初始化参数
+
+        Parameters
+        ----------
+        pay: WeChatPay
+
+            支付客户端
+
+        on_result: func
+
+            订单结束时的回调 on_result(out_trade_no, trade_state, result), 在查询线程中执行;
+            trade_state 为微信交易状态, 超时关闭的订单为 CLOSED, 失效时仍查询不到的订单为 ORDERNOTEXIST;
+            查询或关单失败的订单继续轮询, 失效 max_delay 秒后仍失败的为 FAILED
+
+        max_workers: int
+
+            查询线程数
+
+        initial_delay: float
+
+            首次查询的延迟(秒)
+
+        max_delay: float
+
+            最大查询间隔(秒)
+
+        backoff: float
+
+            每次查询后间隔的倍数
+
+        expire_after: float
+
+            未指定失效时间时, 加入后多久视为失效(秒), 默认与 prepay_id 有效期一致
+
+        close_expired: bool
+
+            失效后是否调用关单接口
+        """
+        self.pay = pay
+        self.on_result = on_result
+        self.max_workers = max_workers
+        self.initial_delay = initial_delay
+        self.max_delay = max_delay
+        self.backoff = backoff
+        self.expire_after = expire_after
+        self.close_expired = close_expired
+
+        self._orders = {}
+        self._heap = []
+        self._in_flight = 0
+        self._condition = threading.Condition()
+        self._executor = None
+        self._thread = None
+        self._stopped = False
+
+        self._stats = {
+            "queries": 0,
+            "closed": 0,
+            "finished": 0,
+            "errors": 0,
+            # 到期至开始查询的延迟, 反映调度积压
+            "lag_total": 0.0,
+            "lag_max": 0.0,
+            "latency_total": 0.0,
+        }
+
+    def add(self, out_trade_no, time_expire=None, delay=None):
+        """加入轮询
+
+        Parameters
+        ----------
+        out_trade_no: string
+
+            商户订单号
+
+        time_expire: datetime OR string OR float
+
+            订单失效时间, 同下单时的 time_expire
+
+        delay: float
+
+            首次查询的延迟(秒), 默认为 initial_delay
+        """
+        now = time.time()
+        expire_at = to_timestamp(time_expire) if time_expire else now + self.expire_after
+        delay = self.initial_delay if delay is None else delay
+        order = _PendingOrder(out_trade_no, expire_at, delay, min(now + delay, expire_at))
+
+        with self._condition:
+            self._orders[out_trade_no] = order
+            heapq.heappush(self._heap, (order.due_at, out_trade_no))
+            self._condition.notify()
+
+    def remove(self, out_trade_no):
+        """移除轮询(如已收到支付结果通知)
+
+        """
+        with self._condition:
+            self._orders.pop(out_trade_no, None)
+
+    def start(self):
+        self._stopped = False
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers)
+        self._thread = threading.Thread(target=self._run, name="wx-order-poller", daemon=True)
+        self._thread.start()
+
+    def stop(self, wait=True):
+        """停止轮询, 正在进行的查询完成后结束, wait 为 False 时在后台结束
+
+        """
+        with self._condition:
+            self._stopped = True
+            self._condition.notify_all()
+        if self._thread is not None and wait:
+            self._thread.join()
+
+    def _pop_due(self, now):
+        orders = []
+        # 在途查询不超过线程数的两倍, 其余留在堆中, 避免线程池队列无限增长
+        while self._heap and self._heap[0][0] <= now and self._in_flight < self.max_workers * 2:
+            due_at, out_trade_no = heapq.heappop(self._heap)
+            order = self._orders.get(out_trade_no)
+            # 已移除或已重新调度的过期条目
+            if order is None or order.due_at != due_at:
+                continue
+            self._in_flight += 1
+            orders.append(order)
+        return orders
+
+    def _run(self):
+        try:
+            self._loop()
+        finally:
+            # 线程池由调度线程关闭, 保证停止前取出的订单均已提交
+            self._executor.shutdown(wait=True)
+
+    def _loop(self):
+        while True:
+            with self._condition:
+                if self._stopped:
+                    return
+
+                now = time.time()
+                orders = self._pop_due(now)
+
+                if not orders:
+                    timeout = self._heap[0][0] - now if self._heap else None
+                    if self._in_flight >= self.max_workers * 2:
+                        timeout = None
+                    self._condition.wait(timeout)
+                    continue
+
+            for order in orders:
+                self._executor.submit(self._check, order)
+
+    def _reschedule(self, order, now):
+        order.delay = min(order.delay * self.backoff, self.max_delay)
+        if now < order.expire_at:
+            # 失效时刻再查询一次后关单
+            order.due_at = min(now + order.delay, order.expire_at)
+        else:
+            order.due_at = now + order.delay
+        heapq.heappush(self._heap, (order.due_at, order.out_trade_no))
+
+    def _finish(self, order, trade_state, result):
+        with self._condition:
+            # 查询期间被移除(如已收到通知)的订单不再回调
+            active = self._orders.get(order.out_trade_no) is order
+            if active:
+                self._orders.pop(order.out_trade_no)
+                self._stats["finished"] += 1
+
+        if active and self.on_result is not None:
+            try:
+                self.on_result(order.out_trade_no, trade_state, result)
+            except Exception as exc:
+                logger.exception("Handle wx order {} result failed: {}".format(order.out_trade_no, exc))
+
+    def _query(self, order):
+        started_at = time.time()
+        try:
+            return self.pay.order.query(out_trade_no=order.out_trade_no)
+        except Exception as exc:
+            logger.error("Query wx order {} failed: {}".format(order.out_trade_no, exc))
+            with self._condition:
+                self._stats["errors"] += 1
+            return {}
+        finally:
+            with self._condition:
+                self._stats["queries"] += 1
+                self._stats["latency_total"] += time.time() - started_at
+
+    def _close(self, order):
+        try:
+            result = self.pay.order.close(order.out_trade_no)
+        except Exception as exc:
+            logger.error("Close wx order {} failed: {}".format(order.out_trade_no, exc))
+            with self._condition:
+                self._stats["errors"] += 1
+            return {}
+
+        if result.get("result_code") == "SUCCESS":
+            with self._condition:
+                self._stats["closed"] += 1
+        else:
+            logger.warning("Close wx order {} failed: {} {}".format(
+                order.out_trade_no, result.get("err_code"), result.get("err_code_des")
+            ))
+        return result
+
+    def _expire(self, order, result, now):
+        """处理已失效的订单
+
+        Returns
+        -------
+        bool
+            订单是否已结束
+        """
+        trade_state = result.get("trade_state")
+
+        if not trade_state and result.get("err_code") == ORDER_NOT_EXIST:
+            self._finish(order, ORDER_NOT_EXIST, result)
+            return True
+
+        if self.close_expired and result:
+            # 查询接口有返回(包括没有交易状态的业务错误)时关单, 关单接口会拒绝已支付的订单
+            closed = self._close(order)
+            err_code = closed.get("err_code")
+            if closed.get("result_code") == "SUCCESS" or err_code == "ORDERCLOSED":
+                self._finish(order, "CLOSED", closed)
+                return True
+
+            if err_code == ORDER_NOT_EXIST:
+                self._finish(order, ORDER_NOT_EXIST, closed)
+                return True
+
+            if err_code == "ORDERPAID":
+                # 查询后完成支付(或通知丢失)的订单, 以重新查询的结果为准
+                result = self._query(order)
+                if result.get("trade_state") in FINAL_STATES:
+                    self._finish(order, result["trade_state"], result)
+                    return True
+        elif trade_state:
+            self._finish(order, "CLOSED", result)
+            return True
+
+        if now >= order.expire_at + self.max_delay:
+            logger.error("Wx order {} expired and its state is unknown, give up".format(order.out_trade_no))
+            self._finish(order, FAILED, result)
+            return True
+
+        # 查询或关单失败, 稍后重试
+        return False
+
+    def _check(self, order):
+        started_at = time.time()
+        with self._condition:
+            lag = max(started_at - order.due_at, 0)
+            self._stats["lag_total"] += lag
+            self._stats["lag_max"] = max(self._stats["lag_max"], lag)
+
+        try:
+            order.attempts += 1
+            result = self._query(order)
+            trade_state = result.get("trade_state")
+
+            if trade_state in FINAL_STATES:
+                self._finish(order, trade_state, result)
+                return
+
+            now = time.time()
+            if now >= order.expire_at and self._expire(order, result, now):
+                return
+
+            with self._condition:
+                if self._orders.get(order.out_trade_no) is order:
+                    self._reschedule(order, now)
+        finally:
+            with self._condition:
+                self._in_flight -= 1
+                self._condition.notify()
+
+    @property
+    def metrics(self):
+        """轮询指标
+
+            pending: 等待查询的订单数, in_flight: 正在查询的订单数, overdue: 已到期未开始查询的订单数,
+            lag_avg / lag_max: 到期至开始查询的平均/最大延迟(秒), latency_avg: 查询接口平均耗时(秒)
+        """
+        with self._condition:
+            now = time.time()
+            stats = dict(self._stats)
+            queries = stats["queries"] or 1
+            return {
+                "pending": len(self._orders),
+                "in_flight": self._in_flight,
+                "overdue": sum(1 for order in self._orders.values() if order.due_at <= now),
+                "queries": stats["queries"],
+                "closed": stats["closed"],
+                "finished": stats["finished"],
+                "errors": stats["errors"],
+                "lag_avg": stats["lag_total"] / queries,
+                "lag_max": stats["lag_max"],
+                "latency_avg": stats["latency_total"] / queries,
+            }
@@ -0,0 +1,223 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+# Date: 2026/10/18
+
+"""
+    微信支付对账
+
+        流式读取当日对账单, 写入临时 sqlite 索引(支付按商户订单号, 退款按商户退款单号分别索引),
+        再分批比对本地订单, 本地订单同样以可迭代对象传入, 账单及订单均不需要整体读入内存
+
+        > reconciler = pay.tools.reconcile("20181018", Order.objects.filter(...).values_list(
+        >     "out_trade_no", "total_fee", "status").iterator())
+        > for mismatch in reconciler:
+        >     ...
+        > reconciler.stats
+"""
+
+import os
+import time
+import sqlite3
+import logging
+import tempfile
+
+from collections import namedtuple
+from itertools import islice
+
+logger = logging.getLogger(__name__)
+
+
+# 差异类型
+MISSING_IN_BILL = "missing_in_bill"
+MISSING_LOCAL = "missing_local"
+AMOUNT_MISMATCH = "amount"
+STATUS_MISMATCH = "status"
+
+# 不会出现在对账单中的本地订单状态
+UNBILLED_STATES = frozenset(["NOTPAY", "CLOSED", "PAYERROR", "USERPAYING"])
+
+# 对账差异, bill 为账单中的 (total_fee, trade_state, transaction_id, refund_fee), local 为本地订单;
+# refund_fee 为账单中该订单退款的合计
+Mismatch = namedtuple("Mismatch", ["out_trade_no", "kind", "bill", "local"])
+
+# 每批比对的本地订单数
+BATCH_SIZE = 500
+
+# 账单中的退款记录, 交易状态为 REFUND, 以商户退款单号区分同一订单的多次退款
+REFUND_STATE = "REFUND"
+
+_SCHEMA = (
+    "CREATE TABLE payments (out_trade_no TEXT PRIMARY KEY, total_fee INTEGER, trade_state TEXT, "
+    "transaction_id TEXT)",
+    "CREATE TABLE refunds (out_refund_no TEXT PRIMARY KEY, out_trade_no TEXT, refund_fee INTEGER)",
+    "CREATE INDEX refunds_out_trade_no ON refunds (out_trade_no)",
+)
+
+_SELECT_PAYMENTS = (
+    "SELECT out_trade_no, total_fee, trade_state, transaction_id, "
+    "(SELECT COALESCE(SUM(refund_fee), 0) FROM refunds WHERE refunds.out_trade_no = payments.out_trade_no) "
+    "FROM payments"
+)
+
+
+def _to_fen(amount):
+    return int(amount * 100)
+
+
+class BillReconciler(object):
+
+    def __init__(self, bill, orders, status_map=None):
+        """初始化参数
+
+        Parameters
+        ----------
+        bill: BillReader
+
+            对账单(建议 bill_type=ALL)
+
+        orders: iterable
+
+            本地订单, (out_trade_no, total_fee, status) 的可迭代对象, total_fee 单位为分
+
+        status_map: dict
+
+            本地订单状态与微信交易状态(SUCCESS, REFUND, NOTPAY ...)的对应关系, 不传则直接比较
+        """
+        self.bill = bill
+        self.orders = orders
+        self.status_map = status_map or {}
+
+        self._db = None
+
+        self.stats = {
+            "bill": 0,
+            "local": 0,
+            "matched": 0,
+            "mismatched": 0,
+            "elapsed": 0,
+        }
+
+    def _open_index(self):
+        fd, path = tempfile.mkstemp(prefix="wx_reconcile_", suffix=".sqlite3")
+        os.close(fd)
+
+        db = sqlite3.connect(path)
+        # 临时索引, 不需要事务日志及落盘同步
+        db.execute("PRAGMA journal_mode = OFF")
+        db.execute("PRAGMA synchronous = OFF")
+        for statement in _SCHEMA:
+            db.execute(statement)
+        return db, path
+
+    def _build_index(self):
+        payments = []
+        refunds = []
+
+        for row in self.bill:
+            self.stats["bill"] += 1
+
+            if row["trade_state"] == REFUND_STATE:
+                # 退款记录单独索引, 不参与支付比对
+                refunds.append((row.get("out_refund_no"), row["out_trade_no"], _to_fen(row.get("refund_fee") or 0)))
+            else:
+                payments.append((
+                    row["out_trade_no"], _to_fen(row.get("total_fee") or 0), row["trade_state"],
+                    row.get("transaction_id"),
+                ))
+
+            if len(payments) + len(refunds) >= BATCH_SIZE:
+                self._insert(payments, refunds)
+
+        self._insert(payments, refunds)
+
+    def _insert(self, payments, refunds):
+        self._db.executemany("INSERT OR REPLACE INTO payments VALUES (?, ?, ?, ?)", payments)
+        self._db.executemany("INSERT OR REPLACE INTO refunds VALUES (?, ?, ?)", refunds)
+        del payments[:]
+        del refunds[:]
+
+    def _lookup(self, out_trade_nos):
+        """查询并移除一批订单的账单记录
+
+        """
+        placeholders = ",".join("?" * len(out_trade_nos))
+        entries = dict(
+            (row[0], tuple(row[1:])) for row in self._db.execute(
+                "{} WHERE out_trade_no IN ({})".format(_SELECT_PAYMENTS, placeholders), out_trade_nos
+            )
+        )
+        refunded = set(
+            row[0] for row in self._db.execute(
+                "SELECT DISTINCT out_trade_no FROM refunds WHERE out_trade_no IN ({})".format(placeholders),
+                out_trade_nos
+            )
+        )
+        self._db.execute("DELETE FROM payments WHERE out_trade_no IN ({})".format(placeholders), out_trade_nos)
+        return entries, refunded
+
+    def _compare(self, entries, refunded, order):
+        out_trade_no, total_fee, status = order[:3]
+        trade_state = self.status_map.get(status, status)
+
+        entry = entries.pop(out_trade_no, None)
+        if entry is None:
+            if trade_state in UNBILLED_STATES:
+                return None
+            if trade_state == REFUND_STATE and out_trade_no in refunded:
+                # 之前支付、当日退款的订单, 账单中只有退款记录
+                return None
+            return Mismatch(out_trade_no, MISSING_IN_BILL, None, order)
+
+        if entry[0] != int(total_fee):
+            return Mismatch(out_trade_no, AMOUNT_MISMATCH, entry, order)
+
+        if trade_state == REFUND_STATE and entry[1] == "SUCCESS" and entry[3]:
+            # 当日支付并退款
+            return None
+
+        if entry[1] != trade_state:
+            return Mismatch(out_trade_no, STATUS_MISMATCH, entry, order)
+
+        return None
+
+    def _iter_mismatches(self):
+        self._build_index()
+
+        orders = iter(self.orders)
+        while True:
+            batch = list(islice(orders, BATCH_SIZE))
+            if not batch:
+                break
+
+            entries, refunded = self._lookup(list(set(order[0] for order in batch)))
+
+            for order in batch:
+                self.stats["local"] += 1
+
+                mismatch = self._compare(entries, refunded, order)
+                if mismatch is None:
+                    self.stats["matched"] += 1
+                    continue
+
+                self.stats["mismatched"] += 1
+                yield mismatch
+
+        # 剩余的均为账单中存在而本地没有的订单
+        for row in self._db.execute(_SELECT_PAYMENTS):
+            self.stats["mismatched"] += 1
+            yield Mismatch(row[0], MISSING_LOCAL, tuple(row[1:]), None)
+
+    def __iter__(self):
+        started_at = time.time()
+
+        self._db, path = self._open_index()
+        try:
+            for mismatch in self._iter_mismatches():
+                yield mismatch
+        finally:
+            self._db.close()
+            self._db = None
+            os.remove(path)
+
+        self.stats["elapsed"] = time.time() - started_at
+        logger.info("Reconcile wx bill finished: {}".format(self.stats))
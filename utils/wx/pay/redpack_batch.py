@@ -0,0 +1,259 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+# Date: 2026/10/18
+
+"""
+    红包批量发放
+
+        以有界线程池并发调用 `WeChatRedPack.send`, 按每分钟限额平滑发放, 每个红包的发放状态
+        追加写入日志文件(jsonl, 按 mch_billno 记录), 中断后使用同一日志文件重新运行即可继续:
+
+            sent        已发放, 不再发送
+            failed      业务失败(余额不足、openid 错误等), 不再发送
+            pending     已发出请求但未得到结果(进程中断或网络异常), 重新运行时使用相同 mch_billno 重发,
+                        微信按 mch_billno 保证幂等, 不会重复发放
+
+        发放结束后通过 `WeChatRedPack.query` 核对已发放及结果未知的红包
+"""
+
+import os
+import json
+import time
+import logging
+import threading
+
+from concurrent.futures import FIRST_COMPLETED
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import wait
+
+from utils.ratelimit import RateLimiter
+
+logger = logging.getLogger(__name__)
+
+
+SENT = "sent"
+FAILED = "failed"
+PENDING = "pending"
+
+# 可使用相同 mch_billno 重试的错误码
+RETRY_ERRCODES = frozenset(["SYSTEMERROR", "FREQ_LIMIT", "PROCESSING", "CA_ERROR"])
+
+# 查询到的红包状态中已确定发放的状态, SENDING(发放中)仍需等待结果
+SENT_STATUSES = frozenset(["SENT", "RECEIVED", "RFUND_ING", "REFUND"])
+
+
+class RedPackBatch(object):
+
+    def __init__(self, red_pack, payouts, journal_path, defaults=None, max_workers=4,
+                 per_minute=1800, reconcile=True):
+        """初始化参数
+
+        Parameters
+        ----------
+        red_pack: WeChatRedPack
+
+            红包接口
+
+        payouts: iterable
+
+            发放明细, 每项为 `WeChatRedPack.send` 的参数(dict), 必须包含 mch_billno, re_openid, total_amount
+
+        journal_path: string
+
+            发放日志文件路径
+
+        defaults: dict
+
+            所有红包共用的参数, 如 wishing, client_ip, act_name, remark, send_name
+
+        max_workers: int
+
+            最大并发数
+
+        per_minute: int
+
+            每分钟最多发放个数(微信默认限制为 1800 个/分钟)
+
+        reconcile: bool
+
+            发放结束后是否查询核对
+        """
+        self.red_pack = red_pack
+        self.payouts = payouts
+        self.journal_path = journal_path
+        self.defaults = defaults or {}
+        self.max_workers = max_workers
+        self.limiter = RateLimiter(per_minute / 60.0, capacity=1)
+        self.reconcile_after = reconcile
+
+        self._journal_lock = threading.Lock()
+        # mch_billno: 最新状态记录
+        self.records = self._load_journal()
+
+        self.stats = {
+            "total": 0,
+            "skipped": 0,
+            # 重复的 mch_billno, 只发放第一个
+            "duplicated": 0,
+            "sent": 0,
+            "failed": 0,
+            "pending": 0,
+            "elapsed": 0,
+        }
+
+    def _load_journal(self):
+        records = {}
+        if not os.path.exists(self.journal_path):
+            return records
+
+        with open(self.journal_path) as fp:
+            for line in fp:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # 中断时写了一半的行
+                    continue
+                records[record["mch_billno"]] = record
+        return records
+
+    def _write(self, mch_billno, status, **fields):
+        record = dict(fields, mch_billno=mch_billno, status=status, ts=int(time.time()))
+        line = json.dumps(record, ensure_ascii=False) + "\n"
+
+        with self._journal_lock:
+            with open(self.journal_path, "a") as fp:
+                fp.write(line)
+                fp.flush()
+                os.fsync(fp.fileno())
+            self.records[mch_billno] = record
+
+        return record
+
+    @staticmethod
+    def _summary(result):
+        return dict((key, result.get(key)) for key in (
+            "return_code", "return_msg", "result_code", "err_code", "err_code_des", "send_listid"
+        ) if result.get(key) is not None)
+
+    def _send(self, payout):
+        mch_billno = payout["mch_billno"]
+        self._write(mch_billno, PENDING, re_openid=payout["re_openid"], total_amount=payout["total_amount"])
+
+        self.limiter.acquire()
+
+        try:
+            result = self.red_pack.send(**dict(self.defaults, **payout))
+        except Exception as exc:
+            logger.error("Send wx red pack {} failed: {}".format(mch_billno, exc))
+            return self._write(mch_billno, PENDING, error=str(exc))
+
+        summary = self._summary(result)
+        if result.get("return_code") == "SUCCESS" and result.get("result_code") == "SUCCESS":
+            return self._write(mch_billno, SENT, **summary)
+
+        if result.get("err_code") in RETRY_ERRCODES or result.get("return_code") != "SUCCESS":
+            return self._write(mch_billno, PENDING, **summary)
+
+        logger.error("Send wx red pack {} failed: {}".format(mch_billno, summary))
+        return self._write(mch_billno, FAILED, **summary)
+
+    def _collect(self, future):
+        record = future.result()
+        self.stats[record["status"]] += 1
+
+    def send(self):
+        """发放全部红包
+
+        """
+        started_at = time.time()
+        executor = ThreadPoolExecutor(max_workers=self.max_workers)
+        pending = set()
+        submitted = set()
+
+        try:
+            for payout in self.payouts:
+                self.stats["total"] += 1
+
+                if payout["mch_billno"] in submitted:
+                    # 相同 mch_billno 的请求微信视为同一红包, 并发发送时后一个的结果不确定
+                    logger.error("Duplicated wx red pack mch_billno {}, skipped".format(payout["mch_billno"]))
+                    self.stats["duplicated"] += 1
+                    continue
+                submitted.add(payout["mch_billno"])
+
+                record = self.records.get(payout["mch_billno"])
+                if record is not None and record["status"] in (SENT, FAILED):
+                    # 上次运行已完成
+                    self.stats["skipped"] += 1
+                    continue
+
+                while len(pending) >= self.max_workers * 2:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        self._collect(future)
+
+                pending.add(executor.submit(self._send, payout))
+
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    self._collect(future)
+        finally:
+            for future in pending:
+                future.cancel()
+            executor.shutdown(wait=True)
+
+            self.stats["elapsed"] = time.time() - started_at
+            logger.info("Send wx red packs finished: {}".format(self.stats))
+
+    def _query(self, mch_billno):
+        self.limiter.acquire()
+        try:
+            return mch_billno, self.red_pack.query(mch_billno)
+        except Exception as exc:
+            logger.error("Query wx red pack {} failed: {}".format(mch_billno, exc))
+            return mch_billno, {}
+
+    def reconcile(self):
+        """查询核对已发放及结果未知的红包
+
+        Returns
+        -------
+        dict
+            mch_billno: 红包状态(SENDING, SENT, FAILED, RECEIVED, RFUND_ING, REFUND), 查询不到的为 None
+        """
+        billnos = [billno for billno, record in self.records.items() if record["status"] in (SENT, PENDING)]
+
+        statuses = {}
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            for mch_billno, result in executor.map(self._query, billnos):
+                status = result.get("status") if result.get("result_code") == "SUCCESS" else None
+                statuses[mch_billno] = status
+
+                record = self.records[mch_billno]
+                if record["status"] == PENDING and (status in SENT_STATUSES or status == "FAILED"):
+                    # 结果未知的红包已有确定结果, 发放中(SENDING)的仍为 pending, 下次核对或重新运行时确认
+                    self._write(mch_billno, FAILED if status == "FAILED" else SENT, hb_status=status)
+                elif record["status"] == SENT and status in (None, "FAILED"):
+                    logger.error("Wx red pack {} is recorded as sent but status is {}".format(mch_billno, status))
+
+        return statuses
+
+    def run(self):
+        """发放并核对
+
+        Returns
+        -------
+        dict
+            统计数据, 核对后附带各红包状态的数量
+        """
+        self.send()
+
+        if self.reconcile_after:
+            statuses = self.reconcile()
+            counts = {}
+            for status in statuses.values():
+                counts[status] = counts.get(status, 0) + 1
+            self.stats["reconciled"] = counts
+
+        return self.stats
@@ -0,0 +1,184 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+# Date: 2026/10/18
+
+"""
+    多商户支付客户端
+
+        服务商模式下每个子商户(sub_mch_id)需要独立的 `WeChatPay`, 按请求临时构建会重复读取密钥文件,
+        因此按 (mch_id, sub_mch_id, app_id) 缓存客户端:
+
+            密钥文件只读取一次, 文件修改后(mtime 变化)自动重新加载
+            客户端数量超过 maxsize 时淘汰最久未使用的
+            所有客户端共用同一个连接池会话
+
+        > registry = WeChatPayRegistry({"1900000109": {"app_id": "wx...", "api_key_path": "..."}})
+        > registry.get("1900000109", sub_mch_id="1900000110").order.query(out_trade_no="...")
+"""
+
+import os
+import time
+import logging
+import threading
+
+from collections import OrderedDict
+
+from utils.wx.pay.basic import WeChatPay
+from utils.wx.pay.basic import load_api_key
+
+logger = logging.getLogger(__name__)
+
+
+class KeyFileCache(object):
+
+    """
+    密钥文件缓存(线程安全)
+    """
+
+    def __init__(self, check_interval=5):
+        """初始化参数
+
+        Parameters
+        ----------
+        check_interval: float
+
+            检查文件是否修改的最小间隔(秒)
+        """
+        self.check_interval = check_interval
+        # path: (key, mtime, checked_at)
+        self._keys = {}
+        self._lock = threading.Lock()
+
+    def get(self, path):
+        now = time.time()
+        item = self._keys.get(path)
+        if item is not None and now - item[2] < self.check_interval:
+            return item[0]
+
+        with self._lock:
+            item = self._keys.get(path)
+            mtime = os.stat(path).st_mtime
+
+            if item is not None and item[1] == mtime:
+                key = item[0]
+            else:
+                if item is not None:
+                    logger.info("Reload wx pay api key: {}".format(path))
+                key = load_api_key(path)
+
+            self._keys[path] = (key, mtime, now)
+            return key
+
+
+class WeChatPayRegistry(object):
+
+    def __init__(self, merchants, maxsize=128, session=None, client_class=WeChatPay,
+                 check_interval=5, **defaults):
+        """初始化参数
+
+        Parameters
+        ----------
+        merchants: dict
+
+            商户配置, mch_id: {"app_id", "api_key_path", "mch_cert", "mch_key", ...}
+
+        maxsize: int
+
+            最多缓存的客户端数量
+
+        session: requests.Session
+
+            所有客户端共用的连接池会话
+
+        client_class: class
+
+            客户端类, 如 `AsyncWeChatPay`
+
+        check_interval: float
+
+            检查密钥文件是否修改的最小间隔(秒)
+
+        defaults: dict
+
+            所有客户端的默认参数, 如 timeout, debug
+        """
+        self.merchants = merchants
+        self.maxsize = maxsize
+        self.session = session
+        self.client_class = client_class
+        self.defaults = defaults
+
+        self.keys = KeyFileCache(check_interval)
+        self._clients = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _get_options(self, mch_id):
+        try:
+            options = dict(self.defaults, **self.merchants[mch_id])
+        except KeyError:
+            raise ValueError("Unknown wx pay mch_id: {}".format(mch_id))
+        return options
+
+    def _build(self, mch_id, sub_mch_id, app_id):
+        options = self._get_options(mch_id)
+        options.update(
+            app_id=app_id,
+            mch_id=mch_id,
+            sub_mch_id=sub_mch_id,
+            api_key=self.keys.get(options["api_key_path"]),
+        )
+        if self.session is not None:
+            options["session"] = self.session
+        return self.client_class(**options)
+
+    def get(self, mch_id, sub_mch_id=None, app_id=None):
+        """获取支付客户端
+
+        Parameters
+        ----------
+        mch_id: string
+
+            商户号(服务商模式下为服务商商户号)
+
+        sub_mch_id: string
+
+            子商户号
+
+        app_id: string
+
+            公众号 app_id, 默认使用商户配置中的 app_id
+
+        Returns
+        -------
+        WeChatPay
+        """
+        app_id = app_id or self._get_options(mch_id)["app_id"]
+        key = (mch_id, sub_mch_id, app_id)
+
+        with self._lock:
+            client = self._clients.get(key)
+            if client is not None:
+                self._clients.move_to_end(key)
+
+        if client is not None:
+            # 密钥文件修改后更新
+            client.api_key = self.keys.get(client.api_key_path)
+            return client
+
+        client = self._build(mch_id, sub_mch_id, app_id)
+
+        with self._lock:
+            # 并发构建时保留先放入的客户端
+            client = self._clients.setdefault(key, client)
+            self._clients.move_to_end(key)
+            while len(self._clients) > self.maxsize:
+                self._clients.popitem(last=False)
+
+        return client
+
+    def clear(self):
+        with self._lock:
+            self._clients.clear()
+
+    def __len__(self):
+        return len(self._clients)
@@ -0,0 +1,289 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+# Date: 2026/10/18
+
+"""
+    凭证存储
+
+        gunicorn / celery 等多进程部署时, 每个进程各自拉取 access_token 会互相顶掉对方的凭证,
+        并且浪费每日的调用额度, 因此凭证统一放到可跨进程共享的存储中
+
+        MemoryStorage       进程内存储(模拟 redis 的 SET NX EX 语义, 适用于单进程或测试)
+
+        LRUMemoryStorage    限制容量的进程内存储, 超出后淘汰最久未使用的 key(如网页授权的用户凭证)
+
+        FileStorage         文件存储, 通过文件锁在同一台机器的多个进程间共享
+
+        DjangoCacheStorage  Django 缓存存储(需配置 memcached / redis 等共享缓存)
+
+        RedisStorage        兼容 redis-py 接口的客户端
+"""
+
+import os
+import json
+import time
+import errno
+import logging
+import tempfile
+import threading
+
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+
+class BaseStorage(object):
+
+    """
+    存储基类
+
+        value 均为可 `json` 序列化的对象
+    """
+
+    def get(self, key, default=None):
+        raise NotImplementedError()
+
+    def set(self, key, value, ttl=None):
+        raise NotImplementedError()
+
+    def delete(self, key):
+        raise NotImplementedError()
+
+    def acquire_lock(self, key, ttl=10):
+        """尝试获取锁(非阻塞)
+
+        Parameters
+        ----------
+        key : string
+            锁名称
+
+        ttl : int
+            锁的最长持有时间(秒), 防止持有者异常退出后死锁
+
+        Returns
+        -------
+        bool
+        """
+        raise NotImplementedError()
+
+    def release_lock(self, key):
+        raise NotImplementedError()
+
+
+class MemoryStorage(BaseStorage):
+
+    """
+    进程内存储
+    """
+
+    def __init__(self):
+        self._data = {}
+        self._lock = threading.Lock()
+
+    def _get_item(self, key):
+        item = self._data.get(key)
+        if item is None:
+            return None
+        value, expires_at = item
+        if expires_at and expires_at <= time.time():
+            self._data.pop(key, None)
+            return None
+        return item
+
+    def get(self, key, default=None):
+        with self._lock:
+            item = self._get_item(key)
+        return default if item is None else item[0]
+
+    def _set_item(self, key, value, ttl):
+        self._data[key] = (value, time.time() + ttl if ttl else 0)
+
+    def set(self, key, value, ttl=None):
+        with self._lock:
+            self._set_item(key, value, ttl)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def acquire_lock(self, key, ttl=10):
+        with self._lock:
+            if self._get_item(key) is not None:
+                return False
+            self._set_item(key, True, ttl)
+            return True
+
+    def release_lock(self, key):
+        self.delete(key)
+
+
+class LRUMemoryStorage(MemoryStorage):
+
+    """
+    限制容量的进程内存储
+    """
+
+    def __init__(self, maxsize=10000):
+        super(LRUMemoryStorage, self).__init__()
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+
+    def _get_item(self, key):
+        item = super(LRUMemoryStorage, self)._get_item(key)
+        if item is not None:
+            self._data.move_to_end(key)
+        return item
+
+    def _set_item(self, key, value, ttl):
+        super(LRUMemoryStorage, self)._set_item(key, value, ttl)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+
+class FileStorage(BaseStorage):
+
+    """
+    文件存储
+
+        每个 key 对应目录下的一个 `json` 文件, 写入时先写临时文件再原子替换;
+        锁使用 `fcntl.flock`, 持有锁的进程退出后由系统自动释放, ttl 参数不生效
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._fds = {}
+        self._lock = threading.Lock()
+
+        try:
+            os.makedirs(path)
+        except OSError as exc:
+            if exc.errno != errno.EEXIST:
+                raise
+
+    def _filename(self, key, suffix=".json"):
+        return os.path.join(self.path, "{}{}".format(key.replace(":", "_"), suffix))
+
+    def get(self, key, default=None):
+        try:
+            with open(self._filename(key)) as fp:
+                item = json.load(fp)
+        except (IOError, OSError, ValueError):
+            return default
+
+        if item.get("expires_at") and item["expires_at"] <= time.time():
+            return default
+
+        return item.get("value", default)
+
+    def set(self, key, value, ttl=None):
+        item = {
+            "value": value,
+            "expires_at": time.time() + ttl if ttl else 0
+        }
+        fd, tmp_path = tempfile.mkstemp(dir=self.path)
+        try:
+            with os.fdopen(fd, "w") as fp:
+                json.dump(item, fp)
+            os.replace(tmp_path, self._filename(key))
+        except Exception:
+            os.remove(tmp_path)
+            raise
+
+    def delete(self, key):
+        try:
+            os.remove(self._filename(key))
+        except OSError:
+            pass
+
+    def acquire_lock(self, key, ttl=10):
+        import fcntl
+
+        with self._lock:
+            if key in self._fds:
+                return False
+
+            fd = os.open(self._filename(key, ".lock"), os.O_RDWR | os.O_CREAT, 0o644)
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except (IOError, OSError):
+                os.close(fd)
+                return False
+
+            self._fds[key] = fd
+            return True
+
+    def release_lock(self, key):
+        import fcntl
+
+        with self._lock:
+            fd = self._fds.pop(key, None)
+
+        if fd is not None:
+            fcntl.flock(fd, fcntl.LOCK_UN)
+            os.close(fd)
+
+
+class DjangoCacheStorage(BaseStorage):
+
+    """
+    Django 缓存存储
+
+        `cache.add` 仅在 key 不存在时写入, 以此实现锁
+    """
+
+    def __init__(self, alias="default"):
+        from django.core.cache import caches
+
+        self.cache = caches[alias]
+
+    def get(self, key, default=None):
+        return self.cache.get(key, default)
+
+    def set(self, key, value, ttl=None):
+        self.cache.set(key, value, ttl)
+
+    def delete(self, key):
+        self.cache.delete(key)
+
+    def acquire_lock(self, key, ttl=10):
+        return self.cache.add(key, 1, ttl)
+
+    def release_lock(self, key):
+        self.cache.delete(key)
+
+
+class RedisStorage(BaseStorage):
+
+    """
+    redis 存储
+
+        client 为 `redis.StrictRedis` 或兼容其 get / set / delete 接口的对象
+    """
+
+    def __init__(self, client, prefix=""):
+        self.client = client
+        self.prefix = prefix
+
+    def _key(self, key):
+        return "{}{}".format(self.prefix, key)
+
+    def get(self, key, default=None):
+        value = self.client.get(self._key(key))
+        if value is None:
+            return default
+        if isinstance(value, bytes):
+            value = value.decode("utf-8")
+        return json.loads(value)
+
+    def set(self, key, value, ttl=None):
+        self.client.set(self._key(key), json.dumps(value), ex=ttl)
+
+    def delete(self, key):
+        self.client.delete(self._key(key))
+
+    def acquire_lock(self, key, ttl=10):
+        return bool(self.client.set(self._key(key), 1, ex=ttl, nx=True))
+
+    def release_lock(self, key):
+        self.client.delete(self._key(key))
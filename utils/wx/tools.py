@@ -4,12 +4,20 @@
 
 import hashlib
 import logging
+import threading
 
 from xml.etree import ElementTree as EleTree
 
+try:
+    from lxml import etree
+except ImportError:  # pragma: no cover
+    etree = None
+
 
 logger = logging.getLogger(__name__)
 
+PARSE_ERRORS = (EleTree.ParseError, ) if etree is None else (EleTree.ParseError, etree.XMLSyntaxError)
+
 
 def format_params(params, api_key=None):
     data = ["{0}={1}".format(k, params[k]) for k in sorted(params) if params[k]]
@@ -34,6 +42,26 @@ def calculate_signature(params, api_key, sign_type="MD5"):
     return h.hexdigest().upper()
 
 
+def _xml_text(data):
+    parts = ["<xml>"]
+    for k, v in data.items():
+
+        if not v:
+            continue
+
+        text = v if v.__class__ is str else str(v)
+
+        if text.isdigit():
+            parts += ("<", k, ">", text, "</", k, ">")
+        else:
+            if "]]>" in text:
+                # CDATA 中不能出现结束标记, 拆分为两段
+                text = text.replace("]]>", "]]]]><![CDATA[>")
+            parts += ("<", k, "><![CDATA[", text, "]]></", k, ">")
+    parts.append("</xml>")
+    return "".join(parts)
+
+
 def dict_to_xml(data):
     """将 `dict` 转化为 `xml`.
 
@@ -48,27 +76,48 @@ def dict_to_xml(data):
     -------
     string
     """
-    xml_list = ["<xml>"]
-    for k, v in data.items():
+    return _xml_text(data)
 
-        if not v:
-            continue
 
-        if str(v).isdigit():
-            xml_list.append("<{0}>{1}</{0}>".format(k, v))
-        else:
-            xml_list.append("<{0}><![CDATA[{1}]]></{0}>".format(k, v))
-    xml_list.append("</xml>")
-    return "".join(xml_list)
+def dict_to_xml_bytes(data):
+    """将 `dict` 转化为 `utf-8` 编码的 `xml`, 可直接作为请求体
+
+        先拼接为 str 再整体编码一次, 比逐个字段编码后拼接 bytes 更快
+    """
+    return _xml_text(data).encode("utf-8")
+
+
+def _new_parser():
+    if etree is not None:
+        # 禁止解析外部实体
+        return etree.XMLParser(resolve_entities=False, no_network=True)
+    return EleTree.XMLParser()
+
+
+# lxml 的解析器不是线程安全的, 每个线程复用各自的解析器, 以免每次解析重新创建
+_local = threading.local()
+
+
+def _get_parser():
+    parser = getattr(_local, "parser", None)
+    if parser is None:
+        parser = _local.parser = _new_parser()
+    return parser
+
+
+def _element_to_dict(root):
+    # lxml 会保留注释等节点, 其 tag 不是字符串
+    return dict((child.tag, child.text) for child in root if isinstance(child.tag, str))
 
 
 def xml_to_dict(xml_string):
     """将 `xml` 转化为 `dict`.
 
+        安装 lxml 时使用 lxml 解析, 否则使用 ElementTree
 
     Parameters
     ----------
-    xml_string: string
+    xml_string: string OR bytes
 
         转换的数据
 
@@ -76,7 +125,60 @@ def xml_to_dict(xml_string):
     -------
     dict
     """
+    if isinstance(xml_string, str):
+        xml_string = xml_string.encode("utf-8")
+
+    try:
+        if etree is not None:
+            return _element_to_dict(etree.fromstring(xml_string, _get_parser()))
+        return _element_to_dict(EleTree.fromstring(xml_string))
+    except PARSE_ERRORS:
+        return {}
+
+
+class XMLDictParser(object):
+
+    """
+    增量解析 `xml`, 边读取边解析, 无需先拼接完整的请求体
+
+        > parser = XMLDictParser()
+        > for chunk in chunks:
+        >     parser.feed(chunk)
+        > data = parser.close()
+    """
+
+    def __init__(self):
+        self._parser = _new_parser()
+
+    def feed(self, data):
+        if isinstance(data, str):
+            data = data.encode("utf-8")
+        self._parser.feed(data)
+
+    def close(self):
+        """结束解析
+
+        Returns
+        -------
+        dict, 解析失败时返回空字典
+        """
+        try:
+            return _element_to_dict(self._parser.close())
+        except PARSE_ERRORS:
+            return {}
+
+
+def read_xml(stream, chunk_size=8192):
+    """从文件对象(如 Django 的 `request`)中增量读取并解析 `xml`
+
+    """
+    parser = XMLDictParser()
     try:
-        return dict((child.tag, child.text) for child in EleTree.fromstring(xml_string))
-    except EleTree.ParseError:
+        while True:
+            chunk = stream.read(chunk_size)
+            if not chunk:
+                break
+            parser.feed(chunk)
+    except PARSE_ERRORS:
         return {}
+    return parser.close()